@@ -13,21 +13,54 @@ Site: https://github.com/anabe-apereira/organizador-backgrounds
 import os
 import re
 import sys
+import json
+import atexit
+import mmap
 import time
+import hashlib
+import hmac
+import secrets
 import shutil
+import signal
+import struct
+import socket
+import sqlite3
+import tempfile
+import threading
+import socketserver
+import multiprocessing
+import multiprocessing.connection
 import tkinter as tk
 import ctypes
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, asdict, field, fields
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from tkinter import ttk, messagebox, filedialog
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Callable
 
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
 from sklearn.cluster import KMeans
 
+try:
+    import xxhash  # Opcional: checksum mais rápido na verificação das cópias
+except ImportError:
+    xxhash = None
+
+try:
+    import psutil  # Opcional: memória de todos os processos da análise (relatório de pico)
+except ImportError:
+    psutil = None
+
+try:
+    import resource  # Só em sistemas Unix
+except ImportError:
+    resource = None
+
 def set_win_taskbar_icon(root, icon_path):
     """Set taskbar icon on Windows"""
     try:
@@ -65,6 +98,8 @@ import argparse
 DEFAULT_CONFIG = {
     'sample_frames': 10,  # Number of frames to sample from each video
     'resize_width': 320,  # Width to resize frames for processing
+    'subsample_strategy': 'area',  # How frames are reduced before color analysis (see subsample_frame)
+    'color_engine': 'python',  # Pixel classification implementation (see COLOR_ENGINES)
     'min_color_percent': 20,  # Minimum percentage for a color to be considered
     'supported_formats': ('.mp4', '.mov', '.avi', '.m4v'),
     'color_ranges': {
@@ -79,8 +114,23 @@ DEFAULT_CONFIG = {
     'value_threshold_black': 30,  # Maximum value for black detection
     'value_threshold_white': 200,  # Minimum value for white detection
     'saturation_threshold_white': 30,  # Maximum saturation for white detection
+    'phash_max_distance': 10,  # Maximum Hamming distance between near-duplicate frames
+    'split_min_duration': 600,  # Videos at least this long (s) are analyzed in parallel segments
+    'split_min_pixels': 3840 * 2160,  # Same for resolutions at or above this (4K)
+    'split_workers': 0,  # Processes per split video (0 = number of CPUs)
+    'memory_budget_mb': 0,  # Memory for concurrent decodes (0 = 60% of physical RAM)
+    'timeout_base': 60,  # Analysis time budget per file (s)...
+    'timeout_per_mb': 0.5,  # ...plus this per MB of file size...
+    'timeout_per_minute': 5,  # ...plus this per minute of video
 }
 
+# Pastas criadas no destino
+REQUIRED_DIRS = [
+    'vermelho', 'laranja', 'amarelo', 'verde',
+    'azul', 'violeta', 'preto-branco',
+    'colorido', 'nao-identificado'
+]
+
 # Configure logging
 def setup_logging():
     """Configura logging com arquivo timestamp."""
@@ -224,137 +274,3385 @@ def analyze_frame_colors(frame, color_infos):
             for name, color_info in color_infos.items():
                 if color_info.is_bw:
                     continue
-                if is_color_in_range(h_val, color_info):
-                    color_counts[name] += 1
-                    break
-    
-    # Convert counts to percentages
-    return {name: (count / total_pixels) * 100 for name, count in color_counts.items()}
+                if is_color_in_range(h_val, color_info):
+                    color_counts[name] += 1
+                    break
+    
+    # Convert counts to percentages
+    return {name: (count / total_pixels) * 100 for name, count in color_counts.items()}
+
+def analyze_frame_colors_numpy(frame, color_infos):
+    """Versão vetorizada de `analyze_frame_colors`, com o mesmo resultado.
+
+    Cada pixel conta para a primeira cor (na ordem de `color_infos`) cuja faixa
+    contém sua matiz, como no laço pixel a pixel da versão de referência.
+    """
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    h, s, v = cv2.split(hsv)
+    total_pixels = h.size
+    
+    is_bw = (v < DEFAULT_CONFIG['value_threshold_black']) | (
+        (v > DEFAULT_CONFIG['value_threshold_white']) & (s < DEFAULT_CONFIG['saturation_threshold_white']))
+    remaining = ~is_bw & (s >= DEFAULT_CONFIG['saturation_threshold'])
+    
+    color_counts = {}
+    for name, color_info in color_infos.items():
+        if color_info.is_bw:
+            color_counts[name] = int(np.count_nonzero(is_bw))
+            continue
+        in_range = np.zeros_like(remaining)
+        for low, high in color_info.h_range:
+            in_range |= (h >= low) & (h <= high)
+        matched = remaining & in_range
+        color_counts[name] = int(np.count_nonzero(matched))
+        remaining &= ~matched
+    
+    return {name: (count / total_pixels) * 100 for name, count in color_counts.items()}
+
+# Implementações da classificação de pixels; 'python' é a referência
+COLOR_ENGINES = {
+    'python': analyze_frame_colors,
+    'numpy': analyze_frame_colors_numpy,
+}
+
+def get_color_engine():
+    """Função de classificação de pixels escolhida na configuração."""
+    return COLOR_ENGINES[DEFAULT_CONFIG['color_engine']]
+
+# ---------------------------------------------------------------------------
+# Metadados: leitura rápida dos cabeçalhos do contêiner (sem decodificar)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class VideoMetadata:
+    """Propriedades do vídeo lidas do contêiner (ou do OpenCV, como alternativa)."""
+    duration: float = 0.0  # segundos
+    frame_count: int = 0
+    fps: float = 0.0
+    width: int = 0
+    height: int = 0
+    codec: str = ''  # fourcc, ex.: 'avc1', 'hvc1', 'apch' (ProRes), 'MJPG'
+    gop: Optional[float] = None  # frames entre quadros-chave, em média
+    source: str = ''  # 'mp4', 'avi' ou 'opencv'
+
+MP4_CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+MAX_HEADER_BYTES = 64 * 1024 * 1024
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Percorre boxes ISO-BMFF (MP4/MOV) em memória: gera (tipo, início do conteúdo, fim)."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack('>I4s', data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            break
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+def _find_box(data: bytes, path: List[bytes], start=0, end=None):
+    """Primeiro box no caminho indicado (ex.: [b'mdia', b'mdhd'])."""
+    for box_type, body, box_end in _iter_boxes(data, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return body, box_end
+            found = _find_box(data, path[1:], body, box_end)
+            if found:
+                return found
+    return None
+
+def _probe_mp4(f) -> Optional[VideoMetadata]:
+    """Lê o box `moov` de um MP4/MOV e extrai as propriedades da trilha de vídeo."""
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    offset = 0
+    moov = None
+    # Percorre só os cabeçalhos de primeiro nível; `mdat` (os dados) é pulado
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        size, box_type = struct.unpack('>I4s', header[:8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            return None
+        if box_type == b'moov':
+            if size > MAX_HEADER_BYTES:
+                return None
+            f.seek(offset + header_size)
+            moov = f.read(size - header_size)
+            break
+        offset += size
+    if moov is None:
+        return None
+
+    for box_type, body, end in _iter_boxes(moov):
+        if box_type != b'trak':
+            continue
+        hdlr = _find_box(moov, [b'mdia', b'hdlr'], body, end)
+        if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b'vide':
+            continue
+
+        meta = VideoMetadata(source='mp4')
+        tkhd = _find_box(moov, [b'tkhd'], body, end)
+        if tkhd:
+            width, height = struct.unpack('>II', moov[tkhd[1] - 8:tkhd[1]])
+            meta.width, meta.height = width >> 16, height >> 16
+
+        mdhd = _find_box(moov, [b'mdia', b'mdhd'], body, end)
+        if mdhd:
+            version = moov[mdhd[0]]
+            if version == 1:
+                timescale, duration = struct.unpack('>IQ', moov[mdhd[0] + 20:mdhd[0] + 32])
+            else:
+                timescale, duration = struct.unpack('>II', moov[mdhd[0] + 12:mdhd[0] + 20])
+            if timescale:
+                meta.duration = duration / timescale
+
+        stbl = _find_box(moov, [b'mdia', b'minf', b'stbl'], body, end)
+        if stbl:
+            stsd = _find_box(moov, [b'stsd'], *stbl)
+            if stsd and stsd[1] - stsd[0] >= 16:
+                entry = stsd[0] + 8
+                meta.codec = moov[entry + 4:entry + 8].decode('latin-1').strip()
+                if not meta.width and stsd[1] - entry >= 36:
+                    meta.width, meta.height = struct.unpack('>HH', moov[entry + 32:entry + 36])
+            stsz = _find_box(moov, [b'stsz'], *stbl)
+            if stsz:
+                meta.frame_count = struct.unpack('>I', moov[stsz[0] + 8:stsz[0] + 12])[0]
+            stss = _find_box(moov, [b'stss'], *stbl)
+            if meta.frame_count:
+                if stss:
+                    keyframes = struct.unpack('>I', moov[stss[0] + 4:stss[0] + 8])[0]
+                    meta.gop = meta.frame_count / keyframes if keyframes else None
+                else:
+                    # Sem tabela de quadros-chave: todos os frames são chave (ex.: ProRes)
+                    meta.gop = 1.0
+
+        if meta.duration and meta.frame_count:
+            meta.fps = meta.frame_count / meta.duration
+        return meta
+    return None
+
+def _probe_avi(f) -> Optional[VideoMetadata]:
+    """Lê `avih`/`strh` do cabeçalho AVI e o índice `idx1` para contar quadros-chave."""
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'AVI ':
+        return None
+    meta = VideoMetadata(source='avi')
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    offset = 12
+    video_stream = None
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        chunk_id, size = struct.unpack('<4sI', f.read(8))
+        if chunk_id == b'LIST':
+            list_type = f.read(4)
+            if list_type == b'hdrl' and size <= MAX_HEADER_BYTES:
+                hdrl = f.read(size - 4)
+                video_stream = _parse_avi_hdrl(hdrl, meta)
+        elif chunk_id == b'idx1' and video_stream is not None and size <= MAX_HEADER_BYTES:
+            index = f.read(size)
+            prefix = f'{video_stream:02d}'.encode()
+            frames = keyframes = 0
+            for pos in range(0, len(index) - 15, 16):
+                ckid, flags = struct.unpack('<4sI', index[pos:pos + 8])
+                if ckid[:2] == prefix and ckid[2:3] == b'd':
+                    frames += 1
+                    if flags & 0x10:  # AVIIF_KEYFRAME
+                        keyframes += 1
+            if keyframes:
+                meta.gop = frames / keyframes
+        offset += 8 + size + (size & 1)
+    if meta.fps and meta.frame_count:
+        meta.duration = meta.frame_count / meta.fps
+    return meta if video_stream is not None else None
+
+def _parse_avi_hdrl(hdrl: bytes, meta: VideoMetadata) -> Optional[int]:
+    """Preenche `meta` a partir da lista `hdrl`; retorna o número da stream de vídeo."""
+    offset = 0
+    stream = 0
+    video_stream = None
+    while offset + 8 <= len(hdrl):
+        chunk_id, size = struct.unpack('<4sI', hdrl[offset:offset + 8])
+        body = hdrl[offset + 8:offset + 8 + size]
+        if chunk_id == b'avih' and len(body) >= 40:
+            meta.frame_count = struct.unpack('<I', body[16:20])[0]
+            meta.width, meta.height = struct.unpack('<II', body[32:40])
+        elif chunk_id == b'LIST' and body[:4] == b'strl':
+            strh = body[4:]
+            if strh[:4] == b'strh' and len(strh) >= 8 + 36:
+                header = strh[8:]
+                if header[:4] == b'vids' and video_stream is None:
+                    video_stream = stream
+                    meta.codec = header[4:8].decode('latin-1').strip('\x00 ')
+                    scale, rate = struct.unpack('<II', header[20:28])
+                    length = struct.unpack('<I', header[32:36])[0]
+                    if scale:
+                        meta.fps = rate / scale
+                    if length:
+                        meta.frame_count = length
+            stream += 1
+        offset += 8 + size + (size & 1)
+    return video_stream
+
+def _probe_opencv(video_path: Path) -> Optional[VideoMetadata]:
+    """Alternativa para formatos sem leitor próprio: propriedades informadas pelo OpenCV."""
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        return None
+    try:
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        meta = VideoMetadata(
+            frame_count=int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            fps=cap.get(cv2.CAP_PROP_FPS),
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            codec=''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00 '),
+            source='opencv'
+        )
+    finally:
+        cap.release()
+    if meta.fps > 0:
+        meta.duration = meta.frame_count / meta.fps
+    return meta
+
+def probe_metadata(video_path: Path, opencv_fallback: bool = True) -> Optional[VideoMetadata]:
+    """Lê duração, número de frames, resolução, codec e GOP de um vídeo.
+
+    Se o cabeçalho não puder ser lido, recorre ao OpenCV, a menos que
+    `opencv_fallback` seja falso: abrir a captura pode travar ou derrubar o
+    processo, então com a análise isolada isso fica para o processo de análise
+    (que informa a duração ao supervisor ao abrir o vídeo). Nesse caso o
+    retorno pode ser parcial (sem número de frames) ou None.
+    """
+    try:
+        with open(video_path, 'rb') as f:
+            head = f.read(12)
+            f.seek(0)
+            if head[:4] == b'RIFF':
+                meta = _probe_avi(f)
+            elif head[4:8] in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip'):
+                meta = _probe_mp4(f)
+            else:
+                meta = None
+    except (OSError, struct.error, UnicodeDecodeError):
+        meta = None
+    if (meta is None or not meta.frame_count) and opencv_fallback:
+        meta = _probe_opencv(video_path)
+    return meta
+
+def probe_videos(video_files: List[Path], journal=None, workers: int = 16,
+                 opencv_fallback: bool = True) -> Dict[Path, VideoMetadata]:
+    """Lê os metadados de vários vídeos em paralelo (leitura de cabeçalhos, limitada por E/S).
+
+    Com `journal`, metadados de arquivos inalterados vêm do cache do diário.
+    `opencv_fallback`: ver `probe_metadata`.
+    """
+    results: Dict[Path, VideoMetadata] = {}
+    to_probe = []
+    for path in video_files:
+        cached = journal.stages(path).get('probed') if journal else None
+        if cached:
+            results[path] = VideoMetadata(**cached['metadata'])
+        else:
+            to_probe.append(path)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        probed = pool.map(lambda path: probe_metadata(path, opencv_fallback), to_probe)
+        for path, meta in zip(to_probe, probed):
+            if meta is None:
+                continue
+            results[path] = meta
+            if journal:
+                journal.record(path, 'probed', sync=False, metadata=asdict(meta))
+    return results
+
+# ---------------------------------------------------------------------------
+# Quase-duplicados: hash perceptual dos frames amostrados
+# ---------------------------------------------------------------------------
+
+PHASH_PROBE_FRAMES = 3  # Frames usados para decidir se um vídeo é quase-duplicado
+
+def perceptual_hash(frame) -> int:
+    """pHash de 64 bits: DCT 8x8 de baixa frequência de uma miniatura 32x32 em cinza."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    coefficients = cv2.dct(small)[:8, :8].flatten()
+    bits = coefficients > np.median(coefficients[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+def majority_hash(hashes: List[int]) -> int:
+    """Combina vários hashes bit a bit por maioria."""
+    bits = np.unpackbits(np.array(hashes, dtype='>u8').view(np.uint8).reshape(len(hashes), 8), axis=1)
+    return int(np.packbits(bits.mean(axis=0) >= 0.5).view('>u8')[0])
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+class NearDuplicateIndex:
+    """Índice de vídeos quase-duplicados (mesmo conteúdo em outra resolução ou formato).
+
+    A chave de cada vídeo é o hash por maioria dos primeiros frames amostrados.
+    A busca usa multi-index hashing: a chave de 64 bits é dividida em 4 blocos
+    de 16 bits; dois hashes a distância <= d têm ao menos um bloco a distância
+    <= d // 4, então basta consultar as variações de cada bloco nesse raio.
+    Os candidatos são confirmados frame a frame: hash, cor média e percentual
+    de cada faixa de cor (a mesma classificação da análise). Fundos lisos ou
+    suaves de cores diferentes têm o mesmo pHash e cores médias parecidas (ex.:
+    cinza e preto-e-branco), então só as faixas de cor os separam.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+    MAX_MEAN_COLOR_DIFF = 16
+    MAX_COLOR_PERCENT_DIFF = 10  # Diferença máxima, em pontos percentuais, de cada faixa de cor
+
+    def __init__(self, max_distance: int = 10):
+        self.max_distance = max_distance
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(self.CHUNKS)]
+        self.entries = []  # (chave, hashes, cores médias, percentuais por faixa, análise)
+        self.members: Dict[int, List[Path]] = {}  # índice do representante -> quase-duplicados
+        radius = max_distance // self.CHUNKS
+        self._masks = [m for m in range(1 << self.CHUNK_BITS) if bin(m).count('1') <= radius]
+
+    def _chunks(self, key: int):
+        mask = (1 << self.CHUNK_BITS) - 1
+        return [(key >> (i * self.CHUNK_BITS)) & mask for i in range(self.CHUNKS)]
+
+    def find(self, hashes: List[int], means: List[Tuple[int, int, int]],
+             colors: List[List[float]]) -> Optional['VideoAnalysis']:
+        """Procura um vídeo já indexado parecido; retorna a análise do representante.
+
+        `colors` são os percentuais de cada faixa de cor dos mesmos frames, na
+        ordem das colunas de `VideoAnalysis.color_timeline`.
+        """
+        entry_id = self._find_entry(hashes, means, colors)
+        return self.entries[entry_id][4] if entry_id is not None else None
+
+    def _find_entry(self, hashes, means, colors) -> Optional[int]:
+        if len(hashes) < 1:
+            return None
+        key = majority_hash(hashes[:PHASH_PROBE_FRAMES])
+        seen = set()
+        for table, chunk in zip(self.tables, self._chunks(key)):
+            for mask in self._masks:
+                for entry_id in table.get(chunk ^ mask, ()):
+                    if entry_id in seen:
+                        continue
+                    seen.add(entry_id)
+                    if self._confirm(key, hashes, means, colors, self.entries[entry_id]):
+                        return entry_id
+        return None
+
+    def _confirm(self, key, hashes, means, colors, entry) -> bool:
+        other_key, other_hashes, other_means, other_colors, _ = entry
+        if hamming_distance(key, other_key) > self.max_distance:
+            return False
+        frames = min(len(hashes), len(other_hashes))
+        # Sem os percentuais dos frames de teste (ex.: diário de uma versão anterior) não há como confirmar
+        compared_colors = min(len(colors), len(other_colors), frames)
+        if compared_colors < min(frames, PHASH_PROBE_FRAMES):
+            return False
+        for i in range(frames):
+            if hamming_distance(hashes[i], other_hashes[i]) > self.max_distance:
+                return False
+            if max(abs(int(a) - int(b)) for a, b in zip(means[i], other_means[i])) > self.MAX_MEAN_COLOR_DIFF:
+                return False
+            if i < compared_colors and max(
+                    abs(float(a) - float(b)) for a, b in zip(colors[i], other_colors[i])) > self.MAX_COLOR_PERCENT_DIFF:
+                return False
+        return True
+
+    def add(self, analysis: 'VideoAnalysis') -> Optional[Path]:
+        """Indexa a análise; retorna o representante se ela for quase-duplicada de outra."""
+        if not analysis.frame_hashes:
+            return None
+        colors = analysis.color_timeline.tolist() if analysis.color_timeline is not None else []
+        entry_id = self._find_entry(analysis.frame_hashes, analysis.frame_means, colors)
+        if entry_id is not None:
+            self.members.setdefault(entry_id, []).append(analysis.path)
+            return self.entries[entry_id][4].path
+        key = majority_hash(analysis.frame_hashes[:PHASH_PROBE_FRAMES])
+        entry_id = len(self.entries)
+        self.entries.append((key, analysis.frame_hashes, analysis.frame_means, colors, analysis))
+        for table, chunk in zip(self.tables, self._chunks(key)):
+            table.setdefault(chunk, []).append(entry_id)
+        return None
+
+    def groups(self) -> Dict[Path, List[Path]]:
+        """Grupos de quase-duplicados encontrados: {representante: [outros]}."""
+        return {self.entries[entry_id][4].path: paths for entry_id, paths in self.members.items()}
+
+@dataclass
+class VideoAnalysis:
+    """Resultado completo da análise de um vídeo."""
+    path: Path
+    percentages: Dict[str, float]  # Percentual médio de cada cor em todos os frames
+    frames_processed: int = 0
+    error: Optional[str] = None
+    frame_hashes: List[int] = field(default_factory=list)  # pHash de cada frame amostrado
+    frame_means: List[Tuple[int, int, int]] = field(default_factory=list)  # Cor média (BGR) de cada frame
+    duplicate_of: Optional[Path] = None  # Representante cuja análise foi reaproveitada
+    # Percentual (0-100) de cada cor por frame amostrado, colunas na ordem de `percentages`
+    color_timeline: Optional[np.ndarray] = None
+    luminance: float = 0.0  # Brilho médio (0-255)
+    motion: float = 0.0  # Mudança média entre frames amostrados consecutivos (0-100)
+
+    def features(self) -> dict:
+        """Linha do tempo de cores, brilho e movimento em formato JSON (diário e catálogo)."""
+        return {
+            'timeline': self.color_timeline.tolist() if self.color_timeline is not None else [],
+            'luminance': round(self.luminance, 2),
+            'motion': round(self.motion, 2),
+        }
+
+SUBSAMPLE_STRATEGIES = ('area', 'nearest', 'stride', 'pyramid', 'random', 'stratified', 'center')
+
+def subsample_frame(frame, strategy: str, width: int, seed: int = 0):
+    """Reduz um frame para a análise de cores conforme a estratégia.
+
+    - area: redimensiona com INTER_AREA (comportamento original, referência)
+    - nearest: redimensiona com INTER_NEAREST (sem média de pixels)
+    - stride: view com passo fixo sobre o frame, sem cópia
+    - pyramid: pyrDown sucessivos e INTER_AREA só no último nível
+    - random: amostra aleatória de pixels (mesma quantidade que `area`)
+    - stratified: um pixel aleatório por célula de uma grade
+    - center: frame inteiro em meia escala + região central, que conta em dobro
+
+    Retorna uma imagem (h, w, 3); as estratégias de amostragem de pixels
+    devolvem uma única linha (1, n, 3).
+    """
+    height, frame_width = frame.shape[:2]
+    scale = width / frame_width
+    new_size = (width, max(1, int(height * scale)))
+    
+    if strategy == 'nearest':
+        return cv2.resize(frame, new_size, interpolation=cv2.INTER_NEAREST)
+    if strategy == 'stride':
+        step = max(1, frame_width // width)
+        return frame[::step, ::step]
+    if strategy == 'pyramid':
+        while frame.shape[1] // 2 >= width:
+            frame = cv2.pyrDown(frame)
+        return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+    if strategy in ('random', 'stratified'):
+        rng = np.random.default_rng(seed)
+        pixels = frame.reshape(-1, 3)
+        count = new_size[0] * new_size[1]
+        if strategy == 'random':
+            indices = rng.integers(0, pixels.shape[0], count)
+        else:
+            step = max(1, frame_width // width)
+            rows = np.arange(0, height - step + 1, step)
+            cols = np.arange(0, frame_width - step + 1, step)
+            grid_y, grid_x = np.meshgrid(rows, cols, indexing='ij')
+            grid_y = grid_y + rng.integers(0, step, grid_y.shape)
+            grid_x = grid_x + rng.integers(0, step, grid_x.shape)
+            indices = (grid_y * frame_width + grid_x).ravel()
+        return pixels[indices].reshape(1, -1, 3)
+    if strategy == 'center':
+        half = cv2.resize(frame, (max(1, new_size[0] // 2), max(1, new_size[1] // 2)), interpolation=cv2.INTER_AREA)
+        top, left = height // 4, frame_width // 4
+        center = cv2.resize(frame[top:height - top, left:frame_width - left],
+                            (max(1, new_size[0] // 2), max(1, new_size[1] // 2)), interpolation=cv2.INTER_AREA)
+        return np.concatenate([half.reshape(1, -1, 3), center.reshape(1, -1, 3), center.reshape(1, -1, 3)], axis=1)
+    return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+
+def read_sample_frame(cap, frame_idx: int):
+    """Lê um frame amostrado e o reduz para análise. Retorna None se falhar.
+
+    Retorna (pixels para a análise de cores, imagem para hash e cor média).
+    As duas coincidem, exceto nas estratégias que amostram pixels soltos.
+    """
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+    ret, frame = cap.read()
+    
+    if not ret:
+        return None
+    
+    strategy = DEFAULT_CONFIG['subsample_strategy']
+    pixels = subsample_frame(frame, strategy, DEFAULT_CONFIG['resize_width'], seed=frame_idx)
+    if pixels.shape[0] > 1:
+        return pixels, pixels
+    # O pHash precisa da imagem; uma miniatura basta
+    return pixels, cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA)
+
+def frame_signature(frame) -> Tuple[int, Tuple[int, int, int]]:
+    """pHash e cor média (BGR) de um frame."""
+    return perceptual_hash(frame), tuple(int(c) for c in cv2.mean(frame)[:3])
+
+MOTION_THUMBNAIL_SIZE = (32, 18)
+
+def frame_features(frame) -> Tuple[float, np.ndarray]:
+    """Brilho médio e miniatura em tons de cinza (para o movimento) de um frame."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return float(gray.mean()), cv2.resize(gray, MOTION_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+def motion_score(thumbnails: List[np.ndarray]) -> float:
+    """Diferença média (0-100) entre as miniaturas de frames consecutivos."""
+    if len(thumbnails) < 2:
+        return 0.0
+    diffs = [cv2.absdiff(a, b).mean() for a, b in zip(thumbnails, thumbnails[1:])]
+    return float(np.mean(diffs)) * 100 / 255
+
+def analyze_segment(video_path: str, frame_indices: List[int], config: dict) -> List[tuple]:
+    """Decodifica e analisa um trecho do vídeo com uma captura própria.
+
+    Executado nos processos auxiliares da divisão de vídeos longos: os frames
+    são decodificados e classificados no próprio processo, então só os
+    resultados (alguns bytes por frame) voltam ao processo principal.
+    Retorna [(percentuais, pHash, cor média, brilho, miniatura)] na ordem dos frames.
+    """
+    # Processos novos (spawn) não herdam alterações feitas na configuração
+    DEFAULT_CONFIG.update(config)
+    color_infos = get_color_ranges()
+    analyze_colors = get_color_engine()
+    cap = cv2.VideoCapture(video_path)
+    samples = []
+    try:
+        for frame_idx in frame_indices:
+            sample = read_sample_frame(cap, frame_idx)
+            if sample is None:
+                continue
+            pixels, image = sample
+            samples.append((analyze_colors(pixels, color_infos), *frame_signature(image), *frame_features(image)))
+    finally:
+        cap.release()
+    return samples
+
+_segment_pool = None
+_segment_pool_workers = 0
+
+def get_segment_pool(workers: int):
+    """Pool de processos reaproveitado entre vídeos para analisar trechos em paralelo."""
+    global _segment_pool, _segment_pool_workers
+    if _segment_pool is None or _segment_pool_workers < workers:
+        if _segment_pool is not None:
+            _segment_pool.shutdown()
+        _segment_pool = ProcessPoolExecutor(max_workers=workers)
+        _segment_pool_workers = workers
+    return _segment_pool
+
+def reset_segment_pool():
+    """Descarta o pool; o próximo `get_segment_pool` cria um novo.
+
+    Usado quando um processo de trecho morre (falta de memória, falha do
+    decodificador): o ProcessPoolExecutor fica inutilizável para sempre.
+    """
+    global _segment_pool, _segment_pool_workers
+    if _segment_pool is not None:
+        _segment_pool.shutdown(wait=False, cancel_futures=True)
+    _segment_pool = None
+    _segment_pool_workers = 0
+
+def should_split_video(duration: float, width: int, height: int) -> bool:
+    """Vídeos muito longos ou de resolução muito alta são divididos em trechos paralelos."""
+    return (duration >= DEFAULT_CONFIG['split_min_duration']
+            or width * height >= DEFAULT_CONFIG['split_min_pixels'])
+
+def analyze_video(video_path: Path, progress_callback=None,
+                  near_duplicates: Optional[NearDuplicateIndex] = None,
+                  metadata: Optional[VideoMetadata] = None) -> Optional[VideoAnalysis]:
+    """Analyze a video and return the average percentage of every color.
+
+    Com `near_duplicates`, os primeiros frames amostrados são comparados ao
+    índice antes da análise de cores; se o vídeo for quase-duplicado de um já
+    analisado, a decodificação para e a análise do representante é reaproveitada.
+    Vídeos longos ou de alta resolução têm os frames restantes divididos em
+    trechos analisados em paralelo (ver `should_split_video`).
+    `metadata` (de `probe_metadata`) substitui as propriedades informadas pelo
+    OpenCV, que em alguns contêineres trazem um número de frames errado.
+    Retorna None se o arquivo não existe ou não pode ser aberto.
+    """
+    try:
+        # Verificar se o arquivo existe antes de tentar abrir
+        if not video_path.exists():
+            print(f"Arquivo não encontrado: {video_path}")
+            return None
+        
+        # Open video file
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            print(f"Não foi possível abrir o vídeo: {video_path}")
+            return None
+        
+        # Get video properties
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        duration = total_frames / fps if fps > 0 else 0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if metadata is not None and metadata.frame_count > 0:
+            total_frames = metadata.frame_count
+            duration = metadata.duration or duration
+            width, height = metadata.width or width, metadata.height or height
+        
+        # Determine frame sampling strategy
+        sample_rate = max(1, total_frames // DEFAULT_CONFIG['sample_frames'])
+        frame_indices = list(range(0, total_frames, sample_rate))
+        
+        color_infos = get_color_ranges()
+        analyze_colors = get_color_engine()
+        samples = []  # (percentuais, pHash, cor média, brilho, miniatura) de cada frame, em ordem
+        
+        def add_sample(sample, frame_colors=None):
+            pixels, image = sample
+            if frame_colors is None:
+                frame_colors = analyze_colors(pixels, color_infos)
+            samples.append((frame_colors, *frame_signature(image), *frame_features(image)))
+            if progress_callback:
+                progress_callback()
+        
+        if near_duplicates is not None:
+            probe_indices = frame_indices[:PHASH_PROBE_FRAMES]
+            frame_indices = frame_indices[PHASH_PROBE_FRAMES:]
+            probe_frames = [f for f in (read_sample_frame(cap, i) for i in probe_indices) if f is not None]
+            signatures = [frame_signature(image) for _, image in probe_frames]
+            # As faixas de cor dos frames de teste confirmam a semelhança; se o
+            # vídeo não for quase-duplicado, entram na análise sem recalcular
+            probe_colors = [analyze_colors(pixels, color_infos) for pixels, _ in probe_frames]
+            representative = near_duplicates.find(
+                [h for h, _ in signatures], [m for _, m in signatures],
+                [list(frame_colors.values()) for frame_colors in probe_colors]
+            )
+            if representative is not None:
+                cap.release()
+                return VideoAnalysis(
+                    video_path, dict(representative.percentages), representative.frames_processed,
+                    frame_hashes=[h for h, _ in signatures], frame_means=[m for _, m in signatures],
+                    duplicate_of=representative.path, color_timeline=representative.color_timeline,
+                    luminance=representative.luminance, motion=representative.motion
+                )
+            for sample, frame_colors in zip(probe_frames, probe_colors):
+                add_sample(sample, frame_colors)
+        
+        workers = DEFAULT_CONFIG['split_workers'] or os.cpu_count() or 1
+        budget = memory_budget_bytes()
+        if budget:
+            # Cada trecho abre sua própria captura: só tantos quanto couberem no orçamento
+            decode_memory = estimate_decode_memory(
+                VideoMetadata(width=width, height=height, codec=metadata.codec if metadata else '')
+            )
+            workers = min(workers, max(1, budget // decode_memory))
+        results = None
+        if workers > 1 and len(frame_indices) > 1 and should_split_video(duration, width, height):
+            cap.release()
+            cap = None
+            # Trechos contíguos; cada processo abre sua própria captura
+            workers = min(workers, len(frame_indices))
+            segment_size = -(-len(frame_indices) // workers)
+            segments = [frame_indices[i:i + segment_size] for i in range(0, len(frame_indices), segment_size)]
+            config = dict(DEFAULT_CONFIG)
+            # Se um processo de trecho morrer, o pool é recriado e a divisão tentada
+            # mais uma vez; depois disso o vídeo é analisado sem divisão
+            for _ in range(2):
+                try:
+                    pool = get_segment_pool(workers)
+                    results = list(pool.map(analyze_segment, [str(video_path)] * len(segments), segments,
+                                            [config] * len(segments)))
+                    break
+                except BrokenProcessPool:
+                    print(f"Processo de trecho encerrado inesperadamente: {video_path}")
+                    reset_segment_pool()
+        if results is not None:
+            for segment_samples in results:
+                samples.extend(segment_samples)
+                if progress_callback:
+                    for _ in segment_samples:
+                        progress_callback()
+        else:
+            # Process frames
+            if cap is None:
+                cap = cv2.VideoCapture(str(video_path))
+            for frame_idx in frame_indices:
+                sample = read_sample_frame(cap, frame_idx)
+                if sample is not None:
+                    add_sample(sample)
+            cap.release()
+        
+        if not samples:
+            print(f"Nenhum frame processado para: {video_path}")
+            return VideoAnalysis(video_path, {}, 0)
+        
+        # Calculate average percentages (somados na ordem dos frames: o resultado
+        # é o mesmo com ou sem divisão em trechos)
+        color_totals = {name: 0.0 for name in color_infos}
+        for frame_colors, *_ in samples:
+            for color, percent in frame_colors.items():
+                color_totals[color] += percent
+        frames_processed = len(samples)
+        avg_percentages = {color: total / frames_processed for color, total in color_totals.items()}
+        # Saídas extras, tiradas dos mesmos frames reduzidos (sem decodificar de novo)
+        timeline = np.array([[round(p) for p in frame_colors.values()] for frame_colors, *_ in samples], np.uint8)
+        return VideoAnalysis(
+            video_path, avg_percentages, frames_processed,
+            frame_hashes=[sample[1] for sample in samples], frame_means=[sample[2] for sample in samples],
+            color_timeline=timeline,
+            luminance=sum(sample[3] for sample in samples) / frames_processed,
+            motion=motion_score([sample[4] for sample in samples])
+        )
+        
+    except Exception as e:
+        print(f"Erro ao processar {video_path}: {str(e)}")
+        return VideoAnalysis(video_path, {}, 0, error=str(e))
+
+def select_dominant_colors(percentages: Dict[str, float]) -> List[Tuple[str, float]]:
+    """Filter colors above the minimum threshold, sorted by percentage."""
+    dominant_colors = [
+        (color, percent) 
+        for color, percent in percentages.items() 
+        if percent >= DEFAULT_CONFIG['min_color_percent']
+    ]
+    
+    # Sort by percentage (descending)
+    dominant_colors.sort(key=lambda x: x[1], reverse=True)
+    return dominant_colors
+
+def process_video(video_path: Path, progress_callback=None):
+    """Process a single video file and return dominant colors."""
+    analysis = analyze_video(video_path, progress_callback)
+    if analysis is None:
+        return None, []
+    return video_path, select_dominant_colors(analysis.percentages)
+
+def get_color_combinations():
+    """Gera todas as combinações de duas cores em ordem alfabética."""
+    # Não é mais necessário criar combinações, pois usamos apenas a cor majoritária
+    return []
+
+def get_destination_folder(colors: List[Tuple[str, float]], dest_dir: Path) -> Path:
+    """Determine the destination folder based on dominant colors."""
+    if not colors:
+        return dest_dir / 'nao-identificado'
+    
+    # Se não houver cores predominantes claras (múltiplas cores sem predominância)
+    if len(colors) > 1:
+        # Verificar se a primeira cor tem uma predominância significativa (>50%)
+        if colors[0][1] > 50:
+            return dest_dir / colors[0][0]
+        else:
+            # Múltiplas cores sem predominância clara -> pasta colorido
+            return dest_dir / 'colorido'
+    
+    # Apenas uma cor predominante
+    return dest_dir / colors[0][0]
+
+def copy_video(src_path: Path, dest_dir: Path, overwrite=False,
+               checksum: Optional['Checksum'] = None, index: Optional['DestinationIndex'] = None) -> Optional[Path]:
+    """Copy video to destination with conflict resolution.
+
+    A cópia é feita num arquivo temporário (`.nome.pid.part`) e renomeada
+    atomicamente, para que uma interrupção nunca deixe um arquivo truncado
+    com o nome final no destino.
+    Com `checksum`, os dados são copiados em blocos e entram no checksum na
+    mesma leitura; a cópia é gravada em disco (fsync) antes da renomeação.
+    Com `index`, a pasta e o conflito de nomes são conferidos no índice do
+    destino em vez do disco, e a cópia é registrada nele.
+    """
+    dest_path = dest_dir / src_path.name
+    if index is not None:
+        index.ensure_folder(dest_dir)
+        exists = index.contains(dest_path)
+    else:
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        exists = dest_path.exists()
+    
+    # Verificar se o arquivo já existe no destino
+    if exists and not overwrite:
+        # Arquivo já existe e não deve sobrescrever
+        print(f"Arquivo já existe no destino, ignorando: {src_path.name}")
+        return None
+    
+    temp_path = dest_dir / f".{src_path.name}.{os.getpid()}.part"
+    try:
+        if checksum is None:
+            shutil.copy2(str(src_path), str(temp_path))
+        else:
+            _copy_with_checksum(src_path, temp_path, checksum)
+        # os.replace substitui o destino de forma atômica (também no Windows)
+        os.replace(str(temp_path), str(dest_path))
+        if index is not None:
+            index.record(dest_path)
+        return dest_path
+    except Exception as e:
+        print(f"Erro ao copiar arquivo {src_path}: {e}")
+        METRICS.inc('organizador_errors_total', folder=dest_dir.name, stage='copy')
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        return None
+
+def _copy_with_checksum(src_path: Path, dest_path: Path, checksum: 'Checksum'):
+    """Copia em blocos atualizando o checksum, e preserva datas e permissões como copy2."""
+    buffer = bytearray(HASH_CHUNK_BYTES)
+    view = memoryview(buffer)
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        while True:
+            size = src.readinto(buffer)
+            if not size:
+                break
+            checksum.update(view[:size])
+            dest.write(view[:size])
+        dest.flush()
+        os.fsync(dest.fileno())
+    shutil.copystat(str(src_path), str(dest_path))
+
+def link_video(src_path: Path, dest_dir: Path, mode='symlink', overwrite=False,
+               index: Optional['DestinationIndex'] = None) -> Optional[Path]:
+    """Cria um link (simbólico ou físico) para o vídeo em vez de copiá-lo."""
+    dest_path = dest_dir / src_path.name
+    if index is not None:
+        index.ensure_folder(dest_dir)
+        exists = index.contains(dest_path)
+    else:
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        exists = dest_path.exists() or dest_path.is_symlink()
+    
+    if exists:
+        if not overwrite:
+            print(f"Arquivo já existe no destino, ignorando: {src_path.name}")
+            return None
+    
+    temp_path = dest_dir / f".{src_path.name}.{os.getpid()}.part"
+    try:
+        if mode == 'hardlink':
+            os.link(str(src_path), str(temp_path))
+        else:
+            os.symlink(str(src_path.absolute()), str(temp_path))
+        os.replace(str(temp_path), str(dest_path))
+        if index is not None:
+            index.record(dest_path)
+        return dest_path
+    except Exception as e:
+        print(f"Erro ao criar link para {src_path}: {e}")
+        METRICS.inc('organizador_errors_total', folder=dest_dir.name, stage='copy')
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        return None
+
+def discover_videos(src_dir: Path) -> List[Path]:
+    """Lista os vídeos suportados dentro da pasta de origem (recursivo)."""
+    video_files = []
+    for ext in DEFAULT_CONFIG['supported_formats']:
+        video_files.extend(list(src_dir.rglob(f"*{ext}")))
+        video_files.extend(list(src_dir.rglob(f"*{ext.upper()}")))
+    # Em sistemas sem diferenciação de maiúsculas o mesmo arquivo aparece duas vezes
+    return list(dict.fromkeys(video_files))
+
+# ---------------------------------------------------------------------------
+# Índice do destino: conteúdo das pastas de cor mantido em memória
+# ---------------------------------------------------------------------------
+
+# Cópia temporária (`.nome.pid.part`) sem alteração há mais tempo que isso, e sem
+# processo vivo com aquele pid, é de uma execução interrompida
+STALE_PART_SECONDS = 3600
+
+def _process_alive(pid: int) -> bool:
+    """Se o processo existe nesta máquina; no Windows não há teste seguro e a resposta é sim."""
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _is_stale_part(entry: os.DirEntry) -> bool:
+    """Cópia temporária abandonada: parada há STALE_PART_SECONDS e sem outro processo vivo com o pid do nome.
+
+    As cópias em andamento de outra execução (ou do serviço) no mesmo destino
+    têm data recente, já que o arquivo cresce durante a cópia.
+    """
+    try:
+        if time.time() - entry.stat(follow_symlinks=False).st_mtime < STALE_PART_SECONDS:
+            return False
+    except OSError:
+        return False
+    pid = entry.name[:-len('.part')].rpartition('.')[2]
+    return not (pid.isdigit() and int(pid) != os.getpid() and _process_alive(int(pid)))
+
+class DestinationIndex:
+    """Nomes, tamanhos e datas dos arquivos nas pastas do destino, lidos uma vez.
+
+    Cada pasta é lida com um único `os.scandir` no início da execução; a partir
+    daí, conflitos, sobrescrita e a conferência de tamanho das cópias são
+    respondidos pelo índice, que é atualizado a cada arquivo gravado. Em
+    destinos de rede isso evita idas ao servidor por arquivo. Supõe um único
+    processo gravando no destino (o modo distribuído continua consultando o disco).
+    Em sistemas de arquivos sem diferenciação de maiúsculas (NTFS, APFS), os
+    nomes são comparados sem ela, como o próprio sistema faria.
+    """
+
+    def __init__(self, dest_dir: Path, case_insensitive: bool = os.name == 'nt'):
+        self.dest_dir = dest_dir
+        self.case_insensitive = case_insensitive
+        # pasta -> nome (ver `_key`) -> (tamanho, data de modificação em ns); None para um link quebrado
+        self.folders: Dict[Path, Dict[str, Optional[Tuple[int, int]]]] = {}
+
+    @classmethod
+    def scan(cls, dest_dir: Path, folders: List[str] = REQUIRED_DIRS) -> 'DestinationIndex':
+        """Lê as pastas de cor, criando as que faltam."""
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        index = cls(dest_dir, is_case_insensitive(dest_dir))
+        for name in folders:
+            index.add_folder(dest_dir / name)
+        return index
+
+    def _key(self, name: str) -> str:
+        return name.casefold() if self.case_insensitive else name
+
+    def add_folder(self, folder: Path):
+        """Lê (ou cria) a pasta e remove cópias temporárias de execuções interrompidas."""
+        entries: Dict[str, Optional[Tuple[int, int]]] = {}
+        try:
+            with os.scandir(folder) as scan:
+                for entry in scan:
+                    if entry.name.startswith('.') and entry.name.endswith('.part'):
+                        if _is_stale_part(entry):
+                            try:
+                                os.unlink(entry.path)
+                            except OSError:
+                                pass
+                        continue
+                    try:
+                        stat = entry.stat()
+                        entries[self._key(entry.name)] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        # Link simbólico quebrado: o nome está ocupado, mas sem conteúdo
+                        entries[self._key(entry.name)] = None
+        except FileNotFoundError:
+            folder.mkdir(parents=True, exist_ok=True)
+        self.folders[folder] = entries
+
+    def covers(self, folder: Path) -> bool:
+        return folder in self.folders
+
+    def ensure_folder(self, folder: Path):
+        """Garante a pasta no índice (lida ou criada uma única vez)."""
+        if folder not in self.folders:
+            self.add_folder(folder)
+
+    def contains(self, path: Path) -> bool:
+        return self._key(path.name) in self.folders.get(path.parent, {})
+
+    def stat(self, path: Path) -> Optional[Tuple[int, int]]:
+        """(tamanho, data em ns) do arquivo no destino, ou None se não existe."""
+        return self.folders.get(path.parent, {}).get(self._key(path.name))
+
+    def record(self, path: Path):
+        """Registra um arquivo recém-gravado com os dados reais do destino."""
+        try:
+            stat = path.stat()
+            entry = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            entry = None
+        self.folders.setdefault(path.parent, {})[self._key(path.name)] = entry
+
+    def discard(self, path: Path):
+        self.folders.get(path.parent, {}).pop(self._key(path.name), None)
+
+    def find(self, name: str) -> List[dict]:
+        """Onde está um arquivo com esse nome, em todas as pastas do índice."""
+        matches = []
+        key = self._key(name)
+        for folder, entries in self.folders.items():
+            if key in entries:
+                size, mtime_ns = entries[key] or (None, None)
+                matches.append({'folder': folder.name, 'size': size, 'mtime_ns': mtime_ns})
+        return matches
+
+    def summary(self) -> Dict[str, dict]:
+        """Arquivos e bytes por pasta."""
+        return {
+            folder.name: {'files': len(entries), 'bytes': sum(e[0] for e in entries.values() if e)}
+            for folder, entries in self.folders.items()
+        }
+
+def is_case_insensitive(folder: Path) -> bool:
+    """Testa, com um arquivo temporário, se o sistema de arquivos da pasta ignora maiúsculas."""
+    probe = folder / f".Organizador-Caixa-{os.getpid()}.tmp"
+    try:
+        probe.touch()
+        return (folder / probe.name.lower()).exists()
+    except OSError:
+        return os.name == 'nt'
+    finally:
+        try:
+            probe.unlink()
+        except OSError:
+            pass
+
+def log_destination_summary(index: DestinationIndex, log=print):
+    """Conteúdo do destino ao fim da execução, a partir do índice (sem ler o disco)."""
+    summary = index.summary()
+    total = sum(s['bytes'] for s in summary.values())
+    folders = ", ".join(f"{name} {s['files']}" for name, s in summary.items() if s['files'])
+    log(f"📁 Destino: {sum(s['files'] for s in summary.values())} arquivos, "
+        f"{total / (1024 ** 3):.2f} GB" + (f" ({folders})" if folders else ""))
+
+# ---------------------------------------------------------------------------
+# Orçamento de memória das análises simultâneas
+# ---------------------------------------------------------------------------
+
+# Bytes por pixel mantidos por uma captura aberta, por codec (fourcc em minúsculas):
+# quadros de referência e de threads do decodificador, mais o quadro BGR convertido.
+# ProRes e DNxHD decodificam quadros inteiros de 10-12 bits em várias threads.
+DECODE_BYTES_PER_PIXEL = {
+    'avc1': 12, 'h264': 12, 'x264': 12,
+    'hvc1': 14, 'hev1': 14, 'hevc': 14,
+    'apco': 20, 'apcs': 20, 'apcn': 20, 'apch': 20,  # ProRes 422
+    'ap4h': 32, 'ap4x': 32,  # ProRes 4444
+    'avdn': 20, 'avdh': 20,  # DNxHD/DNxHR
+    'mjpg': 6,
+}
+DEFAULT_DECODE_BYTES_PER_PIXEL = 12
+DECODE_BASE_BYTES = 48 * 1024 * 1024  # Processo, bibliotecas e buffers do contêiner
+
+def estimate_decode_memory(metadata: Optional[VideoMetadata]) -> int:
+    """Memória estimada (bytes) de uma captura aberta, pela resolução e pelo codec.
+
+    Sem metadados, considera um vídeo 1080p H.264.
+    """
+    width, height = 1920, 1080
+    if metadata is not None and metadata.width and metadata.height:
+        width, height = metadata.width, metadata.height
+    codec = metadata.codec.lower() if metadata is not None else ''
+    return DECODE_BASE_BYTES + width * height * DECODE_BYTES_PER_PIXEL.get(codec, DEFAULT_DECODE_BYTES_PER_PIXEL)
+
+def physical_memory() -> Optional[int]:
+    """Memória física total em bytes, ou None se não for possível consultar."""
+    if psutil is not None:
+        return psutil.virtual_memory().total
+    if hasattr(os, 'sysconf'):
+        try:
+            return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        except (ValueError, OSError):
+            pass
+    if os.name == 'nt':
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+            ]
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(status)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullTotalPhys
+    return None
+
+def memory_budget_bytes() -> Optional[int]:
+    """Orçamento de memória das análises: `memory_budget_mb` ou, se 0, 60% da memória física."""
+    if DEFAULT_CONFIG['memory_budget_mb'] > 0:
+        return DEFAULT_CONFIG['memory_budget_mb'] * 1024 * 1024
+    total = physical_memory()
+    return int(total * 0.6) if total else None
+
+class MemoryBudget:
+    """Admissão de análises pela memória estimada de decodificação (ver `estimate_decode_memory`).
+
+    Vídeos pequenos rodam em todos os processos; os grandes só entram quando a
+    memória reservada pelos demais deixa espaço. Um vídeo maior que o orçamento
+    inteiro roda sozinho, para não ficar parado para sempre.
+
+    Sem resolução conhecida (`--no-probe` ou leitura prévia sem sucesso), o vídeo
+    conta como o maior já visto, e no mínimo como um vídeo no limiar de divisão
+    (`split_min_pixels`) no codec mais caro, dividido em trechos.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self.peak_reserved = 0
+        self.largest_decode = 0
+
+    @staticmethod
+    def unknown_decode_memory() -> int:
+        """Estimativa conservadora de uma captura sem metadados."""
+        return DECODE_BASE_BYTES + DEFAULT_CONFIG['split_min_pixels'] * max(DECODE_BYTES_PER_PIXEL.values())
+
+    @classmethod
+    def from_config(cls) -> Optional['MemoryBudget']:
+        limit = memory_budget_bytes()
+        return cls(limit) if limit else None
+
+    def reserve(self, metadata: Optional[VideoMetadata], segments: int) -> Optional[Tuple[int, int]]:
+        """Reserva memória para um vídeo com até `segments` processos de trechos.
+
+        Retorna (processos de trechos, bytes reservados), ou None se não couber agora.
+        """
+        known = metadata is not None and metadata.width and metadata.height
+        if known:
+            per_decode = estimate_decode_memory(metadata)
+            self.largest_decode = max(self.largest_decode, per_decode)
+            will_split = should_split_video(metadata.duration, metadata.width, metadata.height)
+        else:
+            per_decode = max(self.largest_decode, self.unknown_decode_memory())
+            will_split = True
+        free = self.limit - self.in_use
+        segments = max(1, min(segments, free // per_decode))
+        amount = per_decode * (segments if will_split else 1)
+        if self.in_use and amount > free:
+            return None
+        self.in_use += amount
+        self.peak_reserved = max(self.peak_reserved, self.in_use)
+        return segments, amount
+
+    def release(self, amount: int):
+        self.in_use -= amount
+
+def _proc_tree_rss(root_pid: int) -> Optional[int]:
+    """RSS somado de um processo e descendentes, lendo /proc (Linux sem psutil)."""
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    try:
+        entries = [entry.name for entry in os.scandir('/proc') if entry.name.isdigit()]
+    except OSError:
+        return None
+    for name in entries:
+        try:
+            with open(f'/proc/{name}/stat', 'rb') as f:
+                # Campos após o nome do programa (que pode conter espaços e parênteses)
+                stat_fields = f.read().rsplit(b')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        pid = int(name)
+        children.setdefault(int(stat_fields[1]), []).append(pid)
+        rss[pid] = int(stat_fields[21]) * page_size
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+def process_tree_rss(pid: Optional[int] = None) -> Optional[int]:
+    """Memória residente (bytes) do processo e de todos os processos de análise, ou None."""
+    pid = pid or os.getpid()
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    if os.path.isdir('/proc'):
+        return _proc_tree_rss(pid)
+    return None
+
+def largest_process_peak_rss() -> Optional[int]:
+    """Pico de memória do maior processo (este ou um filho já encerrado), quando não dá para somar."""
+    if resource is None:
+        return None
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * unit
+
+class MemoryMonitor:
+    """Mede em segundo plano o pico de memória somado do processo e dos processos de análise."""
+
+    INTERVAL = 0.5
+
+    def __init__(self):
+        self.peak = 0
+        self.summed = process_tree_rss() is not None
+        self.stop_event = threading.Event()
+        self.thread = None
+        if self.summed:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            rss = process_tree_rss()
+            if rss:
+                self.peak = max(self.peak, rss)
+            if self.stop_event.wait(self.INTERVAL):
+                break
+
+    def close(self) -> Optional[int]:
+        """Encerra a medição e retorna o pico em bytes (ou None se não foi possível medir)."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            return self.peak
+        return largest_process_peak_rss()
+
+def log_memory_report(peak: Optional[int], summed: bool, budget: Optional[MemoryBudget], log=print):
+    """Pico de memória da execução comparado ao orçamento."""
+    if peak is None:
+        log("💾 Memória: pico não disponível neste sistema (instale o pacote psutil)")
+        return
+    mb = 1024 * 1024
+    what = "pico de memória" if summed else "pico do maior processo"
+    if budget is None:
+        log(f"💾 Memória: {what} {peak / mb:.0f} MB")
+        return
+    METRICS.set('organizador_memory_budget_bytes', budget.limit)
+    estimate = f" (estimativa das análises simultâneas: {budget.peak_reserved / mb:.0f} MB)" if budget.peak_reserved else ""
+    log(f"💾 Memória: {what} {peak / mb:.0f} MB de {budget.limit / mb:.0f} MB do orçamento{estimate}")
+    if peak > budget.limit:
+        log("  ⚠️ O pico passou do orçamento: reduza `memory_budget_mb` ou o número de processos de análise")
+
+# ---------------------------------------------------------------------------
+# Análise isolada: processos supervisionados com tempo limite por arquivo
+# ---------------------------------------------------------------------------
+
+def analysis_time_budget(video_path: Path, duration: float = 0.0) -> float:
+    """Tempo máximo (s) para analisar um vídeo, proporcional ao tamanho e à duração."""
+    try:
+        size_mb = video_path.stat().st_size / (1024 * 1024)
+    except OSError:
+        size_mb = 0.0
+    return (DEFAULT_CONFIG['timeout_base']
+            + DEFAULT_CONFIG['timeout_per_mb'] * size_mb
+            + DEFAULT_CONFIG['timeout_per_minute'] * duration / 60)
+
+def _analysis_worker_main(conn, config: dict):
+    """Loop de um processo de análise: recebe caminhos e devolve VideoAnalysis."""
+    if hasattr(os, 'setpgrp'):
+        # Grupo de processos próprio: ao encerrar o worker, o supervisor também
+        # encerra os processos de trechos (ver `_kill_worker`)
+        os.setpgrp()
+    DEFAULT_CONFIG.update(config)
+    parent = os.getppid()
+    while True:
+        try:
+            if not conn.poll(1.0):
+                # Outros processos herdam a conexão, então a morte do supervisor
+                # nem sempre fecha o pipe; confere o processo pai
+                if os.getppid() != parent:
+                    break
+                continue
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        path_str, metadata, split_workers = task
+        DEFAULT_CONFIG['split_workers'] = split_workers
+        video_path = Path(path_str)
+        if metadata is None or not metadata.frame_count:
+            # Sem metadados do cabeçalho: lê as propriedades pelo OpenCV aqui, no
+            # processo supervisionado, e informa a duração para o supervisor ajustar o prazo
+            probed = _probe_opencv(video_path)
+            conn.send(('started', probed.duration if probed else 0.0))
+        conn.send(('done', analyze_video(video_path, metadata=metadata)))
+
+class AnalysisSupervisor:
+    """Executa `analyze_video` em processos separados, com tempo limite por arquivo.
+
+    Um vídeo que trava o decodificador ou derruba o processo não afeta a
+    interface nem os demais arquivos: o processo é encerrado e substituído, e o
+    vídeo volta com `error` preenchido (e vai para `nao-identificado`).
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self.config = dict(DEFAULT_CONFIG)
+        # Vídeos em 4K/8K ou ProRes só entram quando cabem na memória (ver `MemoryBudget`)
+        self.memory_budget = MemoryBudget.from_config()
+        self.slots = [self._spawn() for _ in range(self.workers)]
+
+    def _split_budget(self, concurrent: int) -> int:
+        """Processos de trechos para um vídeo, conforme quantos arquivos ainda vão rodar juntos.
+
+        Com a fila cheia cada arquivo fica com um processo; no fim da fila, os
+        últimos vídeos (em geral os mais demorados) usam os núcleos que sobraram.
+        """
+        cpus = self.config['split_workers'] or os.cpu_count() or 1
+        return max(1, cpus // max(1, min(self.workers, concurrent)))
+
+    def _spawn(self) -> dict:
+        parent_conn, child_conn = multiprocessing.Pipe()
+        # Não-daemon: o worker pode precisar do próprio pool para vídeos divididos em trechos
+        process = multiprocessing.Process(target=_analysis_worker_main, args=(child_conn, self.config))
+        process.start()
+        child_conn.close()
+        return {'process': process, 'conn': parent_conn, 'task': None}
+
+    @staticmethod
+    def _kill_worker(process):
+        """Encerra o worker e, onde houver grupos de processos, os processos de trechos dele."""
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        if process.is_alive():
+            process.kill()
+
+    def _recycle(self, slot: dict):
+        """Encerra o processo do slot e inicia outro no lugar."""
+        slot['conn'].close()
+        self._kill_worker(slot['process'])
+        slot['process'].join(5)
+        slot.update(self._spawn())
+
+    def imap(self, video_files: List[Path], metadata: Optional[Dict[Path, VideoMetadata]] = None,
+             prepare: Optional[Callable[[Path], Optional[Path]]] = None):
+        """Analisa os vídeos em paralelo; gera (caminho, VideoAnalysis) na ordem de entrada.
+
+        `prepare(caminho)` indica de onde ler cada vídeo (ex.: a cópia local de
+        `SourceStager`), ou None se ainda não estiver pronto; o vídeo só é
+        enviado a um processo quando estiver.
+        """
+        try:
+            yield from self._dispatch(video_files, metadata or {}, prepare)
+        finally:
+            # Gerador fechado antes do fim (erro ou interrupção): os processos ainda
+            # ocupados são substituídos, para que um resultado atrasado não seja
+            # entregue numa próxima chamada como se fosse de outro arquivo
+            for slot in self.slots:
+                if slot['task'] is not None:
+                    self._finish(slot)
+                    self._recycle(slot)
+
+    def _finish(self, slot: dict):
+        """Libera o slot e a memória reservada para o vídeo."""
+        if self.memory_budget is not None:
+            self.memory_budget.release(slot['task']['memory'])
+        slot['task'] = None
+
+    def _dispatch(self, video_files: List[Path], metadata: Dict[Path, VideoMetadata],
+                  prepare: Optional[Callable[[Path], Optional[Path]]] = None):
+        pending = list(enumerate(video_files))
+        pending.reverse()
+        results: Dict[int, VideoAnalysis] = {}
+        next_index = 0
+        if self.memory_budget is not None:
+            self.memory_budget.peak_reserved = self.memory_budget.in_use
+        while next_index < len(video_files):
+            # Distribui trabalho para os processos livres
+            for slot in self.slots:
+                if slot['task'] is None and pending:
+                    index, video_path = pending[-1]
+                    source = prepare(video_path) if prepare else video_path
+                    if source is None:
+                        break  # Leitura antecipada ainda em andamento
+                    meta = metadata.get(video_path)
+                    duration = meta.duration if meta else 0.0
+                    busy = sum(1 for other in self.slots if other['task'] is not None)
+                    segments, memory = self._split_budget(busy + len(pending)), 0
+                    if self.memory_budget is not None:
+                        admitted = self.memory_budget.reserve(meta, segments)
+                        if admitted is None:
+                            break  # Aguarda outra análise terminar e liberar memória
+                        segments, memory = admitted
+                    pending.pop()
+                    task = (str(source), meta, segments)
+                    if not slot['process'].is_alive():
+                        # O processo morreu enquanto estava ocioso: substitui antes de enviar
+                        self._recycle(slot)
+                    try:
+                        slot['conn'].send(task)
+                    except (OSError, ValueError):
+                        self._recycle(slot)
+                        slot['conn'].send(task)
+                    slot['task'] = {
+                        'index': index, 'path': video_path, 'duration': duration, 'sent': time.perf_counter(),
+                        'memory': memory, 'deadline': time.time() + analysis_time_budget(video_path, duration)
+                    }
+
+            busy = [slot for slot in self.slots if slot['task'] is not None]
+            if busy:
+                timeout = max(0.0, min(slot['task']['deadline'] for slot in busy) - time.time())
+                # Os processos de trechos herdam a conexão (e o `sentinel`), então a
+                # morte do worker não fecha o pipe: confere o processo a cada segundo
+                ready = multiprocessing.connection.wait([slot['conn'] for slot in busy], min(timeout, 1.0))
+                for slot in busy:
+                    task = slot['task']
+                    failure = None
+                    if slot['conn'] in ready or not slot['process'].is_alive():
+                        try:
+                            if not slot['conn'].poll():
+                                raise EOFError  # Processo encerrado sem responder
+                            kind, payload = slot['conn'].recv()
+                        except (EOFError, OSError):
+                            slot['process'].join(5)
+                            failure = f"processo de análise encerrado inesperadamente (código {slot['process'].exitcode})"
+                        else:
+                            if kind == 'started':
+                                task['duration'] = payload
+                                task['deadline'] = time.time() + analysis_time_budget(task['path'], payload)
+                                continue
+                            if payload is not None:
+                                payload.path = task['path']  # Pode ter sido lido de uma cópia local
+                            METRICS.observe('organizador_stage_seconds', time.perf_counter() - task['sent'],
+                                            stage='analysis')
+                            results[task['index']] = payload or VideoAnalysis(
+                                task['path'], {}, 0, error="arquivo não encontrado ou não pôde ser aberto"
+                            )
+                            self._finish(slot)
+                            continue
+                    elif time.time() >= task['deadline']:
+                        budget = analysis_time_budget(task['path'], task.get('duration', 0.0))
+                        failure = f"tempo limite excedido ({budget:.0f}s)"
+                    else:
+                        continue
+                    results[task['index']] = VideoAnalysis(task['path'], {}, 0, error=failure)
+                    self._finish(slot)
+                    self._recycle(slot)
+            elif pending:
+                time.sleep(0.05)  # Nada em análise: aguarda a leitura antecipada do próximo vídeo
+
+            while next_index in results:
+                analysis = results.pop(next_index)
+                yield analysis.path, analysis
+                next_index += 1
+
+    def close(self):
+        for slot in self.slots:
+            try:
+                slot['conn'].send(None)
+            except (OSError, ValueError):
+                pass
+        for slot in self.slots:
+            slot['process'].join(2)
+            if slot['process'].is_alive():
+                self._kill_worker(slot['process'])
+            slot['conn'].close()
+
+# ---------------------------------------------------------------------------
+# Detecção de duplicados por conteúdo
+# ---------------------------------------------------------------------------
+
+PARTIAL_HASH_BYTES = 64 * 1024
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+def partial_file_hash(path: Path) -> str:
+    """Hash rápido do início e do fim do arquivo (descarta a maioria dos falsos candidatos)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        h.update(f.read(PARTIAL_HASH_BYTES))
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size > PARTIAL_HASH_BYTES:
+            f.seek(max(PARTIAL_HASH_BYTES, size - PARTIAL_HASH_BYTES))
+            h.update(f.read(PARTIAL_HASH_BYTES))
+    return h.hexdigest()
+
+def hash_file(path: Path, h, drop_cache: bool = False):
+    """Alimenta `h` com o arquivo inteiro, lido via mmap em blocos (sem carregar tudo na memória).
+
+    Com `drop_cache`, o cache do sistema é descartado antes (onde houver
+    `posix_fadvise`), para que a leitura venha do disco e não da memória.
+    """
+    with open(path, 'rb') as f:
+        if drop_cache and hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        if os.fstat(f.fileno()).st_size == 0:
+            return h
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for offset in range(0, len(mm), HASH_CHUNK_BYTES):
+                    h.update(view[offset:offset + HASH_CHUNK_BYTES])
+            finally:
+                view.release()
+    return h
+
+def full_file_hash(path: Path) -> str:
+    """Hash do arquivo inteiro (BLAKE2b)."""
+    return hash_file(path, hashlib.blake2b(digest_size=32)).hexdigest()
+
+def find_duplicates(video_files: List[Path]) -> Tuple[List[Path], Dict[Path, List[Path]]]:
+    """Agrupa vídeos com conteúdo idêntico: tamanho → hash parcial → hash completo.
+
+    Retorna (lista sem duplicados na ordem original, {representante: [duplicados]}).
+    Só os arquivos com mesmo tamanho chegam a ser lidos.
+    """
+    def group_by(paths, key_func):
+        groups: Dict[object, List[Path]] = {}
+        for path in paths:
+            try:
+                groups.setdefault(key_func(path), []).append(path)
+            except OSError as e:
+                print(f"Erro ao ler {path}: {e}")
+        return [group for group in groups.values() if len(group) > 1]
+
+    duplicates: Dict[Path, List[Path]] = {}
+    for same_size in group_by(video_files, lambda p: p.stat().st_size):
+        for same_partial in group_by(same_size, partial_file_hash):
+            for same_content in group_by(same_partial, full_file_hash):
+                duplicates[same_content[0]] = same_content[1:]
+
+    skipped = {dup for dups in duplicates.values() for dup in dups}
+    unique_files = [path for path in video_files if path not in skipped]
+    return unique_files, duplicates
+
+def log_duplicates_summary(duplicates: Dict[Path, List[Path]], log=print):
+    """Resumo dos duplicados ignorados."""
+    if not duplicates:
+        return
+    count = sum(len(dups) for dups in duplicates.values())
+    # Os duplicados nunca são tocados, então continuam existindo mesmo com --delete-source
+    saved = sum(dup.stat().st_size for dups in duplicates.values() for dup in dups if dup.exists())
+    log(f"🔁 {count} duplicados ignorados ({saved / (1024 * 1024):.1f} MB não copiados):")
+    for rep, dups in duplicates.items():
+        for dup in dups:
+            log(f"  {dup} = {rep.name}")
+
+# ---------------------------------------------------------------------------
+# Verificação das cópias por checksum
+# ---------------------------------------------------------------------------
+
+# Algoritmos aceitos nos checksums gravados no diário ("algoritmo:hex")
+CHECKSUM_ALGORITHMS = {'blake2b': lambda: hashlib.blake2b(digest_size=16)}
+if xxhash is not None:
+    CHECKSUM_ALGORITHMS['xxh3_128'] = xxhash.xxh3_128
+CHECKSUM_ALGORITHM = 'xxh3_128' if xxhash is not None else 'blake2b'
+
+class Checksum:
+    """Checksum calculado em blocos, ex.: durante a cópia (ver `copy_video`)."""
+
+    def __init__(self, algorithm: str = CHECKSUM_ALGORITHM):
+        self.algorithm = algorithm
+        self.h = CHECKSUM_ALGORITHMS[algorithm]()
+
+    def update(self, data):
+        self.h.update(data)
+
+    def value(self) -> str:
+        return f"{self.algorithm}:{self.h.hexdigest()}"
+
+def file_checksum(path: Path, algorithm: str = CHECKSUM_ALGORITHM, drop_cache: bool = False) -> str:
+    """Checksum do arquivo inteiro no formato "algoritmo:hex"."""
+    checksum = Checksum(algorithm)
+    hash_file(path, checksum, drop_cache)
+    return checksum.value()
+
+def verify_copy(src_path: Path, dest_path: Path, expected: Optional[str]) -> Tuple[bool, str]:
+    """Relê a cópia do disco e compara com o checksum da origem.
+
+    `expected` é o checksum calculado durante a cópia; se não houver (cópia
+    feita por uma versão anterior) ou o algoritmo não estiver disponível, a
+    origem é lida de novo. Retorna (confere, checksum da cópia).
+    """
+    start = time.perf_counter()
+    algorithm = (expected or '').partition(':')[0]
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        algorithm = CHECKSUM_ALGORITHM
+        expected = file_checksum(src_path, algorithm)
+    actual = file_checksum(dest_path, algorithm, drop_cache=True)
+    METRICS.observe('organizador_stage_seconds', time.perf_counter() - start, stage='verify')
+    return actual == expected, actual
+
+class CopyVerifier:
+    """Verifica as cópias em segundo plano, sem atrasar a análise e a cópia dos próximos vídeos.
+
+    `submit` retorna na hora; os resultados prontos são recolhidos em lote por
+    `collect`, no processo principal (que grava o diário e exclui as origens).
+    """
+
+    def __init__(self, workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = []  # (origem, cópia, future)
+
+    def submit(self, src_path: Path, dest_path: Path, expected: Optional[str]):
+        future = self.executor.submit(verify_copy, src_path, dest_path, expected)
+        self.pending.append((src_path, dest_path, future))
+
+    def collect(self, wait: bool = False) -> List[Tuple[Path, Path, bool, str]]:
+        """Resultados concluídos: [(origem, cópia, confere, checksum ou erro)]."""
+        results = []
+        still_pending = []
+        for src_path, dest_path, future in self.pending:
+            if not wait and not future.done():
+                still_pending.append((src_path, dest_path, future))
+                continue
+            try:
+                ok, checksum = future.result()
+            except Exception as e:
+                # Qualquer falha na verificação (não só de E/S) deixa a cópia como não
+                # conferida: a origem fica e a cópia é removida, como num checksum diferente
+                logging.exception(f"Erro ao verificar a cópia {dest_path}")
+                ok, checksum = False, f"{type(e).__name__}: {e}"
+            results.append((src_path, dest_path, ok, checksum))
+        self.pending = still_pending
+        return results
+
+    def close(self):
+        self.executor.shutdown()
+
+# ---------------------------------------------------------------------------
+# Leitura antecipada da origem (pastas de rede)
+# ---------------------------------------------------------------------------
+
+class SourceStager:
+    """Lê os próximos vídeos da fila antes da análise, para que cada byte da origem atravesse a rede uma vez.
+
+    Com `staging_dir`, cada vídeo é copiado para uma pasta local (ex.: um SSD) e
+    a análise e a cópia para o destino leem dessa cópia. Sem ela, o sistema é
+    avisado com `posix_fadvise(WILLNEED)` para trazer o arquivo para o cache.
+    O volume adiantado fica limitado a `max_bytes`; cada vídeo ocupa a área até
+    `release`. Com `checksum`, o checksum da origem é calculado na leitura pela
+    rede, para que a verificação das cópias continue comparando com a origem.
+    """
+
+    def __init__(self, video_files: List[Path], staging_dir: Optional[Path], max_bytes: int,
+                 checksum: bool = False, log=print):
+        self.files = list(video_files)
+        self.waiting = set(self.files)
+        self.root = staging_dir / f"organizador-{os.getpid()}" if staging_dir else None
+        if self.root is not None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            # Nunca ocupa mais que 90% do espaço livre da pasta local
+            max_bytes = min(max_bytes, int(shutil.disk_usage(str(self.root)).free * 0.9))
+        self.max_bytes = max_bytes
+        self.checksum = checksum
+        self.log = log
+        self.staged: Dict[Path, Tuple[Path, int, Optional[str]]] = {}  # origem → (leitura, bytes, checksum)
+        self.in_use = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def from_options(cls, video_files: List[Path], options: 'RunOptions', log=print) -> Optional['SourceStager']:
+        """Cria o adiantamento pedido nas opções, ou None se estiver desativado ou não for possível."""
+        if not (options.prefetch or options.staging_dir) or not video_files:
+            return None
+        if options.output_mode != 'copy':
+            # Nos modos de link a origem não é lida por inteiro: adiantar leria mais do que a análise
+            log("⚠️ Leitura antecipada ignorada: só se aplica ao modo de cópia")
+            return None
+        if not options.staging_dir and not hasattr(os, 'posix_fadvise'):
+            log("⚠️ Leitura antecipada sem --staging-dir não é suportada neste sistema")
+            return None
+        staging_dir = Path(options.staging_dir) if options.staging_dir else None
+        return cls(video_files, staging_dir, int(options.staging_max_gb * 1024 ** 3),
+                   checksum=options.verify, log=log)
+
+    def _run(self):
+        for index, video_path in enumerate(self.files):
+            try:
+                size = video_path.stat().st_size
+            except OSError:
+                size = 0
+            if size > self.max_bytes:
+                # Não cabe na área: é lido direto da origem
+                with self.condition:
+                    self.staged[video_path] = (video_path, 0, None)
+                    self.condition.notify_all()
+                continue
+            with self.condition:
+                while not self.closed and self.in_use + size > self.max_bytes:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                self.in_use += size
+            try:
+                path, checksum = self._stage(index, video_path)
+            except Exception as e:
+                self.log(f"  ⚠️ Não foi possível adiantar a leitura de {video_path.name}: {e}")
+                path, checksum = video_path, None
+            with self.condition:
+                self.staged[video_path] = (path, size, checksum)
+                self.condition.notify_all()
+
+    def _stage(self, index: int, video_path: Path) -> Tuple[Path, Optional[str]]:
+        if self.root is None:
+            fd = os.open(str(video_path), os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+            return video_path, None
+        # Uma subpasta por vídeo mantém o nome original (usado no destino)
+        staged_path = self.root / str(index) / video_path.name
+        staged_path.parent.mkdir(exist_ok=True)
+        try:
+            if self.checksum:
+                checksum = Checksum()
+                _copy_with_checksum(video_path, staged_path, checksum)
+                return staged_path, checksum.value()
+            shutil.copy2(str(video_path), str(staged_path))
+            return staged_path, None
+        except Exception:
+            shutil.rmtree(str(staged_path.parent), ignore_errors=True)
+            raise
+
+    def get(self, video_path: Path, wait: bool = True) -> Optional[Path]:
+        """Caminho de onde ler o vídeo; sem `wait`, None se ainda não foi adiantado."""
+        with self.condition:
+            if video_path not in self.waiting:
+                return video_path
+            while video_path not in self.staged:
+                if not wait:
+                    return None
+                self.condition.wait()
+            return self.staged[video_path][0]
+
+    def source_checksum(self, video_path: Path) -> Optional[str]:
+        """Checksum da origem calculado na leitura antecipada, se houver."""
+        with self.condition:
+            entry = self.staged.get(video_path)
+        return entry[2] if entry else None
+
+    def release(self, video_path: Path):
+        """Libera a área ocupada pelo vídeo (e apaga a cópia local)."""
+        with self.condition:
+            entry = self.staged.pop(video_path, None)
+            self.waiting.discard(video_path)
+            if entry is None:
+                return
+            path, size, _ = entry
+            self.in_use -= size
+            self.condition.notify_all()
+        if path != video_path:
+            shutil.rmtree(str(path.parent), ignore_errors=True)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        if self.root is not None:
+            shutil.rmtree(str(self.root), ignore_errors=True)
+
+# ---------------------------------------------------------------------------
+# Execução retomável: diário de etapas concluídas por arquivo
+# ---------------------------------------------------------------------------
+
+class RunJournal:
+    """Diário append-only (JSON Lines) das etapas concluídas por arquivo.
+
+    Fica na pasta de destino. Cada linha registra uma etapa (`analyzed`,
+    `copied`, `size-checked`, `verified`, `source-deleted`) junto com tamanho e data de
+    modificação da origem; se a origem mudar, as etapas anteriores são
+    descartadas e o arquivo é processado de novo.
+    """
+
+    FILE_NAME = '.organizador-journal.jsonl'
+    STAGES = ('probed', 'analyzed', 'copied', 'size-checked', 'verified', 'source-deleted')
+
+    def __init__(self, dest_dir: Path):
+        self.path = dest_dir / self.FILE_NAME
+        self.entries: Dict[str, Dict[str, dict]] = {}
+        if self.path.exists():
+            self._load()
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Última linha pode estar incompleta se a execução foi interrompida
+                    continue
+                stages = self.entries.setdefault(record['path'], {})
+                if stages and self._fingerprint_changed(next(iter(stages.values())), record):
+                    stages.clear()
+                stages[record['stage']] = record
+
+    @staticmethod
+    def _fingerprint_changed(old: dict, new: dict) -> bool:
+        return old.get('size') != new.get('size') or old.get('mtime') != new.get('mtime')
+
+    @staticmethod
+    def _fingerprint(video_path: Path) -> Dict[str, Optional[int]]:
+        try:
+            stat = video_path.stat()
+            return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        except OSError:
+            return {'size': None, 'mtime': None}
+
+    def stages(self, video_path: Path) -> Dict[str, dict]:
+        """Etapas já concluídas para o arquivo, se a origem não mudou desde então."""
+        stages = self.entries.get(str(video_path.absolute()), {})
+        if not stages:
+            return {}
+        if self._fingerprint_changed(next(iter(stages.values())), self._fingerprint(video_path)):
+            return {}
+        return stages
+
+    def record(self, video_path: Path, stage: str, sync: bool = True, **data):
+        """Grava uma etapa concluída; com `sync`, a linha é forçada para o disco antes de retornar."""
+        key = str(video_path.absolute())
+        stages = self.entries.setdefault(key, {})
+        if video_path.exists() or not stages:
+            fingerprint = self._fingerprint(video_path)
+        else:
+            # Após excluir a origem não há mais o que consultar; reaproveita a identificação anterior
+            previous = next(iter(stages.values()))
+            fingerprint = {'size': previous.get('size'), 'mtime': previous.get('mtime')}
+        record = {'path': key, 'stage': stage, 'time': time.time(), **fingerprint, **data}
+        stages[stage] = record
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+# ---------------------------------------------------------------------------
+# Catálogo: modo sem cópia (links nas pastas de cor)
+# ---------------------------------------------------------------------------
+
+OUTPUT_MODES = ('copy', 'symlink', 'hardlink')
+
+class Catalog:
+    """Catálogo JSON (`catalogo.json` no destino) com a análise completa de cada vídeo.
+
+    Guarda os percentuais de todas as cores, então uma mudança de configuração
+    pode reclassificar a biblioteca só refazendo os links, sem decodificar nada.
+
+    No modo distribuído cada worker grava um catálogo parcial
+    (`.catalogo-<worker>.json`, com `part`); o catálogo principal junta as
+    partes ao ser lido e as remove ao ser gravado.
+    """
+
+    FILE_NAME = 'catalogo.json'
+    PART_PREFIX = '.catalogo-'
+    SAVE_EVERY = 50
+
+    def __init__(self, dest_dir: Path, part: Optional[str] = None):
+        if part is None:
+            self.path = dest_dir / self.FILE_NAME
+        else:
+            safe_name = re.sub(r'[^\w.-]', '_', part)
+            self.path = dest_dir / f"{self.PART_PREFIX}{safe_name}.json"
+        self.entries: Dict[str, dict] = self._read(self.path)
+        self._parts: Dict[Path, int] = {}  # Partes juntadas -> data de modificação ao ler
+        self._unsaved = 0
+        if part is None:
+            parts = []
+            for part_path in dest_dir.glob(f"{self.PART_PREFIX}*.json"):
+                try:
+                    parts.append((part_path.stat().st_mtime_ns, part_path))
+                except OSError:
+                    continue
+            # Da parte mais antiga para a mais nova: um job refeito por outro worker fica com o último resultado
+            for mtime, part_path in sorted(parts):
+                for key, entry in self._read(part_path).items():
+                    self.entries.setdefault(key, {}).update(entry)
+                self._parts[part_path] = mtime
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, dict]:
+        if not path.exists():
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('entries', {})
+
+    def update(self, video_path: Path, **data):
+        key = str(video_path.absolute())
+        self.entries.setdefault(key, {}).update(data)
+        self._unsaved += 1
+        if self._unsaved >= self.SAVE_EVERY:
+            self.save()
+
+    def save(self):
+        """Grava o catálogo de forma atômica; no principal, remove as partes já juntadas."""
+        temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.part")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'entries': self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(str(temp_path), str(self.path))
+        self._unsaved = 0
+        for part_path, mtime in self._parts.items():
+            try:
+                # Uma parte alterada depois da leitura (worker ainda rodando) fica para a próxima vez
+                if part_path.stat().st_mtime_ns == mtime:
+                    part_path.unlink()
+            except OSError:
+                pass
+        self._parts.clear()
+
+def relink_catalog(dest_dir: Path, log=print) -> int:
+    """Reclassifica os vídeos do catálogo com a configuração atual, só movendo links.
+
+    O diário de execução também é atualizado (cores e destino), para que uma
+    nova organização não recrie os links nas pastas antigas.
+    Retorna quantos links foram refeitos.
+    """
+    catalog = Catalog(dest_dir)
+    journal = RunJournal(dest_dir) if (dest_dir / RunJournal.FILE_NAME).exists() else None
+    moved = 0
+    try:
+        for source, entry in catalog.entries.items():
+            if entry.get('percentages') is None or not entry.get('link'):
+                continue
+            mode = entry.get('mode', 'symlink')
+            dominant_colors = select_dominant_colors(entry['percentages'])
+            dest_folder = get_destination_folder(dominant_colors, dest_dir)
+            old_link = dest_dir / entry['link']
+            if old_link.parent.name == dest_folder.name:
+                continue
+            # O link físico aponta para os mesmos dados da origem, que pode já ter
+            # sido excluída (--delete-source); o simbólico precisa do caminho original
+            target = old_link if mode == 'hardlink' else Path(source)
+            new_link = link_video(target, dest_folder, mode)
+            if new_link is None:
+                continue
+            try:
+                old_link.unlink()
+            except OSError:
+                pass
+            log(f"  {old_link.parent.name} → {dest_folder.name}: {old_link.name}")
+            catalog.update(Path(source), folder=dest_folder.name, link=str(new_link.relative_to(dest_dir)))
+            if journal is not None:
+                relink_journal(journal, Path(source), dominant_colors, new_link)
+            moved += 1
+    finally:
+        catalog.save()
+        if journal is not None:
+            journal.close()
+    return moved
+
+def relink_journal(journal: RunJournal, video_path: Path, dominant_colors, new_link: Path):
+    """Registra no diário a nova classificação e o novo destino de um vídeo reclassificado."""
+    stages = journal.entries.get(str(video_path.absolute()), {})
+    for stage, data in (('analyzed', {'colors': dominant_colors}), ('copied', {'dest': str(new_link)})):
+        if stage not in stages:
+            continue
+        previous = {k: v for k, v in stages[stage].items() if k not in ('path', 'stage', 'time', 'size', 'mtime')}
+        journal.record(video_path, stage, sync=False, **{**previous, **data})
+
+# ---------------------------------------------------------------------------
+# Métricas da execução (formato de texto do Prometheus)
+# ---------------------------------------------------------------------------
+
+# nome → (tipo, descrição)
+METRIC_DEFINITIONS = {
+    'organizador_files_total': ('counter', 'Vídeos processados, por pasta de destino e resultado'),
+    'organizador_errors_total': ('counter', 'Erros, por pasta de destino e etapa'),
+    'organizador_frames_decoded_total': ('counter', 'Quadros decodificados na análise'),
+    'organizador_bytes_copied_total': ('counter', 'Bytes copiados para o destino'),
+    'organizador_cache_hits_total': ('counter', 'Análises reaproveitadas, por origem (diário, quase-duplicado, serviço)'),
+    'organizador_stage_seconds': ('histogram', 'Duração de cada etapa por vídeo, em segundos'),
+    'organizador_memory_peak_bytes': ('gauge', 'Pico de memória da última execução'),
+    'organizador_memory_budget_bytes': ('gauge', 'Orçamento de memória das análises simultâneas'),
+}
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metrics:
+    """Contadores e histogramas da execução, seguros para uso entre threads.
+
+    Os processos de análise não registram nada: os resultados são contados no
+    processo principal, quando chegam.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple[str, tuple], float] = {}  # Contadores e medidores (gauge)
+        self.histograms: Dict[Tuple[str, tuple], List[float]] = {}  # [por faixa..., soma, contagem]
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> Tuple[str, tuple]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Define o valor de um medidor (gauge)."""
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.setdefault(key, [0] * (len(LATENCY_BUCKETS) + 2))
+            # Faixas cumulativas, como no Prometheus (le = "menor ou igual a")
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def _matching(self, series: dict, name: str, labels: dict):
+        wanted = {(k, str(v)) for k, v in labels.items()}
+        return [value for (n, series_labels), value in series.items() if n == name and wanted <= set(series_labels)]
+
+    def total(self, name: str, **labels) -> float:
+        """Soma de um contador (ou contagem de um histograma) nas séries com esses rótulos."""
+        with self.lock:
+            if METRIC_DEFINITIONS[name][0] == 'histogram':
+                return sum(h[-1] for h in self._matching(self.histograms, name, labels))
+            return sum(self._matching(self.counters, name, labels))
+
+    def mean(self, name: str, **labels) -> float:
+        """Média das observações de um histograma nas séries com esses rótulos."""
+        with self.lock:
+            histograms = self._matching(self.histograms, name, labels)
+        count = sum(h[-1] for h in histograms)
+        return sum(h[-2] for h in histograms) / count if count else 0.0
+
+    def by_label(self, name: str, label: str, **labels) -> Dict[str, float]:
+        """Totais de um contador agrupados pelos valores de um rótulo (ex.: por pasta)."""
+        wanted = {(k, str(v)) for k, v in labels.items()}
+        totals: Dict[str, float] = {}
+        with self.lock:
+            for (n, series_labels), value in self.counters.items():
+                label_values = dict(series_labels)
+                if n == name and wanted <= set(series_labels) and label in label_values:
+                    totals[label_values[label]] = totals.get(label_values[label], 0) + value
+        return totals
+
+    def render(self) -> str:
+        """Todas as séries no formato de texto do Prometheus."""
+        lines = []
+        with self.lock:
+            for name, (kind, help_text) in METRIC_DEFINITIONS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind != 'histogram':
+                    for (n, labels), value in sorted(self.counters.items()):
+                        if n == name:
+                            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                for (n, labels), histogram in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    for bound, count in zip(LATENCY_BUCKETS, histogram):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram[-2])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: Path):
+        """Grava as métricas de forma atômica (o coletor textfile do node_exporter exige isso)."""
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.part")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(str(temp_path), str(path))
+
+# Métricas do processo (interface, linha de comando, worker ou serviço)
+METRICS = Metrics()
+
+def _send_metrics(handler: BaseHTTPRequestHandler):
+    data = METRICS.render().encode('utf-8')
+    handler.send_response(200)
+    handler.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+    handler.send_header('Content-Length', str(len(data)))
+    handler.end_headers()
+    handler.wfile.write(data)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Rota GET /metrics para o Prometheus."""
+
+    def do_GET(self):
+        if self.path in ('/metrics', '/'):
+            _send_metrics(self)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        logging.debug("métricas: " + format, *args)
+
+class MetricsExporter:
+    """Publica `METRICS` num arquivo atualizado periodicamente e/ou em http://127.0.0.1:porta/metrics."""
+
+    def __init__(self, path: Optional[Path] = None, port: Optional[int] = None, interval: float = 15.0):
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.server = None
+        self.thread = None
+        if port:
+            self.server = ThreadingHTTPServer(('127.0.0.1', port), _MetricsHandler)
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        if path:
+            self.write()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            METRICS.write_file(self.path)
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar as métricas em {self.path}: {e}")
+
+    def close(self):
+        """Grava as métricas uma última vez e encerra o servidor."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.write()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+# ---------------------------------------------------------------------------
+# Progresso: custo estimado por arquivo, vazão aprendida e ordem da fila
+# ---------------------------------------------------------------------------
+
+SCHEDULES = ('fifo', 'shortest', 'largest')
+
+def estimate_cost(video_path: Path, metadata: Optional[VideoMetadata] = None) -> float:
+    """Custo relativo estimado de um vídeo (1.0 = análise de um vídeo 1080p típico).
+
+    A análise amostra um número fixo de frames: o custo cresce com a resolução
+    e com o GOP (cada busca decodifica desde o quadro-chave anterior). A cópia
+    cresce com o tamanho do arquivo.
+    """
+    try:
+        size_mb = video_path.stat().st_size / (1024 * 1024)
+    except OSError:
+        size_mb = 0.0
+    analysis = 1.0
+    if metadata is not None and metadata.width and metadata.height:
+        pixels = metadata.width * metadata.height / (1920 * 1080)
+        seek = max(1.0, (metadata.gop or 12) / 12)
+        analysis = 0.5 + 0.5 * pixels * seek
+    return analysis + size_mb / 100
+
+def schedule_videos(video_files: List[Path], policy: str, costs: Dict[Path, float]) -> List[Path]:
+    """Ordena a fila: 'shortest' mostra progresso cedo, 'largest' reduz o tempo total em paralelo."""
+    if policy == 'shortest':
+        return sorted(video_files, key=lambda p: costs[p])
+    if policy == 'largest':
+        return sorted(video_files, key=lambda p: costs[p], reverse=True)
+    return list(video_files)
+
+class ProgressEstimator:
+    """Progresso ponderado pelo custo estimado, com vazão aprendida durante a execução."""
+
+    SMOOTHING = 0.3  # Peso da vazão mais recente na média móvel
+
+    def __init__(self, costs: Dict[Path, float]):
+        self.costs = costs
+        self.total_cost = sum(costs.values()) or 1.0
+        self.total_files = len(costs)
+        self.done_cost = 0.0
+        self.done_files = 0
+        self.start_time = time.time()
+        self.last_time = self.start_time
+        self.throughput = None  # Custo concluído por segundo
+
+    def complete(self, video_path: Path):
+        now = time.time()
+        cost = self.costs.get(video_path, 1.0)
+        self.done_cost += cost
+        self.done_files += 1
+        elapsed = max(now - self.last_time, 1e-6)
+        instant = cost / elapsed
+        if self.throughput is None:
+            self.throughput = instant
+        else:
+            # Média móvel, mas ancorada na média geral para não oscilar com arquivos atípicos
+            overall = self.done_cost / max(now - self.start_time, 1e-6)
+            recent = self.SMOOTHING * instant + (1 - self.SMOOTHING) * self.throughput
+            self.throughput = (recent + overall) / 2
+        self.last_time = now
+
+    def fraction(self) -> float:
+        return min(1.0, self.done_cost / self.total_cost)
+
+    def eta(self) -> Optional[float]:
+        """Segundos restantes estimados (None até o primeiro arquivo terminar)."""
+        if not self.throughput:
+            return None
+        return max(0.0, self.total_cost - self.done_cost) / self.throughput
+
+    def files_per_minute(self) -> float:
+        elapsed = time.time() - self.start_time
+        return self.done_files / elapsed * 60 if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        eta = self.eta()
+        eta_str = time.strftime('%H:%M:%S', time.gmtime(eta)) if eta is not None else "--:--:--"
+        return (f"{self.done_files}/{self.total_files} • {self.files_per_minute():.1f} arquivos/min"
+                f" • restante ~{eta_str}")
+
+# ---------------------------------------------------------------------------
+# Organização de uma lista de vídeos (interface, linha de comando e workers)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class RunOptions:
+    """Opções de uma execução de organização."""
+    overwrite: bool = False
+    delete_source: bool = False
+    resume: bool = True
+    output_mode: str = 'copy'  # 'copy', 'symlink' ou 'hardlink'
+    dedup: bool = False  # Analisar e copiar só uma vez vídeos com conteúdo idêntico
+    near_duplicates: str = 'off'  # 'off', 'report' ou 'representative' (analisa um vídeo por grupo)
+    isolation: bool = True  # Analisar em processos supervisionados, com tempo limite por arquivo
+    analysis_workers: int = 0  # Processos de análise (0 = número de CPUs)
+    schedule: str = 'fifo'  # Ordem da fila: 'fifo', 'shortest' ou 'largest'
+    probe: bool = True  # Ler os metadados dos contêineres antes de analisar
+    verify: bool = False  # Conferir as cópias por checksum antes de marcá-las como verificadas
+    prefetch: bool = False  # Adiantar a leitura dos próximos vídeos (posix_fadvise)
+    staging_dir: Optional[str] = None  # Pasta local onde adiantar cópias da origem (ex.: SSD)
+    staging_max_gb: float = 20.0  # Limite do volume adiantado
+
+def organize_video(video_path: Path, dest_dir: Path, options: RunOptions,
+                   journal: Optional[RunJournal] = None, catalog: Optional[Catalog] = None, log=print,
+                   near_duplicates: Optional[NearDuplicateIndex] = None,
+                   analysis: Optional[VideoAnalysis] = None,
+                   metadata: Optional[VideoMetadata] = None,
+                   verifier: Optional[CopyVerifier] = None,
+                   source: Optional[Path] = None, source_checksum: Optional[str] = None,
+                   index: Optional[DestinationIndex] = None):
+    """Analisa, copia (ou cria o link), verifica e opcionalmente exclui a origem de um vídeo.
+
+    Com `journal`, etapas já concluídas numa execução anterior são puladas.
+    Com `near_duplicates`, o vídeo é indexado para detectar quase-duplicados.
+    `analysis` permite passar uma análise já feita (ex.: por `AnalysisSupervisor`).
+    Com `options.verify` e `verifier`, a conferência do checksum (e a exclusão
+    da origem) fica para quando o verificador terminar; ver `finish_verification`.
+    `source` é uma cópia local da origem para a análise e a cópia (ver
+    `SourceStager`), com o checksum da origem em `source_checksum`.
+    Com `index`, o destino é consultado no índice em vez do disco.
+    Retorna (cores dominantes, pasta de destino, caminho no destino ou None).
+    """
+    state = journal.stages(video_path) if journal else {}
+
+    if 'analyzed' in state:
+        dominant_colors = [tuple(c) for c in state['analyzed']['colors']]
+        percentages = state['analyzed'].get('percentages')
+        timeline = state['analyzed'].get('timeline')
+        analysis = VideoAnalysis(
+            video_path, percentages or {},
+            frame_hashes=state['analyzed'].get('frame_hashes', []),
+            frame_means=[tuple(m) for m in state['analyzed'].get('frame_means', [])],
+            color_timeline=np.array(timeline, np.uint8) if timeline else None,
+            luminance=state['analyzed'].get('luminance', 0.0),
+            motion=state['analyzed'].get('motion', 0.0)
+        )
+        log("  ↺ Análise retomada do diário")
+        METRICS.inc('organizador_cache_hits_total', source='journal')
+    else:
+        if analysis is None:
+            skip_duplicates = near_duplicates if options.near_duplicates == 'representative' else None
+            start = time.perf_counter()
+            analysis = analyze_video(source or video_path, near_duplicates=skip_duplicates, metadata=metadata)
+            METRICS.observe('organizador_stage_seconds', time.perf_counter() - start, stage='analysis')
+            if analysis is not None:
+                analysis.path = video_path
+        if analysis is not None:
+            if analysis.duplicate_of:
+                METRICS.inc('organizador_cache_hits_total', source='near_duplicate')
+            else:
+                METRICS.inc('organizador_frames_decoded_total', analysis.frames_processed)
+        if analysis is not None and analysis.error:
+            log(f"  ⚠️ Análise falhou: {analysis.error}")
+        percentages = analysis.percentages if analysis else None
+        dominant_colors = select_dominant_colors(percentages) if percentages else []
+        if journal:
+            journal.record(
+                video_path, 'analyzed', colors=dominant_colors, percentages=percentages,
+                frame_hashes=analysis.frame_hashes if analysis else [],
+                frame_means=analysis.frame_means if analysis else [],
+                error=analysis.error if analysis else None,
+                **(analysis.features() if analysis else {})
+            )
+
+    if near_duplicates is not None and analysis is not None:
+        representative = near_duplicates.add(analysis)
+        if representative is not None:
+            reused = " (análise reaproveitada)" if analysis.duplicate_of else ""
+            log(f"  ≈ Quase-duplicado de {representative.name}{reused}")
+
+    dest_folder = get_destination_folder(dominant_colors, dest_dir)
+    dest_path = dest_folder / video_path.name
+    verify = options.verify and options.output_mode == 'copy'
+    if analysis is not None and analysis.error and 'analyzed' not in state:
+        METRICS.inc('organizador_errors_total', folder=dest_folder.name, stage='analysis')
+    checksum = state.get('copied', {}).get('checksum')
+
+    if 'copied' in state and (index.contains(dest_path) if index is not None else dest_path.exists()):
+        log("  ↺ Cópia já concluída anteriormente")
+    elif 'analyzed' in state and _is_same_file(video_path, dest_path, index):
+        # Interrompido entre a cópia e o registro no diário: a renomeação atômica
+        # garante que o arquivo no destino está completo
+        if journal:
+            journal.record(video_path, 'copied', dest=str(dest_path))
+    else:
+        # O checksum da leitura antecipada vem da própria origem; sem ele, é calculado na cópia
+        copy_checksum = Checksum() if verify and not source_checksum else None
+        start = time.perf_counter()
+        dest_path = place_video(video_path, dest_folder, options, copy_checksum, source, index)
+        if dest_path is None:
+            return dominant_colors, dest_folder, None
+        METRICS.observe('organizador_stage_seconds', time.perf_counter() - start,
+                        stage='copy' if options.output_mode == 'copy' else 'link')
+        if options.output_mode == 'copy':
+            METRICS.inc('organizador_bytes_copied_total', (source or video_path).stat().st_size)
+        checksum = source_checksum or (copy_checksum.value() if copy_checksum else None)
+        if journal:
+            journal.record(video_path, 'copied', dest=str(dest_path), checksum=checksum)
+
+    if catalog is not None:
+        stat = video_path.stat()
+        catalog.update(
+            video_path, percentages=percentages, folder=dest_folder.name, link=str(dest_path.relative_to(dest_dir)),
+            mode=options.output_mode, size=stat.st_size, mtime=stat.st_mtime_ns,
+            frame_hashes=analysis.frame_hashes if analysis else [],
+            **(analysis.features() if analysis else {})
+        )
+
+    # Com --verify só vale uma verificação por checksum; a conferência de tamanho
+    # e data de uma execução anterior sem --verify não basta para excluir a origem
+    if verify:
+        checked = bool(state.get('verified', {}).get('checksum'))
+    else:
+        checked = 'verified' in state or 'size-checked' in state
+    if not checked:
+        if not _is_same_file(video_path, dest_path, index):
+            log(f"  ⚠️ Cópia com tamanho diferente da origem: {dest_path.name}")
+            return dominant_colors, dest_folder, None
+        if verify:
+            if verifier is not None:
+                verifier.submit(video_path, dest_path, checksum)
+                return dominant_colors, dest_folder, dest_path
+            ok, dest_checksum = verify_copy(video_path, dest_path, checksum)
+            if not finish_verification(video_path, dest_path, ok, dest_checksum, options, journal, log, index):
+                return dominant_colors, dest_folder, None
+            return dominant_colors, dest_folder, dest_path
+        if journal:
+            journal.record(video_path, 'size-checked')
+
+    if 'source-deleted' not in state:
+        remove_source(video_path, options, journal, log)
+
+    return dominant_colors, dest_folder, dest_path
+
+def remove_source(video_path: Path, options: RunOptions, journal: Optional[RunJournal] = None, log=print):
+    """Exclui o original, se a opção estiver ativa (um link simbólico ficaria quebrado)."""
+    if not options.delete_source or options.output_mode == 'symlink':
+        return
+    try:
+        video_path.unlink()
+        if journal:
+            journal.record(video_path, 'source-deleted')
+        log(f"  ✅ Arquivo original excluído: {video_path.name}")
+    except Exception as delete_error:
+        log(f"  ⚠️ Erro ao excluir original: {str(delete_error)}")
+
+def finish_verification(video_path: Path, dest_path: Path, ok: bool, checksum: str, options: RunOptions,
+                        journal: Optional[RunJournal] = None, log=print,
+                        index: Optional[DestinationIndex] = None) -> bool:
+    """Conclui a verificação por checksum de uma cópia: registra e exclui a origem, ou descarta a cópia.
+
+    Uma cópia que não confere é apagada (a origem é mantida), para ser refeita
+    na próxima execução.
+    """
+    if not ok:
+        log(f"  ⚠️ Cópia não confere com a origem ({checksum}); original mantido: {video_path.name}")
+        METRICS.inc('organizador_errors_total', folder=dest_path.parent.name, stage='verify')
+        try:
+            dest_path.unlink()
+        except OSError:
+            pass
+        if index is not None:
+            index.discard(dest_path)
+        return False
+    if journal:
+        journal.record(video_path, 'verified', checksum=checksum)
+    remove_source(video_path, options, journal, log)
+    return True
+
+def place_video(video_path: Path, dest_folder: Path, options: RunOptions,
+                checksum: Optional[Checksum] = None, source: Optional[Path] = None,
+                index: Optional[DestinationIndex] = None) -> Optional[Path]:
+    """Copia ou cria o link do vídeo na pasta, conforme o modo de saída.
+
+    A cópia lê de `source` (cópia local da origem), se houver; links sempre
+    apontam para a origem.
+    """
+    if options.output_mode == 'copy':
+        return copy_video(source or video_path, dest_folder, options.overwrite, checksum, index)
+    return link_video(video_path, dest_folder, options.output_mode, options.overwrite, index)
+
+def _is_same_file(src_path: Path, dest_path: Path, index: Optional[DestinationIndex] = None) -> bool:
+    """Compara tamanho e data de modificação (preservada por copy2).
+
+    Com `index`, os dados do destino vêm do índice, se ele cobre a pasta.
+    """
+    try:
+        src_stat = src_path.stat()
+        if index is not None and index.covers(dest_path.parent):
+            dest = index.stat(dest_path)
+        else:
+            dest_stat = dest_path.stat()
+            dest = (dest_stat.st_size, dest_stat.st_mtime_ns)
+    except OSError:
+        return False
+    if dest is None:
+        return False
+    # Tolerância de 2s para sistemas de arquivos com baixa resolução de data (FAT/exFAT)
+    return src_stat.st_size == dest[0] and abs(src_stat.st_mtime_ns - dest[1]) <= 2_000_000_000
+
+def organize_videos(video_files: List[Path], dest_dir: Path, options: RunOptions, log=print, on_progress=None,
+                    supervisor: Optional['AnalysisSupervisor'] = None,
+                    analysis_cache: Optional[Dict[Path, VideoAnalysis]] = None):
+    """Organiza uma lista de vídeos; usado tanto pela interface quanto pela linha de comando.
+
+    `on_progress(estimator, video_path)` é chamado ao iniciar e ao concluir cada arquivo.
+    `supervisor` permite reaproveitar processos de análise já iniciados (modo
+    serviço); nesse caso eles não são encerrados ao final.
+    `analysis_cache` traz análises já feitas (não são refeitas) e recebe as
+    análises bem-sucedidas dos processos supervisionados.
+    Retorna o índice do destino, atualizado com o que foi gravado.
+    """
+    # Uma leitura por pasta de cor: cria as que faltam e remove cópias
+    # temporárias deixadas por execuções interrompidas
+    index = DestinationIndex.scan(dest_dir)
+
+    if options.delete_source and options.output_mode == 'symlink':
+        log("⚠️ Modo de links simbólicos: os arquivos de origem não serão excluídos")
+
+    duplicates = {}
+    if options.dedup:
+        log("Procurando duplicados...")
+        video_files, duplicates = find_duplicates(video_files)
+
+    journal = RunJournal(dest_dir) if options.resume else None
+
+    # Análise isolada em processos supervisionados. O modo 'representative'
+    # consulta o índice de quase-duplicados durante a decodificação, então roda
+    # no próprio processo.
+    isolated = options.isolation and options.near_duplicates != 'representative'
+
+    metadata = {}
+    if options.probe:
+        log(f"Lendo metadados de {len(video_files)} vídeos...")
+        # Com a análise isolada, o OpenCV só abre vídeos nos processos supervisionados
+        metadata = probe_videos(video_files, journal, opencv_fallback=not isolated)
+
+    costs = {path: estimate_cost(path, metadata.get(path)) for path in video_files}
+    video_files = schedule_videos(video_files, options.schedule, costs)
+    progress = ProgressEstimator(costs)
+
+    catalog = Catalog(dest_dir) if options.output_mode != 'copy' else None
+    near_duplicates = None
+    if options.near_duplicates != 'off':
+        near_duplicates = NearDuplicateIndex(DEFAULT_CONFIG['phash_max_distance'])
+
+    # Leitura antecipada só dos vídeos que ainda precisam ser lidos (análise ou cópia)
+    stager = SourceStager.from_options(
+        [p for p in video_files if not (journal and {'analyzed', 'copied'} <= journal.stages(p).keys())],
+        options, log
+    )
+
+    active_supervisor = None
+    analyses = {}
+    if isolated:
+        to_analyze = [p for p in video_files if not (journal and 'analyzed' in journal.stages(p))
+                      and p not in (analysis_cache or {})]
+        if to_analyze:
+            active_supervisor = supervisor or AnalysisSupervisor(options.analysis_workers or os.cpu_count() or 1)
+            prepare = (lambda path: stager.get(path, wait=False)) if stager else None
+            analyses = active_supervisor.imap(to_analyze, metadata, prepare)
+        to_analyze = set(to_analyze)
+
+    ready_analyses: Dict[Path, VideoAnalysis] = {}
+
+    def analysis_for(video_path):
+        """Resultado do supervisor para o vídeo, pelo caminho (os resultados chegam na ordem da fila)."""
+        while video_path not in ready_analyses:
+            path, result = next(analyses)
+            ready_analyses[path] = result
+        return ready_analyses.pop(video_path)
+
+    verifier = CopyVerifier() if options.verify and options.output_mode == 'copy' else None
+
+    def finish_verified(wait=False):
+        for result in verifier.collect(wait):
+            finish_verification(*result, options, journal, log, index)
+
+    monitor = MemoryMonitor()
+    total_files = len(video_files)
+    try:
+        for i, video_path in enumerate(video_files, 1):
+            try:
+                log(f"[{i}/{total_files}] Processando: {video_path.name}")
+                if on_progress:
+                    on_progress(progress, video_path)
+
+                if active_supervisor and video_path in to_analyze:
+                    analysis = analysis_for(video_path)
+                    if analysis_cache is not None and analysis is not None and not analysis.error:
+                        analysis_cache[video_path] = analysis
+                else:
+                    analysis = analysis_cache.get(video_path) if analysis_cache else None
+                source = stager.get(video_path) if stager else None
+                dominant_colors, folder, dest_path = organize_video(
+                    video_path, dest_dir, options, journal, catalog, log, near_duplicates, analysis,
+                    metadata.get(video_path), verifier, source, stager.source_checksum(video_path) if stager else None,
+                    index
+                )
+
+                if dest_path is None:
+                    # Arquivo não foi copiado (já existe ou erro)
+                    log(f"  ⚠️ Arquivo não copiado: {video_path.name}")
+                    METRICS.inc('organizador_files_total', folder=folder.name, result='skipped')
+                    continue
+                METRICS.inc('organizador_files_total', folder=folder.name, result='ok')
+
+                # Log results
+                colors_str = ", ".join(f"{c[0]} ({c[1]:.1f}%)" for c in dominant_colors) if dominant_colors else "não identificado"
+                log(f"  → {colors_str} → {dest_path.relative_to(dest_dir)}")
+
+            except Exception as e:
+                log(f"Erro ao processar {video_path.name}: {str(e)}")
+                METRICS.inc('organizador_files_total', folder='nao-identificado', result='error')
+                METRICS.inc('organizador_errors_total', folder='nao-identificado', stage='other')
+                # Try to copy to nao-identificado on error
+                try:
+                    error_dest = dest_dir / 'nao-identificado'
+                    place_video(video_path, error_dest, options, source=stager.get(video_path) if stager else None,
+                                index=index)
+                    log(f"  → Copiado para: {error_dest.relative_to(dest_dir)}")
+                except Exception as copy_error:
+                    log(f"  → Falha ao copiar: {str(copy_error)}")
+            finally:
+                if stager is not None:
+                    stager.release(video_path)
+                progress.complete(video_path)
+                if on_progress:
+                    on_progress(progress, video_path)
+                if verifier is not None:
+                    finish_verified()
+        if verifier is not None and verifier.pending:
+            log("Aguardando a verificação das últimas cópias...")
+            finish_verified(wait=True)
+    finally:
+        if verifier is not None:
+            verifier.close()
+        if active_supervisor is not None:
+            analyses.close()
+            if active_supervisor is not supervisor:
+                active_supervisor.close()
+        if stager is not None:
+            stager.close()
+        if journal:
+            journal.close()
+        if catalog is not None:
+            catalog.save()
+        peak_memory = monitor.close()
+    if peak_memory is not None:
+        METRICS.set('organizador_memory_peak_bytes', peak_memory)
+    budget = active_supervisor.memory_budget if active_supervisor is not None else MemoryBudget.from_config()
+    log_memory_report(peak_memory, monitor.summed, budget, log)
+    log_duplicates_summary(duplicates, log)
+    if near_duplicates is not None:
+        log_near_duplicates_summary(near_duplicates.groups(), log)
+    log_destination_summary(index, log)
+    return index
+
+def log_near_duplicates_summary(groups: Dict[Path, List[Path]], log=print):
+    """Resumo dos grupos de quase-duplicados (mesmo conteúdo em outra resolução/formato)."""
+    if not groups:
+        return
+    log(f"≈ {len(groups)} grupos de quase-duplicados:")
+    for representative, members in groups.items():
+        log(f"  {representative.name}: " + ", ".join(path.name for path in members))
+
+# ---------------------------------------------------------------------------
+# Modo distribuído: coordenador + workers com fila compartilhada em SQLite
+# ---------------------------------------------------------------------------
+
+class JobQueue:
+    """Fila de trabalhos compartilhada (arquivo SQLite) para o modo coordenador/worker.
+
+    Cada vídeo é um job. Workers reservam lotes com um prazo (lease); se um
+    worker morrer, o prazo expira e outro worker assume os jobs pendentes.
+    """
+
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, db_path: Path, timeout: float = 60.0):
+        self.db_path = Path(db_path)
+        # isolation_level=None: as transações são controladas manualmente
+        self.conn = sqlite3.connect(str(self.db_path), timeout=timeout, isolation_level=None)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                folder TEXT,
+                colors TEXT,
+                error TEXT,
+                updated REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def close(self):
+        self.conn.close()
+
+    def set_meta(self, key: str, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def enqueue(self, paths: List[Path]) -> int:
+        """Adiciona vídeos à fila, ignorando os que já existem. Retorna quantos foram inseridos."""
+        rows = []
+        for path in paths:
+            try:
+                size = path.stat().st_size
+            except OSError:
+                size = None
+            rows.append((str(path), size, time.time()))
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO jobs (path, size, updated) VALUES (?, ?, ?)", rows)
+            inserted = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def claim(self, worker_id: str, batch_size: int, lease_seconds: float) -> List[Tuple[int, str]]:
+        """Reserva até `batch_size` jobs pendentes ou com prazo expirado.
+
+        Jobs com prazo expirado que já esgotaram as tentativas passam a 'failed'.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Prazo expirado na última tentativa: o worker morreu em todas, o job falhou
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', lease_until = NULL, updated = ?, "
+                "error = COALESCE(error, 'prazo expirado em todas as tentativas') "
+                "WHERE status = 'claimed' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.MAX_ATTEMPTS)
+            )
+            rows = self.conn.execute(
+                "SELECT id, path FROM jobs "
+                "WHERE (status = 'pending' OR (status = 'claimed' AND lease_until < ?)) AND attempts < ? "
+                "ORDER BY id LIMIT ?",
+                (now, self.MAX_ATTEMPTS, batch_size)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'claimed', worker = ?, lease_until = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                [(worker_id, now + lease_seconds, now, job_id) for job_id, _ in rows]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def renew(self, worker_id: str, job_ids: List[int], lease_seconds: float):
+        """Estende o prazo dos jobs ainda em andamento por este worker."""
+        until = time.time() + lease_seconds
+        self.conn.executemany(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'claimed'",
+            [(until, job_id, worker_id) for job_id in job_ids]
+        )
+
+    def complete(self, job_id: int, worker_id: str, folder: str, colors: List[Tuple[str, float]]):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'done', folder = ?, colors = ?, error = NULL, lease_until = NULL, updated = ? "
+            "WHERE id = ? AND worker = ?",
+            (folder, json.dumps(colors), time.time(), job_id, worker_id)
+        )
+
+    def fail(self, job_id: int, worker_id: str, error: str):
+        """Registra erro; o job volta para a fila até atingir MAX_ATTEMPTS."""
+        self.conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_until = NULL, updated = ? WHERE id = ? AND worker = ?",
+            (self.MAX_ATTEMPTS, error, time.time(), job_id, worker_id)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def remaining(self) -> int:
+        """Jobs que ainda podem ser processados (pendentes ou reservados)."""
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'claimed') AND attempts < ?",
+            (self.MAX_ATTEMPTS,)
+        ).fetchone()
+        return row[0]
+
+class LeaseKeeper:
+    """Renova em segundo plano o prazo dos jobs reservados enquanto o worker os processa.
+
+    Um único vídeo pode demorar mais que o prazo (arquivos enormes, rede lenta);
+    renovar só entre arquivos deixaria outro worker assumir um job em andamento.
+    Usa uma conexão própria, já que a do worker não pode ser usada em outra thread.
+    """
+
+    def __init__(self, queue_path: Path, worker_id: str, lease_seconds: float):
+        self.queue_path = queue_path
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.job_ids: List[int] = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def set_jobs(self, job_ids: List[int]):
+        with self.lock:
+            self.job_ids = list(job_ids)
+
+    def _run(self):
+        queue = JobQueue(self.queue_path)
+        try:
+            # Renova bem antes do fim do prazo, para tolerar uma renovação perdida
+            while not self.stop_event.wait(self.lease_seconds / 3):
+                with self.lock:
+                    job_ids = list(self.job_ids)
+                if not job_ids:
+                    continue
+                try:
+                    queue.renew(self.worker_id, job_ids, self.lease_seconds)
+                except sqlite3.Error as e:
+                    print(f"[{self.worker_id}] ⚠️ Erro ao renovar reservas: {e}")
+        finally:
+            queue.close()
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+
+def run_coordinator(src_dir: Path, dest_dir: Path, queue_path: Path, options: RunOptions) -> int:
+    """Enumera a pasta de origem e grava os jobs na fila compartilhada."""
+    video_files = discover_videos(src_dir)
+    if options.dedup:
+        video_files, duplicates = find_duplicates(video_files)
+        log_duplicates_summary(duplicates)
+    queue = JobQueue(queue_path)
+    try:
+        queue.set_meta('dest_dir', str(dest_dir.absolute()))
+        queue.set_meta('options', asdict(options))
+        queue.set_meta('config', {k: v for k, v in DEFAULT_CONFIG.items() if k != 'supported_formats'})
+        inserted = queue.enqueue([p.absolute() for p in video_files])
+    finally:
+        queue.close()
+    print(f"Fila {queue_path}: {inserted} novos jobs ({len(video_files)} vídeos encontrados)")
+    return inserted
+
+def run_worker(queue_path: Path, worker_id: Optional[str] = None, batch_size=4, lease_seconds=600.0, poll_interval=5.0):
+    """Processa jobs da fila até ela esvaziar. Pode rodar em qualquer máquina com acesso à fila."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    queue = JobQueue(queue_path)
+    try:
+        dest_value = queue.get_meta('dest_dir')
+        if not dest_value:
+            print(f"Erro: fila sem destino configurado: {queue_path}")
+            return
+        dest_dir = Path(dest_value)
+        options = RunOptions(**queue.get_meta('options', {}))
+        DEFAULT_CONFIG.update(queue.get_meta('config', {}))
+
+        # Sem índice do destino: outros workers gravam nas mesmas pastas, então
+        # conflitos de nome são conferidos no disco
+        for dir_name in REQUIRED_DIRS:
+            (dest_dir / dir_name).mkdir(parents=True, exist_ok=True)
+
+        # Com links, cada worker grava um catálogo parcial (para --relink)
+        catalog = Catalog(dest_dir, part=worker_id) if options.output_mode != 'copy' else None
+
+        # Como em organize_videos, a análise roda em processos supervisionados
+        # (tempo limite por arquivo), a menos que a fila tenha isolation=False
+        supervisor = None
+        if options.isolation:
+            supervisor = AnalysisSupervisor(options.analysis_workers or min(batch_size, os.cpu_count() or 1))
+        keeper = LeaseKeeper(queue_path, worker_id, lease_seconds)
+        try:
+            print(f"[{worker_id}] Worker iniciado (fila: {queue_path})")
+            while True:
+                jobs = queue.claim(worker_id, batch_size, lease_seconds)
+                if not jobs:
+                    if queue.remaining() == 0:
+                        break
+                    # Outros workers ainda têm jobs reservados; aguarda prazos expirarem
+                    time.sleep(poll_interval)
+                    continue
 
-def process_video(video_path: Path, progress_callback=None):
-    """Process a single video file and return dominant colors."""
+                job_ids = {Path(path_str): job_id for job_id, path_str in jobs}
+                keeper.set_jobs(list(job_ids.values()))
+                if supervisor is not None:
+                    analyses = supervisor.imap(list(job_ids))
+                else:
+                    analyses = ((video_path, None) for video_path in list(job_ids))
+                for video_path, analysis in analyses:
+                    job_id = job_ids.pop(video_path)
+                    try:
+                        print(f"[{worker_id}] Processando: {video_path.name}")
+                        # A própria fila faz o papel do diário no modo distribuído
+                        dominant_colors, dest_folder, dest_path = organize_video(
+                            video_path, dest_dir, options, catalog=catalog, analysis=analysis
+                        )
+                        if dest_path is None and not _kept_existing(video_path, dest_folder, options):
+                            # Cópia ou link falhou (ou não conferiu): volta para a fila
+                            queue.fail(job_id, worker_id, "arquivo não copiado")
+                            METRICS.inc('organizador_files_total', folder=dest_folder.name, result='error')
+                            continue
+                        queue.complete(job_id, worker_id, dest_folder.name, dominant_colors)
+                        METRICS.inc('organizador_files_total', folder=dest_folder.name,
+                                    result='ok' if dest_path is not None else 'skipped')
+                    except Exception as e:
+                        print(f"[{worker_id}] Erro ao processar {video_path.name}: {str(e)}")
+                        queue.fail(job_id, worker_id, str(e))
+                        METRICS.inc('organizador_errors_total', folder='nao-identificado', stage='other')
+                    finally:
+                        keeper.set_jobs(list(job_ids.values()))
+        finally:
+            keeper.close()
+            if supervisor is not None:
+                supervisor.close()
+            if catalog is not None:
+                catalog.save()
+        print(f"[{worker_id}] Fila concluída: {queue.stats()}")
+    finally:
+        queue.close()
+
+def _kept_existing(video_path: Path, dest_folder: Path, options: RunOptions) -> bool:
+    """Se o vídeo não foi copiado só porque já existe um arquivo com o nome no destino (sem --overwrite)."""
+    return not options.overwrite and os.path.lexists(dest_folder / video_path.name)
+
+def _worker_process_main(queue_path: str, batch_size: int, lease_seconds: float):
+    """Ponto de entrada dos workers locais iniciados pelo coordenador."""
+    run_worker(Path(queue_path), batch_size=batch_size, lease_seconds=lease_seconds)
+
+def run_local_workers(queue_path: Path, workers: int, batch_size=4, lease_seconds=600.0) -> Dict[str, int]:
+    """Inicia `workers` processos locais contra a fila e aguarda o término."""
+    processes = [
+        multiprocessing.Process(
+            target=_worker_process_main,
+            args=(str(queue_path), batch_size, lease_seconds),
+            daemon=False
+        )
+        for _ in range(workers)
+    ]
+    for proc in processes:
+        proc.start()
+    for proc in processes:
+        proc.join()
+    queue = JobQueue(queue_path)
     try:
-        # Verificar se o arquivo existe antes de tentar abrir
-        if not video_path.exists():
-            print(f"Arquivo não encontrado: {video_path}")
-            return None, []
-        
-        # Open video file
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            print(f"Não foi possível abrir o vídeo: {video_path}")
-            return None, []
-        
-        # Get video properties
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        duration = total_frames / fps if fps > 0 else 0
-        
-        # Determine frame sampling strategy
-        sample_rate = max(1, total_frames // DEFAULT_CONFIG['sample_frames'])
-        
-        color_infos = get_color_ranges()
-        color_totals = {name: 0.0 for name in color_infos}
-        frames_processed = 0
-        
-        # Process frames
-        for frame_idx in range(0, total_frames, sample_rate):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            
-            if not ret:
-                continue
-                
-            # Resize frame for faster processing
-            height, width = frame.shape[:2]
-            scale = DEFAULT_CONFIG['resize_width'] / width
-            new_size = (DEFAULT_CONFIG['resize_width'], int(height * scale))
-            frame = cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
-            
-            # Analyze frame colors
-            frame_colors = analyze_frame_colors(frame, color_infos)
-            
-            # Update totals
-            for color, percent in frame_colors.items():
-                color_totals[color] += percent
-            
-            frames_processed += 1
-            
-            # Update progress
-            if progress_callback:
-                progress_callback()
-        
-        cap.release()
-        
-        if frames_processed == 0:
-            print(f"Nenhum frame processado para: {video_path}")
-            return video_path, []
-        
-        # Calculate average percentages
-        avg_percentages = {color: total / frames_processed for color, total in color_totals.items()}
-        
-        # Filter colors above threshold
-        dominant_colors = [
-            (color, percent) 
-            for color, percent in avg_percentages.items() 
-            if percent >= DEFAULT_CONFIG['min_color_percent']
-        ]
-        
-        # Sort by percentage (descending)
-        dominant_colors.sort(key=lambda x: x[1], reverse=True)
-        
-        return video_path, dominant_colors
-        
-    except Exception as e:
-        print(f"Erro ao processar {video_path}: {str(e)}")
-        return video_path, []
+        options = RunOptions(**queue.get_meta('options', {}))
+        if options.output_mode != 'copy':
+            # Junta os catálogos parciais dos workers no catálogo do destino
+            Catalog(Path(queue.get_meta('dest_dir'))).save()
+        return queue.stats()
+    finally:
+        queue.close()
 
-def get_color_combinations():
-    """Gera todas as combinações de duas cores em ordem alfabética."""
-    # Não é mais necessário criar combinações, pois usamos apenas a cor majoritária
-    return []
+# ---------------------------------------------------------------------------
+# Modo serviço: processo residente com API HTTP local
+# ---------------------------------------------------------------------------
 
-def get_destination_folder(colors: List[Tuple[str, float]], dest_dir: Path) -> Path:
-    """Determine the destination folder based on dominant colors."""
-    if not colors:
-        return dest_dir / 'nao-identificado'
-    
-    # Se não houver cores predominantes claras (múltiplas cores sem predominância)
-    if len(colors) > 1:
-        # Verificar se a primeira cor tem uma predominância significativa (>50%)
-        if colors[0][1] > 50:
-            return dest_dir / colors[0][0]
-        else:
-            # Múltiplas cores sem predominância clara -> pasta colorido
-            return dest_dir / 'colorido'
-    
-    # Apenas uma cor predominante
-    return dest_dir / colors[0][0]
+SERVICE_PORT = 8765
+SERVICE_TOKEN_HEADER = 'X-Organizador-Token'
 
-def copy_video(src_path: Path, dest_dir: Path, overwrite=False) -> Optional[Path]:
-    """Copy video to destination with conflict resolution."""
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    dest_path = dest_dir / src_path.name
-    
-    # Verificar se o arquivo já existe no destino
-    if dest_path.exists():
-        if overwrite:
+def service_token_path(port: int = SERVICE_PORT, socket_path: Optional[str] = None) -> Path:
+    """Arquivo com o token do serviço; `organizer_client.py` procura no mesmo lugar."""
+    if socket_path:
+        return Path(socket_path + '.token')
+    return Path.home() / '.organizador-fundos' / f'servico-{port}.token'
+
+def write_service_token(path: Path) -> str:
+    """Gera o token desta execução num arquivo legível só pelo usuário."""
+    token = secrets.token_urlsafe(32)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token)
+    return token
+
+class OrganizerService:
+    """Estado do modo serviço: processos de análise já iniciados e cache de resultados.
+
+    Evita, a cada lote, o custo de iniciar o programa (importar OpenCV/NumPy,
+    configurar logs e criar os processos de análise). O cache é indexado por
+    caminho, tamanho e data de modificação, então um arquivo alterado é
+    analisado de novo.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.started = time.time()
+        self.supervisor = AnalysisSupervisor(workers or os.cpu_count() or 1)
+        # Os processos de análise atendem uma requisição por vez
+        self.lock = threading.Lock()
+        self.cache: Dict[Tuple[str, int, int], VideoAnalysis] = {}
+        self.requests = 0
+        self.cache_hits = 0
+        # Índice de cada destino, da última organização feita pelo serviço
+        self.destinations: Dict[str, DestinationIndex] = {}
+
+    @staticmethod
+    def _cache_key(video_path: Path) -> Tuple[str, int, int]:
+        stat = video_path.stat()
+        return str(video_path.resolve()), stat.st_size, stat.st_mtime_ns
+
+    def _cache_keys(self, video_paths: List[Path]) -> Dict[Path, Optional[Tuple[str, int, int]]]:
+        keys = {}
+        for video_path in video_paths:
             try:
-                dest_path.unlink()
-            except Exception as e:
-                print(f"Erro ao sobrescrever arquivo {dest_path}: {e}")
-                return None
+                keys[video_path] = self._cache_key(video_path)
+            except OSError:
+                keys[video_path] = None
+        return keys
+
+    def _count_hits(self, keys: Dict[Path, Optional[Tuple[str, int, int]]]):
+        hits = sum(1 for key in keys.values() if key in self.cache)
+        self.cache_hits += hits
+        METRICS.inc('organizador_cache_hits_total', hits, source='service')
+
+    def classify(self, paths: List[str]) -> List[dict]:
+        """Classifica os vídeos; os já analisados vêm do cache."""
+        self.requests += 1
+        keys = self._cache_keys([Path(path_str) for path_str in paths])
+        missing = [p for p, key in keys.items() if key is not None and key not in self.cache]
+        self._count_hits(keys)
+        failed: Dict[Path, VideoAnalysis] = {}  # Falhas não vão para o cache
+        if missing:
+            with self.lock:
+                for video_path, analysis in self.supervisor.imap(missing):
+                    if analysis.error:
+                        failed[video_path] = analysis
+                    else:
+                        self.cache[keys[video_path]] = analysis
+
+        results = []
+        for video_path, key in keys.items():
+            analysis = failed.get(video_path) or self.cache.get(key)
+            if analysis is None:
+                results.append({'path': str(video_path), 'error': 'arquivo não encontrado'})
+                continue
+            colors = select_dominant_colors(analysis.percentages)
+            results.append({
+                'path': str(video_path),
+                'folder': get_destination_folder(colors, Path()).name,
+                'colors': colors,
+                'percentages': analysis.percentages,
+                'error': analysis.error,
+                **analysis.features(),
+            })
+        return results
+
+    def organize(self, src: str, dst: str, options: Optional[dict] = None) -> dict:
+        """Organiza uma pasta com os processos de análise já iniciados.
+
+        Usa e alimenta o mesmo cache de `classify`: classificar e depois
+        organizar decodifica cada vídeo uma vez só.
+        """
+        self.requests += 1
+        src_dir, dest_dir = Path(src), Path(dst)
+        if not src_dir.is_dir():
+            raise ValueError(f"A pasta de origem não existe: {src_dir}")
+        known = {f.name for f in fields(RunOptions)}
+        run_options = RunOptions(**{k: v for k, v in (options or {}).items() if k in known})
+        video_files = discover_videos(src_dir)
+        lines = []
+
+        def log(message):
+            lines.append(message)
+            logging.info(message)
+
+        with self.lock:
+            # Chaves tiradas antes da execução: com delete_source a origem some
+            keys = self._cache_keys(video_files)
+            self._count_hits(keys)
+            analyses = {path: self.cache[key] for path, key in keys.items() if key in self.cache}
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            index = organize_videos(video_files, dest_dir, run_options, log=log, supervisor=self.supervisor,
+                                    analysis_cache=analyses)
+            self.destinations[os.path.abspath(dst)] = index
+            for path, analysis in analyses.items():
+                if keys.get(path) is not None:
+                    self.cache[keys[path]] = analysis
+        return {'videos': len(video_files), 'log': lines}
+
+    def destination(self, dst: str, name: Optional[str] = None) -> dict:
+        """Conteúdo de um destino já organizado pelo serviço, respondido pelo índice (sem ler o disco).
+
+        Com `name`, diz em quais pastas há um arquivo com esse nome.
+        """
+        index = self.destinations.get(os.path.abspath(dst))
+        if index is None:
+            raise ValueError(f"Destino ainda não organizado por este serviço: {dst}")
+        if name is not None:
+            return {'name': name, 'matches': index.find(name)}
+        return {'folders': index.summary()}
+
+    def status(self) -> dict:
+        return {
+            'uptime': round(time.time() - self.started, 1),
+            'workers': self.supervisor.workers,
+            'requests': self.requests,
+            'cache_entries': len(self.cache),
+            'cache_hits': self.cache_hits,
+            'destinations': len(self.destinations),
+            'busy': self.lock.locked(),
+        }
+
+    def close(self):
+        self.supervisor.close()
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """Rotas: GET /status, GET /metrics, POST /classify {"paths": [...]}, POST /organize {"src", "dst", "options"},
+    POST /destination {"dst", "name"}.
+
+    Requisições com Origin (navegador) são recusadas; as POST exigem JSON e o
+    token da execução (ver `service_token_path`).
+    """
+
+    def _refuse_browser(self) -> bool:
+        """Recusa requisições de páginas web (que mandam Origin); retorna True se recusou."""
+        if self.headers.get('Origin') is not None:
+            self._reply(403, {'error': 'requisições de navegador não são aceitas'})
+            return True
+        return False
+
+    def do_GET(self):
+        if self._refuse_browser():
+            return
+        if self.path == '/status':
+            self._reply(200, self.server.service.status())
+        elif self.path == '/metrics':
+            _send_metrics(self)
         else:
-            # Arquivo já existe e não deve sobrescrever
-            print(f"Arquivo já existe no destino, ignorando: {src_path.name}")
-            return None
-    
+            self._reply(404, {'error': f'rota desconhecida: {self.path}'})
+
+    def do_POST(self):
+        service = self.server.service
+        if self._refuse_browser():
+            return
+        # Um formulário ou fetch "simples" de outra origem não consegue mandar
+        # application/json sem uma verificação prévia (preflight) que o serviço não atende
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type != 'application/json':
+            self._reply(415, {'error': 'use Content-Type: application/json'})
+            return
+        if not hmac.compare_digest(self.headers.get(SERVICE_TOKEN_HEADER, ''), self.server.token):
+            self._reply(401, {'error': f'token ausente ou inválido (cabeçalho {SERVICE_TOKEN_HEADER})'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if self.path == '/classify':
+                self._reply(200, {'results': service.classify(body.get('paths', []))})
+            elif self.path == '/organize':
+                self._reply(200, service.organize(body['src'], body['dst'], body.get('options')))
+            elif self.path == '/destination':
+                self._reply(200, service.destination(body['dst'], body.get('name')))
+            else:
+                self._reply(404, {'error': f'rota desconhecida: {self.path}'})
+        except (KeyError, ValueError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+        except Exception as e:
+            logging.exception("Erro no serviço")
+            self._reply(500, {'error': str(e)})
+
+    def _reply(self, code: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug("serviço: " + format, *args)
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """Mesmo servidor HTTP, num socket Unix (sem porta TCP aberta)."""
+        daemon_threads = True
+
+def create_service_server(service: OrganizerService, port: int = SERVICE_PORT, socket_path: Optional[str] = None):
+    """Cria o servidor HTTP do serviço e grava o token da execução. Retorna (servidor, endereço)."""
+    if socket_path and hasattr(socketserver, 'UnixStreamServer'):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixHTTPServer(socket_path, _ServiceHandler)
+        address = socket_path
+    else:
+        server = ThreadingHTTPServer(('127.0.0.1', port), _ServiceHandler)
+        # Com a porta 0, o sistema escolhe uma livre
+        port = server.server_address[1]
+        address = f"http://127.0.0.1:{port}"
+        socket_path = None
+    server.service = service
+    server.token_path = service_token_path(port, socket_path)
+    server.token = write_service_token(server.token_path)
+    return server, address
+
+def run_service(port: int = SERVICE_PORT, socket_path: Optional[str] = None, workers: int = 0):
+    """Mantém o programa residente, atendendo requisições até ser interrompido (Ctrl+C).
+
+    Usa o socket Unix `socket_path` quando indicado e suportado pelo sistema;
+    senão, HTTP em 127.0.0.1:`port` (acessível só a partir da própria máquina).
+    """
+    service = OrganizerService(workers)
+    server, address = create_service_server(service, port, socket_path)
+    if hasattr(signal, 'SIGTERM'):
+        # Encerramento pelo gerenciador de serviços: sai do loop e fecha tudo como no Ctrl+C
+        signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    print(f"Serviço pronto em {address} ({service.supervisor.workers} processos de análise). Ctrl+C para encerrar.")
+    print(f"Token das requisições em {server.token_path}")
     try:
-        shutil.copy2(str(src_path), str(dest_path))
-        return dest_path
-    except Exception as e:
-        print(f"Erro ao copiar arquivo {src_path}: {e}")
-        return None
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        try:
+            server.token_path.unlink()
+        except OSError:
+            pass
+        if socket_path and address == socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+# ---------------------------------------------------------------------------
+# Relatórios
+# ---------------------------------------------------------------------------
+
+def subsampling_report(video_files: List[Path], strategies=SUBSAMPLE_STRATEGIES,
+                       widths: Optional[List[int]] = None, log=print) -> List[dict]:
+    """Compara estratégias e larguras de redução de frames com a configuração atual.
+
+    A referência é 'area' na largura configurada (comportamento original). Para
+    cada combinação, mede o tempo total de análise do corpus e a taxa de vídeos
+    que iriam para a mesma pasta que na referência.
+    """
+    original = {k: DEFAULT_CONFIG[k] for k in ('subsample_strategy', 'split_workers', 'resize_width')}
+    # Sem divisão em processos, para os tempos serem comparáveis
+    DEFAULT_CONFIG['split_workers'] = 1
+    widths = widths or [original['resize_width']]
+    combinations = [('area', original['resize_width'])] + [
+        (strategy, width) for width in widths for strategy in strategies
+        if (strategy, width) != ('area', original['resize_width'])
+    ]
+    reference: Dict[Path, str] = {}
+    reference_time = 0.0
+    rows = []
+    try:
+        for strategy, width in combinations:
+            DEFAULT_CONFIG['subsample_strategy'] = strategy
+            DEFAULT_CONFIG['resize_width'] = width
+            log(f"Estratégia {strategy} ({width}px)...")
+            folders = {}
+            start = time.perf_counter()
+            for video_path in video_files:
+                analysis = analyze_video(video_path)
+                colors = select_dominant_colors(analysis.percentages) if analysis else []
+                folders[video_path] = get_destination_folder(colors, Path()).name
+            elapsed = time.perf_counter() - start
+            if not reference:
+                reference, reference_time = folders, elapsed
+            agreement = sum(folders[p] == reference[p] for p in video_files) / max(1, len(video_files))
+            rows.append({
+                'strategy': strategy, 'width': width, 'seconds': elapsed,
+                'speedup': reference_time / elapsed if elapsed > 0 else 0.0,
+                'agreement': agreement * 100,
+                'differences': [p for p in video_files if folders[p] != reference[p]],
+            })
+    finally:
+        DEFAULT_CONFIG.update(original)
+
+    log(f"\n{'Estratégia':<12} {'Largura':>8} {'Tempo (s)':>10} {'Aceleração':>11} {'Mesma pasta':>12}")
+    for row in rows:
+        log(f"{row['strategy']:<12} {row['width']:>8} {row['seconds']:>10.2f} "
+            f"{row['speedup']:>10.2f}x {row['agreement']:>11.1f}%")
+    for row in rows:
+        for path in row['differences']:
+            log(f"  {row['strategy']} ({row['width']}px): {path.name} → pasta diferente da referência")
+    return rows
+
+# Conjunto de referência sintético: (nome, faixas verticais [(matiz, saturação, brilho), proporção], pasta esperada)
+GOLDEN_CLIPS = [
+    ('vermelho', [((0, 255, 220), 1.0)], 'vermelho'),
+    ('laranja', [((18, 255, 220), 1.0)], 'laranja'),
+    ('amarelo', [((30, 255, 220), 1.0)], 'amarelo'),
+    ('verde', [((60, 255, 200), 1.0)], 'verde'),
+    ('azul', [((120, 255, 200), 1.0)], 'azul'),
+    ('violeta', [((150, 255, 200), 1.0)], 'violeta'),
+    ('preto-e-branco', [((0, 0, 10), 0.5), ((0, 0, 250), 0.5)], 'preto-branco'),
+    ('tres-cores', [((0, 255, 220), 1 / 3), ((60, 255, 200), 1 / 3), ((120, 255, 200), 1 / 3)], 'colorido'),
+    ('azul-predominante', [((120, 255, 200), 0.7), ((30, 255, 220), 0.3)], 'azul'),
+    ('cinza', [((0, 0, 128), 1.0)], 'nao-identificado'),
+]
+
+def make_golden_clips(dest_dir: Path, frames=4, size=(640, 360)) -> List[Tuple[Path, str]]:
+    """Gera os vídeos de `GOLDEN_CLIPS` em `dest_dir`. Retorna [(vídeo, pasta esperada)]."""
+    clips = []
+    width, height = size
+    for name, bands, expected in GOLDEN_CLIPS:
+        image = np.zeros((height, width, 3), np.uint8)
+        left = 0
+        for hsv, share in bands:
+            right = min(width, left + round(width * share))
+            image[:, left:right] = cv2.cvtColor(np.uint8([[hsv]]), cv2.COLOR_HSV2BGR)[0, 0]
+            left = right
+        path = dest_dir / f'{name}.avi'
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, size)
+        for _ in range(frames):
+            writer.write(image)
+        writer.release()
+        clips.append((path, expected))
+    return clips
+
+def load_labelled_videos(corpus_dir: Path) -> List[Tuple[Path, str]]:
+    """Vídeos rotulados pela pasta em que estão (ex.: um destino já organizado e revisado)."""
+    return [(path, path.parent.name) for path in discover_videos(corpus_dir)
+            if path.parent.name in REQUIRED_DIRS]
+
+def confusion_matrix(expected: List[str], predicted: List[str]) -> Dict[Tuple[str, str], int]:
+    """Contagem de pares (pasta esperada, pasta obtida)."""
+    matrix: Dict[Tuple[str, str], int] = {}
+    for pair in zip(expected, predicted):
+        matrix[pair] = matrix.get(pair, 0) + 1
+    return matrix
+
+def log_confusion_matrix(matrix: Dict[Tuple[str, str], int], title: str, log=print):
+    """Imprime a matriz: linhas são as pastas esperadas, colunas as obtidas."""
+    folders = [f for f in REQUIRED_DIRS if any(f in pair for pair in matrix)]
+    log(f"  {title}")
+    log(f"  {'':<17}" + ''.join(f"{f[:6]:>7}" for f in folders))
+    for row in folders:
+        counts = [matrix.get((row, col), 0) for col in folders]
+        if any(counts):
+            log(f"  {row:<17}" + ''.join(f"{c or '.':>7}" for c in counts))
+
+# Estratégias que mudam o peso das regiões do frame de propósito ('center' conta
+# o centro em dobro): aparecem no relatório, mas não precisam igualar a referência
+GOLDEN_INFORMATIVE_STRATEGIES = ('center',)
+
+def parse_golden_configs(text: str) -> List[Tuple[str, str]]:
+    """Lê uma lista 'motor:estratégia,...' (ex.: 'numpy:area,numpy:stride')."""
+    configs = []
+    for item in text.split(','):
+        engine, _, strategy = item.strip().partition(':')
+        if engine not in COLOR_ENGINES or strategy not in SUBSAMPLE_STRATEGIES:
+            raise ValueError(f"configuração inválida: {item.strip()!r} (use motor:estratégia)")
+        configs.append((engine, strategy))
+    return configs
+
+def run_golden_set(corpus_dir: Optional[Path] = None, threshold=95.0, log=print,
+                   configs: Optional[List[Tuple[str, str]]] = None) -> bool:
+    """Valida as implementações rápidas contra um conjunto de vídeos rotulados.
+
+    Classifica os clipes sintéticos de `GOLDEN_CLIPS` (e, se indicado, os vídeos
+    rotulados de `corpus_dir`) com cada motor de cores e cada estratégia de
+    redução, e compara as pastas obtidas com os rótulos e com a referência
+    ('python' + 'area'). Retorna False se alguma configuração avaliada ficar
+    abaixo de `threshold` (%) em qualquer das duas comparações.
+
+    `configs` limita a validação às combinações (motor, estratégia) indicadas;
+    sem ela, todas rodam e as de `GOLDEN_INFORMATIVE_STRATEGIES` só são exibidas.
+    """
+    original = {k: DEFAULT_CONFIG[k] for k in ('color_engine', 'subsample_strategy')}
+    if configs is None:
+        configs = [(engine, strategy) for engine in COLOR_ENGINES for strategy in SUBSAMPLE_STRATEGIES]
+        gated = {c for c in configs if c[1] not in GOLDEN_INFORMATIVE_STRATEGIES}
+    else:
+        gated = set(configs)
+    configurations = [('python', 'area')] + [c for c in dict.fromkeys(configs) if c != ('python', 'area')]
+    passed = True
+    with tempfile.TemporaryDirectory(prefix='golden-') as temp_dir:
+        videos = make_golden_clips(Path(temp_dir))
+        if corpus_dir is not None:
+            labelled = load_labelled_videos(corpus_dir)
+            log(f"{len(labelled)} vídeos rotulados em {corpus_dir}")
+            videos += labelled
+        paths = [path for path, _ in videos]
+        labels = [label for _, label in videos]
+        reference = None
+        rows = []
+        try:
+            for engine, strategy in configurations:
+                DEFAULT_CONFIG['color_engine'] = engine
+                DEFAULT_CONFIG['subsample_strategy'] = strategy
+                predicted = []
+                for video_path in paths:
+                    _, colors = process_video(video_path)
+                    predicted.append(get_destination_folder(colors, Path()).name)
+                if reference is None:
+                    reference = predicted
+                accuracy = 100 * sum(p == l for p, l in zip(predicted, labels)) / len(paths)
+                agreement = 100 * sum(p == r for p, r in zip(predicted, reference)) / len(paths)
+                rows.append((engine, strategy, predicted, accuracy, agreement))
+        finally:
+            DEFAULT_CONFIG.update(original)
+
+    log(f"\n{'Motor':<8} {'Estratégia':<12} {'Acertos':>9} {'Igual à ref.':>13}")
+    for engine, strategy, _, accuracy, agreement in rows:
+        below = accuracy < threshold or agreement < threshold
+        if (engine, strategy) not in gated:
+            # A referência roda sempre, mesmo fora da seleção, para a comparação
+            mark = '  (referência)' if (engine, strategy) == ('python', 'area') else '  (informativo)'
+        else:
+            mark = '  ⚠️' if below else ''
+            passed = passed and not below
+        log(f"{engine:<8} {strategy:<12} {accuracy:>8.1f}% {agreement:>12.1f}%{mark}")
+    # A referência é detalhada se errar algum rótulo; as demais, só onde divergem dela
+    for index, (engine, strategy, predicted, accuracy, agreement) in enumerate(rows):
+        if (accuracy if index == 0 else agreement) == 100:
+            continue
+        log(f"\n{engine} + {strategy}:")
+        log_confusion_matrix(confusion_matrix(labels, predicted), 'rótulos × obtido', log)
+        if index > 0:
+            log_confusion_matrix(confusion_matrix(reference, predicted), 'referência × obtido', log)
+        for path, label, expected, folder in zip(paths, labels, reference, predicted):
+            if folder != (label if index == 0 else expected):
+                log(f"    {path.name}: rótulo {label}, referência {expected} → {folder}")
+    log(f"\n{'✅ Todas as configurações' if passed else '⚠️ Há configurações'} "
+        f"{'acima' if passed else 'abaixo'} do limite de {threshold:.1f}%")
+    return passed
 
 class VideoOrganizerApp:
     def __init__(self, root):
@@ -372,6 +3670,11 @@ class VideoOrganizerApp:
             self.dest_dir = tk.StringVar()
             self.overwrite = tk.BooleanVar(value=False)
             self.delete_source = tk.BooleanVar(value=False)
+            self.output_mode = tk.StringVar(value='copy')
+            self.dedup = tk.BooleanVar(value=False)
+            self.verify = tk.BooleanVar(value=False)
+            self.near_duplicates = tk.BooleanVar(value=False)
+            self.schedule = tk.StringVar(value='fifo')
             self.processing = False
             self.inactivity_timer = None
             
@@ -379,7 +3682,8 @@ class VideoOrganizerApp:
             self.config_vars = {
                 'sample_frames': tk.IntVar(value=DEFAULT_CONFIG['sample_frames']),
                 'resize_width': tk.IntVar(value=DEFAULT_CONFIG['resize_width']),
-                'min_color_percent': tk.IntVar(value=DEFAULT_CONFIG['min_color_percent'])
+                'min_color_percent': tk.IntVar(value=DEFAULT_CONFIG['min_color_percent']),
+                'subsample_strategy': tk.StringVar(value=DEFAULT_CONFIG['subsample_strategy'])
             }
             
             # Color variables
@@ -436,16 +3740,61 @@ class VideoOrganizerApp:
             variable=self.delete_source
         ).grid(row=1, column=0, sticky=tk.W, pady=2)
         
+        ttk.Checkbutton(
+            options_frame, 
+            text="Conferir cópias por checksum antes de excluir a origem",
+            variable=self.verify
+        ).grid(row=2, column=0, sticky=tk.W, pady=2)
+        
+        ttk.Checkbutton(
+            options_frame, 
+            text="Ignorar vídeos duplicados (mesmo conteúdo com outro nome)",
+            variable=self.dedup
+        ).grid(row=3, column=0, sticky=tk.W, pady=2)
+        
+        ttk.Checkbutton(
+            options_frame, 
+            text="Analisar só um vídeo por grupo de quase-duplicados (outra resolução/formato)",
+            variable=self.near_duplicates
+        ).grid(row=4, column=0, sticky=tk.W, pady=2)
+        
+        mode_frame = ttk.Frame(options_frame)
+        mode_frame.grid(row=5, column=0, sticky=tk.W, pady=2)
+        ttk.Label(mode_frame, text="Saída:").pack(side=tk.LEFT)
+        for value, text in (('copy', 'Copiar'), ('symlink', 'Link simbólico'), ('hardlink', 'Link físico')):
+            ttk.Radiobutton(mode_frame, text=text, value=value, variable=self.output_mode).pack(side=tk.LEFT, padx=5)
+        
+        schedule_frame = ttk.Frame(options_frame)
+        schedule_frame.grid(row=6, column=0, sticky=tk.W, pady=2)
+        ttk.Label(schedule_frame, text="Ordem:").pack(side=tk.LEFT)
+        for value, text in (('fifo', 'Como encontrados'), ('shortest', 'Menores primeiro'), ('largest', 'Maiores primeiro')):
+            ttk.Radiobutton(schedule_frame, text=text, value=value, variable=self.schedule).pack(side=tk.LEFT, padx=5)
+        
         # Progress
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.grid(row=4, column=0, columnspan=3, pady=10, sticky=tk.EW)
+        progress_frame.columnconfigure(0, weight=1)
+        
         self.progress_var = tk.DoubleVar()
         self.progress = ttk.Progressbar(
-            main_frame, 
+            progress_frame, 
             orient=tk.HORIZONTAL, 
             length=400, 
             mode='determinate',
             variable=self.progress_var
         )
-        self.progress.grid(row=4, column=0, columnspan=3, pady=10, sticky=tk.EW)
+        self.progress.grid(row=0, column=0, sticky=tk.EW)
+        
+        # Arquivos concluídos, vazão e tempo restante estimado
+        self.progress_label = ttk.Label(progress_frame, text="", font=('TkDefaultFont', 8))
+        self.progress_label.grid(row=1, column=0, sticky=tk.W)
+        
+        # Estatísticas da sessão (as mesmas métricas exportadas para o Prometheus)
+        stats_frame = ttk.LabelFrame(progress_frame, text="Estatísticas", padding="5")
+        stats_frame.grid(row=2, column=0, sticky=tk.EW, pady=(5, 0))
+        self.stats_label = ttk.Label(stats_frame, text="", font=('TkDefaultFont', 8), justify=tk.LEFT)
+        self.stats_label.grid(row=0, column=0, sticky=tk.W)
+        self.update_stats()
         
         # Log area
         log_frame = ttk.LabelFrame(main_frame, text="Logs de Processamento", padding="5")
@@ -468,6 +3817,9 @@ class VideoOrganizerApp:
         config_button = ttk.Button(button_frame, text="⚙️ Configurações", command=self.open_config_window)
         config_button.pack(side=tk.LEFT, padx=5)
         
+        self.relink_button = ttk.Button(button_frame, text="🔗 Reclassificar Links", command=self.start_relink)
+        self.relink_button.pack(side=tk.LEFT, padx=5)
+        
         self.start_button = ttk.Button(
             button_frame, 
             text="Iniciar Organização", 
@@ -557,6 +3909,12 @@ class VideoOrganizerApp:
         percent_spinbox = ttk.Spinbox(parent, from_=1, to=100, textvariable=self.config_vars['min_color_percent'], width=15)
         percent_spinbox.grid(row=4, column=1, padx=10, pady=(10, 2), sticky=tk.W)
         ttk.Label(parent, text="Percentual mínimo para considerar uma cor dominante", font=('TkDefaultFont', 9), foreground='gray').grid(row=5, column=0, columnspan=2, sticky=tk.W, padx=10, pady=(0, 10))
+        
+        # Subsampling strategy
+        ttk.Label(parent, text="Redução dos Quadros:").grid(row=6, column=0, sticky=tk.W, padx=10, pady=(10, 2))
+        strategy_combo = ttk.Combobox(parent, values=SUBSAMPLE_STRATEGIES, textvariable=self.config_vars['subsample_strategy'], state='readonly', width=13)
+        strategy_combo.grid(row=6, column=1, padx=10, pady=(10, 2), sticky=tk.W)
+        ttk.Label(parent, text="Como reduzir cada quadro antes da análise (area = padrão, mais preciso)", font=('TkDefaultFont', 9), foreground='gray').grid(row=7, column=0, columnspan=2, sticky=tk.W, padx=10, pady=(0, 10))
     
     def setup_colors_tab(self, parent):
         """Setup colors configuration tab with RGB controls."""
@@ -634,6 +3992,7 @@ class VideoOrganizerApp:
         DEFAULT_CONFIG['sample_frames'] = self.config_vars['sample_frames'].get()
         DEFAULT_CONFIG['resize_width'] = self.config_vars['resize_width'].get()
         DEFAULT_CONFIG['min_color_percent'] = self.config_vars['min_color_percent'].get()
+        DEFAULT_CONFIG['subsample_strategy'] = self.config_vars['subsample_strategy'].get()
         
         # Convert RGB to HSV and update color ranges
         new_color_ranges = {}
@@ -659,6 +4018,7 @@ class VideoOrganizerApp:
             self.config_vars['sample_frames'].set(10)
             self.config_vars['resize_width'].set(320)
             self.config_vars['min_color_percent'].set(20)
+            self.config_vars['subsample_strategy'].set('area')
             
             # Reset colors
             self.setup_color_vars()
@@ -720,10 +4080,7 @@ class VideoOrganizerApp:
         dest_dir.mkdir(parents=True, exist_ok=True)
         
         # Find all video files
-        video_files = []
-        for ext in DEFAULT_CONFIG['supported_formats']:
-            video_files.extend(list(src_dir.rglob(f"*{ext}")))
-            video_files.extend(list(src_dir.rglob(f"*{ext.upper()}")))
+        video_files = discover_videos(src_dir)
         
         if not video_files:
             messagebox.showinfo("Aviso", f"Nenhum arquivo de vídeo encontrado em {src_dir}")
@@ -742,74 +4099,70 @@ class VideoOrganizerApp:
         ).start()
     
     def process_videos(self, video_files, dest_dir, overwrite):
-        # Criar pastas necessárias
-        required_dirs = [
-            'vermelho', 'laranja', 'amarelo', 'verde',
-            'azul', 'violeta', 'preto-branco',
-            'colorido', 'nao-identificado'
-        ]
-    
-        # Criar todas as pastas necessárias
-        for dir_name in required_dirs:
-            (dest_dir / dir_name).mkdir(parents=True, exist_ok=True)
-            
-        total_files = len(video_files)
-        processed = 0
-       
-        # Process each video
-        for video_path in video_files:
-            try:
-                self.log(f"Processando: {video_path.name}")
-                
-                # Update progress
-                processed += 1
-                progress = (processed / total_files) * 100
-                self.progress_var.set(progress)
-                self.root.title(f"Organizador de Fundos ProPresenter - {progress:.1f}%")
-                
-                # Process video
-                _, dominant_colors = process_video(video_path)
-                
-                # Get destination folder
-                dest_folder = get_destination_folder(dominant_colors, dest_dir)
-                
-                # Create combination folder if it doesn't exist
-                dest_folder.mkdir(exist_ok=True)
-                
-                # Copy file
-                dest_path = copy_video(video_path, dest_folder, overwrite)
-                
-                if dest_path is None:
-                    # Arquivo não foi copiado (já existe ou erro)
-                    self.log(f"  ⚠️ Arquivo não copiado: {video_path.name}")
-                    continue
-                
-                # Delete source file if option is enabled
-                if self.delete_source.get():
-                    try:
-                        video_path.unlink()
-                        self.log(f"  ✅ Arquivo original excluído: {video_path.name}")
-                    except Exception as delete_error:
-                        self.log(f"  ⚠️ Erro ao excluir original: {str(delete_error)}")
-                
-                # Log results
-                colors_str = ", ".join(f"{c[0]} ({c[1]:.1f}%)" for c in dominant_colors) if dominant_colors else "não identificado"
-                self.log(f"  → {colors_str} → {dest_path.relative_to(dest_dir)}")
-                
-            except Exception as e:
-                self.log(f"Erro ao processar {video_path.name}: {str(e)}")
-                # Try to copy to nao-identificado on error
-                try:
-                    error_dest = dest_dir / 'nao-identificado'
-                    error_dest.mkdir(exist_ok=True)
-                    copy_video(video_path, error_dest, overwrite)
-                    self.log(f"  → Copiado para: {error_dest.relative_to(dest_dir)}")
-                except Exception as copy_error:
-                    self.log(f"  → Falha ao copiar: {str(copy_error)}")
+        def update_progress(estimator, video_path):
+            progress = estimator.fraction() * 100
+            self.progress_var.set(progress)
+            self.progress_label.config(text=estimator.summary())
+            self.root.title(f"Organizador de Fundos ProPresenter - {progress:.1f}%")
+        
+        options = RunOptions(
+            overwrite=overwrite,
+            delete_source=self.delete_source.get(),
+            verify=self.verify.get(),
+            output_mode=self.output_mode.get(),
+            schedule=self.schedule.get(),
+            dedup=self.dedup.get(),
+            near_duplicates='representative' if self.near_duplicates.get() else 'off'
+        )
+        organize_videos(video_files, dest_dir, options, log=self.log, on_progress=update_progress)
         
         # Update UI when done
         self.root.after(0, self.processing_complete)
     
+    def update_stats(self):
+        """Atualiza o painel de estatísticas a cada segundo."""
+        files = METRICS.total('organizador_files_total')
+        errors = METRICS.total('organizador_errors_total')
+        copied_gb = METRICS.total('organizador_bytes_copied_total') / 1024 ** 3
+        per_folder = METRICS.by_label('organizador_files_total', 'folder', result='ok')
+        folders = " · ".join(f"{name} {count:.0f}" for name, count in sorted(per_folder.items())) or "—"
+        self.stats_label.config(text=(
+            f"Vídeos: {files:.0f} • Erros: {errors:.0f} • "
+            f"Quadros: {METRICS.total('organizador_frames_decoded_total'):.0f} • "
+            f"Copiado: {copied_gb:.2f} GB • "
+            f"Reaproveitados: {METRICS.total('organizador_cache_hits_total'):.0f}\n"
+            f"Tempo médio: análise {METRICS.mean('organizador_stage_seconds', stage='analysis'):.1f}s, "
+            f"cópia {METRICS.mean('organizador_stage_seconds', stage='copy'):.1f}s\n"
+            f"Por pasta: {folders}"
+        ))
+        self.root.after(1000, self.update_stats)
+    
+    def start_relink(self):
+        """Reclassifica o catálogo da pasta de destino com a configuração atual."""
+        dest_dir = Path(self.dest_dir.get())
+        if not self.dest_dir.get() or not (dest_dir / Catalog.FILE_NAME).exists():
+            messagebox.showerror("Erro", "A pasta de destino não tem catálogo (organize antes em modo de links).")
+            return
+        
+        self.processing = True
+        self.start_button.config(state=tk.DISABLED)
+        self.relink_button.config(state=tk.DISABLED)
+        self.log(f"Reclassificando links em {dest_dir}...")
+        
+        import threading
+        threading.Thread(target=self.relink_videos, args=(dest_dir,), daemon=True).start()
+    
+    def relink_videos(self, dest_dir):
+        moved = relink_catalog(dest_dir, log=self.log)
+        self.log(f"Reclassificação concluída! {moved} links refeitos.")
+        self.root.after(0, self.relink_complete)
+    
+    def relink_complete(self):
+        self.processing = False
+        self.start_button.config(state=tk.NORMAL)
+        self.relink_button.config(state=tk.NORMAL)
+        messagebox.showinfo("Concluído", "Reclassificação finalizada!")
+    
     def adjust_source_directory(self):
         """Ajusta o campo de pasta origem para remover a última subpasta."""
         current_path = self.src_dir.get()
@@ -911,12 +4264,170 @@ def parse_arguments():
     parser.add_argument('--dst', type=str, help='Pasta de destino para os vídeos organizados')
     parser.add_argument('--overwrite', action='store_true', help='Sobrescrever arquivos existentes')
     parser.add_argument('--delete-source', action='store_true', help='Excluir arquivos da pasta de origem após cópia')
+    parser.add_argument('--verify', action='store_true',
+                        help='Conferir cada cópia por checksum (relendo o destino) antes de excluir a origem')
+    parser.add_argument('--prefetch', action='store_true',
+                        help='Adiantar a leitura dos próximos vídeos (origem em pasta de rede)')
+    parser.add_argument('--staging-dir', type=str,
+                        help='Pasta local (ex.: SSD) onde adiantar cópias da origem; análise e cópia leem dela')
+    parser.add_argument('--staging-max-gb', type=float, default=20.0,
+                        help='Com --prefetch/--staging-dir: volume máximo adiantado em GB (padrão: 20)')
+    # Métricas para monitoramento (Prometheus)
+    parser.add_argument('--metrics-file', type=str,
+                        help='Gravar as métricas neste arquivo .prom (ex.: pasta do coletor textfile do node_exporter)')
+    parser.add_argument('--metrics-port', type=int, help='Publicar as métricas em http://127.0.0.1:PORTA/metrics')
+    parser.add_argument('--metrics-interval', type=float, default=15.0,
+                        help='Com --metrics-file: intervalo de atualização em segundos (padrão: 15)')
+    parser.add_argument('--no-resume', action='store_true', help='Ignorar o diário da execução anterior e reprocessar tudo')
+    parser.add_argument('--output-mode', choices=OUTPUT_MODES, default='copy',
+                        help='copy: copia os vídeos; symlink/hardlink: cria links e um catálogo no destino')
+    parser.add_argument('--dedup', action='store_true',
+                        help='Detectar vídeos com conteúdo idêntico e processar só uma cópia de cada')
+    parser.add_argument('--near-duplicates', choices=('off', 'report', 'representative'), default='off',
+                        help='Detectar quase-duplicados (mesmo vídeo em outra resolução/formato); '
+                             'representative analisa só um vídeo por grupo')
+    parser.add_argument('--no-isolation', action='store_true',
+                        help='Analisar no próprio processo (sem processos supervisionados nem tempo limite)')
+    parser.add_argument('--analysis-workers', type=int, default=0,
+                        help='Processos de análise em paralelo (0 = número de CPUs)')
+    parser.add_argument('--schedule', choices=SCHEDULES, default='fifo',
+                        help='Ordem da fila: shortest mostra progresso cedo, largest reduz o tempo total em paralelo')
+    parser.add_argument('--no-probe', action='store_true',
+                        help='Não ler os metadados dos contêineres antes da análise')
+    parser.add_argument('--subsample', choices=SUBSAMPLE_STRATEGIES,
+                        help='Estratégia de redução dos frames antes da análise de cores (padrão: area)')
+    parser.add_argument('--subsample-report', action='store_true',
+                        help='Comparar velocidade e concordância das estratégias de redução nos vídeos de --src')
+    parser.add_argument('--report-widths', type=str,
+                        help='Com --subsample-report: larguras a testar, separadas por vírgula (ex.: 320,160,80)')
+    parser.add_argument('--color-engine', choices=tuple(COLOR_ENGINES),
+                        help='Implementação da classificação de pixels (padrão: python, a referência)')
+    parser.add_argument('--golden', nargs='?', const='', metavar='PASTA',
+                        help='Validar motores e estratégias com clipes sintéticos e, opcionalmente, '
+                             'uma pasta rotulada (subpastas com o nome da cor, como um destino organizado)')
+    parser.add_argument('--golden-threshold', type=float, default=95.0,
+                        help='Com --golden: taxa mínima de acerto (%%) para terminar com sucesso')
+    parser.add_argument('--golden-configs', type=str,
+                        help='Com --golden: combinações a validar, no formato motor:estratégia separadas '
+                             'por vírgula (padrão: todas, exceto center, que é só informativa)')
+    parser.add_argument('--relink', action='store_true',
+                        help='Reclassificar o catálogo de --dst com a configuração atual, só refazendo os links')
+    parser.add_argument('--memory-budget-mb', type=int,
+                        help='Memória para as análises simultâneas, em MB (padrão: 60%% da memória física)')
+    parser.add_argument('--min-color-percent', type=float,
+                        help=f"Percentual mínimo para uma cor ser dominante (padrão: {DEFAULT_CONFIG['min_color_percent']})")
+    # Modo serviço
+    parser.add_argument('--serve', action='store_true',
+                        help='Manter o programa residente e atender requisições locais (ver organizer_client.py)')
+    parser.add_argument('--port', type=int, default=SERVICE_PORT, help='Com --serve: porta HTTP em 127.0.0.1')
+    parser.add_argument('--socket', type=str, help='Com --serve: usar este socket Unix em vez da porta HTTP')
+    # Modo distribuído (coordenador/worker)
+    parser.add_argument('--queue', type=str, help='Arquivo SQLite da fila compartilhada (modo distribuído)')
+    parser.add_argument('--coordinator', action='store_true', help='Enumerar --src e gravar os jobs na fila --queue')
+    parser.add_argument('--worker', action='store_true', help='Processar jobs da fila --queue até ela esvaziar')
+    parser.add_argument('--workers', type=int, default=0, help='Com --coordinator: iniciar N workers locais após enfileirar')
+    parser.add_argument('--batch-size', type=int, default=4, help='Jobs reservados por vez por cada worker')
+    parser.add_argument('--lease', type=float, default=600.0, help='Prazo da reserva em segundos antes de outro worker assumir')
     return parser.parse_args()
 
+def build_run_options(args) -> RunOptions:
+    """Monta as opções de execução a partir dos argumentos da linha de comando."""
+    return RunOptions(
+        overwrite=args.overwrite,
+        delete_source=args.delete_source,
+        resume=not args.no_resume,
+        output_mode=args.output_mode,
+        dedup=args.dedup,
+        near_duplicates=args.near_duplicates,
+        isolation=not args.no_isolation,
+        analysis_workers=args.analysis_workers,
+        schedule=args.schedule,
+        probe=not args.no_probe,
+        verify=args.verify,
+        prefetch=args.prefetch,
+        staging_dir=args.staging_dir,
+        staging_max_gb=args.staging_max_gb
+    )
+
 def main():
     try:
         args = parse_arguments()
         
+        if args.subsample:
+            DEFAULT_CONFIG['subsample_strategy'] = args.subsample
+        if args.color_engine:
+            DEFAULT_CONFIG['color_engine'] = args.color_engine
+        if args.min_color_percent is not None:
+            DEFAULT_CONFIG['min_color_percent'] = args.min_color_percent
+        if args.memory_budget_mb is not None:
+            DEFAULT_CONFIG['memory_budget_mb'] = args.memory_budget_mb
+        
+        if args.golden is not None:
+            corpus_dir = Path(args.golden) if args.golden else None
+            if corpus_dir is not None and not corpus_dir.is_dir():
+                print(f"Erro: A pasta rotulada não existe: {corpus_dir}")
+                sys.exit(2)
+            try:
+                configs = parse_golden_configs(args.golden_configs) if args.golden_configs else None
+            except ValueError as e:
+                print(f"Erro: {e}")
+                sys.exit(2)
+            sys.exit(0 if run_golden_set(corpus_dir, args.golden_threshold, configs=configs) else 1)
+        
+        if args.subsample_report:
+            if not args.src or not Path(args.src).is_dir():
+                print("Erro: --src deve apontar para a pasta com os vídeos de teste")
+                return
+            widths = [int(w) for w in args.report_widths.split(',')] if args.report_widths else None
+            subsampling_report(discover_videos(Path(args.src)), widths=widths)
+            return
+        
+        if args.metrics_file or args.metrics_port:
+            exporter = MetricsExporter(Path(args.metrics_file) if args.metrics_file else None,
+                                       args.metrics_port, args.metrics_interval)
+            # Grava os valores finais ao sair, qualquer que seja o modo
+            atexit.register(exporter.close)
+        
+        if args.serve:
+            setup_logging()
+            run_service(args.port, args.socket, args.analysis_workers)
+            return
+        
+        # Reclassificação do catálogo (modo sem cópia)
+        if args.relink:
+            if not args.dst:
+                print("Erro: --dst é obrigatório para --relink")
+                return
+            moved = relink_catalog(Path(args.dst))
+            print(f"\nReclassificação concluída! {moved} links refeitos.")
+            return
+        
+        # Modo distribuído: worker consome a fila, coordenador a alimenta
+        if args.worker or args.coordinator:
+            if not args.queue:
+                print("Erro: --queue é obrigatório no modo distribuído")
+                return
+            log_file = setup_logging()
+            if log_file:
+                print(f"Logs serão salvos em: {log_file}")
+            queue_path = Path(args.queue)
+            if args.worker:
+                run_worker(queue_path, batch_size=args.batch_size, lease_seconds=args.lease)
+                return
+            if not args.src or not args.dst:
+                print("Erro: --src e --dst são obrigatórios para o coordenador")
+                return
+            src_dir = Path(args.src)
+            if not src_dir.exists() or not src_dir.is_dir():
+                print(f"Erro: A pasta de origem não existe: {src_dir}")
+                return
+            Path(args.dst).mkdir(parents=True, exist_ok=True)
+            run_coordinator(src_dir, Path(args.dst), queue_path, build_run_options(args))
+            if args.workers > 0:
+                stats = run_local_workers(queue_path, args.workers, args.batch_size, args.lease)
+                print(f"\nProcessamento concluído! {stats}")
+            return
+        
         # Configurar logging será feito na inicialização da UI para o modo GUI
         # ou aqui para o modo linha de comando
         if hasattr(args, 'src') and hasattr(args, 'dst') and args.src and args.dst:
@@ -937,10 +4448,7 @@ def main():
                 dest_dir.mkdir(parents=True, exist_ok=True)
             
             # Find all video files
-            video_files = []
-            for ext in DEFAULT_CONFIG['supported_formats']:
-                video_files.extend(list(src_dir.rglob(f"*{ext}")))
-                video_files.extend(list(src_dir.rglob(f"*{ext.upper()}")))
+            video_files = discover_videos(src_dir)
             
             if not video_files:
                 print(f"Nenhum arquivo de vídeo encontrado em {src_dir}")
@@ -948,60 +4456,18 @@ def main():
             
             print(f"Processando {len(video_files)} vídeos...")
             
-            # Create required directories
-            required_dirs = [
-                'vermelho', 'laranja', 'amarelo', 'verde',
-                'azul', 'violeta', 'preto-branco',
-                'colorido', 'nao-identificado'
-            ]
-            
-            for dir_name in required_dirs:
-                (dest_dir / dir_name).mkdir(exist_ok=True)
-            
-            # Process each video
-            for i, video_path in enumerate(video_files, 1):
-                try:
-                    print(f"[{i}/{len(video_files)}] Processando: {video_path.name}")
-                    
-                    # Process video
-                    _, dominant_colors = process_video(video_path)
-                    
-                    # Get destination folder
-                    dest_folder = get_destination_folder(dominant_colors, dest_dir)
-                    
-                    # Create combination folder if it doesn't exist
-                    dest_folder.mkdir(exist_ok=True)
-                    
-                    # Copy file
-                    dest_path = copy_video(video_path, dest_folder, args.overwrite)
-                    
-                    if dest_path is None:
-                        # Arquivo não foi copiado (já existe ou erro)
-                        print(f"  ⚠️ Arquivo não copiado: {video_path.name}")
-                        continue
-                    
-                    # Delete source file if option is enabled
-                    if args.delete_source:
-                        try:
-                            video_path.unlink()
-                            print(f"  ✅ Arquivo original excluído: {video_path.name}")
-                        except Exception as delete_error:
-                            print(f"  ⚠️ Erro ao excluir original: {str(delete_error)}")
-                    
-                    # Print results
-                    colors_str = ", ".join(f"{c[0]} ({c[1]:.1f}%)" for c in dominant_colors) if dominant_colors else "não identificado"
-                    print(f"  → {colors_str} → {dest_path.relative_to(dest_dir)}")
-                    
-                except Exception as e:
-                    print(f"Erro ao processar {video_path.name}: {str(e)}")
-                    # Try to copy to nao-identificado on error
-                    try:
-                        error_dest = dest_dir / 'nao-identificado'
-                        error_dest.mkdir(exist_ok=True)
-                        copy_video(video_path, error_dest, args.overwrite)
-                        print(f"  → Copiado para: {error_dest.relative_to(dest_dir)}")
-                    except Exception as copy_error:
-                        print(f"  → Falha ao copiar: {str(copy_error)}")
+            # Barra de progresso com ETA pela vazão real; os logs passam por tqdm.write.
+            # A barra segue o progresso ponderado pelo custo (0-100), e não a contagem
+            # de arquivos: a lista pode encolher depois da detecção de duplicados
+            with tqdm(total=100, dynamic_ncols=True, bar_format='{percentage:3.0f}%|{bar}| {desc}') as bar:
+                def update_progress(estimator, video_path):
+                    bar.n = round(estimator.fraction() * 100, 1)
+                    bar.set_description_str(estimator.summary())
+                
+                organize_videos(
+                    video_files, dest_dir, build_run_options(args),
+                    log=tqdm.write, on_progress=update_progress
+                )
             
             print("\nProcessamento concluído!")
         else:
@@ -1027,4 +4493,6 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    # Necessário para os processos de worker no executável do PyInstaller
+    multiprocessing.freeze_support()
     main()
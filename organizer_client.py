@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente do modo serviço do Organizador de Fundos
+------------------------------------------------
+Envia requisições ao programa residente (`organize_backgrounds.py --serve`).
+Usa só a biblioteca padrão, então inicia em milissegundos: o custo de carregar
+OpenCV/NumPy e iniciar os processos de análise fica no serviço.
+
+Exemplos:
+    python organizer_client.py status
+    python organizer_client.py classify video1.mp4 video2.mov
+    python organizer_client.py organize --src "D:\\Fundos" --dst "D:\\Organizados" --delete-source
+    python organizer_client.py destination --dst "D:\\Organizados" video1.mp4
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import http.client
+from pathlib import Path
+from typing import List, Optional
+
+DEFAULT_PORT = 8765
+TOKEN_HEADER = 'X-Organizador-Token'
+
+def token_path(port: int = DEFAULT_PORT, socket_path: Optional[str] = None) -> Path:
+    """Arquivo onde o serviço grava o token da execução (o mesmo de `service_token_path`)."""
+    if socket_path:
+        return Path(socket_path + '.token')
+    return Path.home() / '.organizador-fundos' / f'servico-{port}.token'
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """Conexão HTTP por socket Unix."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+def request(method: str, path: str, payload: Optional[dict] = None, port: int = DEFAULT_PORT,
+            socket_path: Optional[str] = None, timeout: Optional[float] = None) -> dict:
+    """Envia uma requisição ao serviço e retorna a resposta JSON.
+
+    Gera RuntimeError com a mensagem do serviço se a resposta não for 200.
+    O token é lido do arquivo gravado pelo serviço ao iniciar.
+    """
+    try:
+        token = token_path(port, socket_path).read_text().strip()
+    except OSError:
+        raise RuntimeError(f"token do serviço não encontrado em {token_path(port, socket_path)}; o serviço está rodando?")
+    if socket_path:
+        conn = UnixHTTPConnection(socket_path, timeout)
+    else:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {TOKEN_HEADER: token}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = json.loads(response.read() or b'{}')
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise RuntimeError(data.get('error', f'HTTP {response.status}'))
+    return data
+
+def status(**connection) -> dict:
+    return request('GET', '/status', **connection)
+
+def classify(paths: List[str], **connection) -> List[dict]:
+    """Classifica os vídeos; os caminhos são enviados como absolutos."""
+    paths = [os.path.abspath(p) for p in paths]
+    return request('POST', '/classify', {'paths': paths}, **connection)['results']
+
+def organize(src: str, dst: str, options: Optional[dict] = None, **connection) -> dict:
+    """Organiza a pasta `src` em `dst`; `options` segue os campos de RunOptions."""
+    payload = {'src': os.path.abspath(src), 'dst': os.path.abspath(dst), 'options': options or {}}
+    return request('POST', '/organize', payload, **connection)
+
+def destination(dst: str, name: Optional[str] = None, **connection) -> dict:
+    """Conteúdo do destino (ou onde está `name`), pelo índice do serviço, sem ler o disco."""
+    return request('POST', '/destination', {'dst': os.path.abspath(dst), 'name': name}, **connection)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Cliente do modo serviço do Organizador de Fundos.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Porta do serviço em 127.0.0.1')
+    parser.add_argument('--socket', type=str, help='Socket Unix do serviço (em vez da porta)')
+    parser.add_argument('--json', action='store_true', help='Imprimir a resposta JSON completa')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='Estado do serviço')
+    classify_parser = commands.add_parser('classify', help='Classificar vídeos sem copiá-los')
+    classify_parser.add_argument('paths', nargs='+', help='Arquivos de vídeo')
+    organize_parser = commands.add_parser('organize', help='Organizar uma pasta')
+    organize_parser.add_argument('--src', required=True, help='Pasta de origem dos vídeos')
+    organize_parser.add_argument('--dst', required=True, help='Pasta de destino')
+    organize_parser.add_argument('--overwrite', action='store_true', help='Sobrescrever arquivos existentes')
+    organize_parser.add_argument('--delete-source', action='store_true', help='Excluir os originais após a cópia')
+    organize_parser.add_argument('--verify', action='store_true', help='Conferir as cópias por checksum')
+    organize_parser.add_argument('--output-mode', choices=('copy', 'symlink', 'hardlink'), default='copy')
+    destination_parser = commands.add_parser('destination', help='Consultar um destino já organizado pelo serviço')
+    destination_parser.add_argument('--dst', required=True, help='Pasta de destino')
+    destination_parser.add_argument('name', nargs='?', help='Nome de arquivo a procurar nas pastas de cor')
+    args = parser.parse_args()
+
+    connection = {'port': args.port, 'socket_path': args.socket}
+    try:
+        if args.command == 'status':
+            result = status(**connection)
+            if not args.json:
+                for key, value in result.items():
+                    print(f"{key}: {value}")
+        elif args.command == 'classify':
+            result = classify(args.paths, **connection)
+            if not args.json:
+                for item in result:
+                    if item.get('folder') is None:
+                        print(f"{item['path']}: ⚠️ {item['error']}")
+                        continue
+                    colors = ", ".join(f"{c} ({p:.1f}%)" for c, p in item['colors']) or "não identificado"
+                    warning = f"  ⚠️ {item['error']}" if item.get('error') else ""
+                    print(f"{item['path']}: {colors} → {item['folder']}{warning}")
+        elif args.command == 'destination':
+            result = destination(args.dst, args.name, **connection)
+            if not args.json:
+                if args.name:
+                    for match in result['matches']:
+                        print(f"{match['folder']}/{args.name}: {match['size']} bytes")
+                    if not result['matches']:
+                        print(f"{args.name}: não está no destino")
+                else:
+                    for folder, info in result['folders'].items():
+                        print(f"{folder}: {info['files']} arquivos, {info['bytes'] / (1024 * 1024):.1f} MB")
+        else:
+            options = {
+                'overwrite': args.overwrite, 'delete_source': args.delete_source,
+                'verify': args.verify, 'output_mode': args.output_mode,
+            }
+            result = organize(args.src, args.dst, options, **connection)
+            if not args.json:
+                print("\n".join(result['log']))
+                print(f"\nProcessamento concluído! {result['videos']} vídeos.")
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False, indent=1))
+    except (OSError, RuntimeError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Duplicados por conteúdo: tamanho → hash parcial → hash completo."""
+
+import os
+
+import organize_backgrounds as ob
+
+
+def make_file(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def test_identical_content_under_other_names_is_grouped(tmp_path):
+    data = os.urandom(3 * ob.PARTIAL_HASH_BYTES)
+    first = make_file(tmp_path / 'a' / 'ceu.mp4', data)
+    other = make_file(tmp_path / 'b' / 'mar.mp4', os.urandom(len(data)))
+    copy = make_file(tmp_path / 'b' / 'ceu-copia.mp4', data)
+    empty = make_file(tmp_path / 'vazio.mp4', b'')
+
+    unique, duplicates = ob.find_duplicates([first, other, copy, empty])
+
+    assert unique == [first, other, empty]
+    assert duplicates == {first: [copy]}
+
+
+def test_difference_in_the_middle_is_caught_by_the_full_hash(tmp_path):
+    data = bytearray(os.urandom(3 * ob.PARTIAL_HASH_BYTES))
+    first = make_file(tmp_path / 'ceu.mp4', bytes(data))
+    data[len(data) // 2] ^= 0xFF  # Fora do início e do fim lidos pelo hash parcial
+    changed = make_file(tmp_path / 'ceu-editado.mp4', bytes(data))
+
+    assert ob.partial_file_hash(first) == ob.partial_file_hash(changed)
+    assert ob.find_duplicates([first, changed]) == ([first, changed], {})
+
+
+def test_duplicates_are_analyzed_and_copied_once(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    path, expected = ob.make_golden_clips(src)[0]
+    copy = make_file(src / 'sub' / 'copia.avi', path.read_bytes())
+    messages = []
+
+    ob.organize_videos([path, copy], dst, ob.RunOptions(resume=False, dedup=True, analysis_workers=1),
+                       log=messages.append)
+
+    assert [p.name for p in (dst / expected).iterdir()] == [path.name]
+    assert sum('Processando' in message for message in messages) == 1
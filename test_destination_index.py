@@ -0,0 +1,80 @@
+"""Índice do destino: conflitos de nome e limpeza de cópias temporárias."""
+
+import os
+import time
+
+import organize_backgrounds as ob
+
+
+def make_file(path, data=b'video'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_scan_creates_folders_and_indexes_files(tmp_path):
+    make_file(tmp_path / 'dst' / 'azul' / 'ceu.mp4', b'12345')
+
+    index = ob.DestinationIndex.scan(tmp_path / 'dst')
+
+    assert all((tmp_path / 'dst' / name).is_dir() for name in ob.REQUIRED_DIRS)
+    assert index.contains(tmp_path / 'dst' / 'azul' / 'ceu.mp4')
+    assert index.stat(tmp_path / 'dst' / 'azul' / 'ceu.mp4')[0] == 5
+    assert index.find('ceu.mp4') == [{'folder': 'azul', 'size': 5, 'mtime_ns': index.stat(
+        tmp_path / 'dst' / 'azul' / 'ceu.mp4')[1]}]
+    assert index.summary()['azul'] == {'files': 1, 'bytes': 5}
+
+
+def test_copy_is_recorded_and_conflicts_are_skipped(tmp_path):
+    src = make_file(tmp_path / 'src' / 'ceu.mp4', b'original')
+    index = ob.DestinationIndex.scan(tmp_path / 'dst')
+    folder = tmp_path / 'dst' / 'azul'
+
+    assert ob.copy_video(src, folder, index=index) == folder / 'ceu.mp4'
+    assert index.contains(folder / 'ceu.mp4')
+    src.write_bytes(b'changed')
+    assert ob.copy_video(src, folder, index=index) is None
+    assert (folder / 'ceu.mp4').read_bytes() == b'original'
+
+
+def test_case_insensitive_destination_does_not_overwrite(tmp_path):
+    existing = make_file(tmp_path / 'dst' / 'azul' / 'Ceu.mp4', b'existing')
+    src = make_file(tmp_path / 'src' / 'ceu.mp4', b'incoming')
+    # Simula NTFS/APFS: o índice compara nomes sem diferenciar maiúsculas
+    index = ob.DestinationIndex(tmp_path / 'dst', case_insensitive=True)
+    index.add_folder(tmp_path / 'dst' / 'azul')
+
+    assert index.contains(tmp_path / 'dst' / 'azul' / 'CEU.MP4')
+    assert ob.copy_video(src, tmp_path / 'dst' / 'azul', index=index) is None
+    assert ob.link_video(src, tmp_path / 'dst' / 'azul', index=index) is None
+    assert existing.read_bytes() == b'existing'
+
+
+def test_case_probe_matches_the_filesystem(tmp_path):
+    lower = tmp_path / 'probe'
+    lower.write_text('x')
+    expected = (tmp_path / 'PROBE').exists()
+    assert ob.is_case_insensitive(tmp_path) == expected
+    assert [p.name for p in tmp_path.iterdir()] == ['probe']
+
+
+def test_only_stale_part_files_are_removed(tmp_path):
+    folder = tmp_path / 'dst' / 'azul'
+    dead_pid = 2 ** 22 + 1  # Acima do pid_max padrão
+    stale = make_file(folder / f'.velho.mp4.{dead_pid}.part')
+    age(stale, ob.STALE_PART_SECONDS + 60)
+    in_progress = make_file(folder / f'.novo.mp4.{dead_pid}.part')
+    other_run = make_file(folder / f'.outro.mp4.{os.getppid()}.part')
+    age(other_run, ob.STALE_PART_SECONDS + 60)
+
+    index = ob.DestinationIndex.scan(tmp_path / 'dst')
+
+    assert not stale.exists()
+    assert in_progress.exists()
+    assert other_run.exists()
+    assert index.summary()['azul']['files'] == 0
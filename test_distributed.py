@@ -0,0 +1,139 @@
+"""Modo distribuído: vários workers locais contra uma fila SQLite numa pasta temporária."""
+
+import multiprocessing
+import os
+from pathlib import Path
+
+import pytest
+
+import organize_backgrounds as ob
+
+
+def start_workers(queue_path, count):
+    processes = [
+        multiprocessing.Process(target=ob.run_worker, args=(queue_path, f'w{i}', 2, 30.0, 0.2))
+        for i in range(count)
+    ]
+    for proc in processes:
+        proc.start()
+    for proc in processes:
+        proc.join(120)
+        assert proc.exitcode == 0
+    queue = ob.JobQueue(queue_path)
+    try:
+        return {path: (status, attempts) for path, status, attempts in
+                queue.conn.execute("SELECT path, status, attempts FROM jobs")}
+    finally:
+        queue.close()
+
+
+def placed_files(dest_dir):
+    return sorted(p.name for name in ob.REQUIRED_DIRS for p in (dest_dir / name).iterdir())
+
+
+@pytest.fixture
+def golden_queue(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    clips = ob.make_golden_clips(src)
+    return src, dst, tmp_path / 'fila.db', clips
+
+
+@pytest.fixture
+def fail_once(tmp_path, monkeypatch):
+    """A primeira tentativa de cada arquivo marcado falha (os workers são forks e herdam o patch)."""
+    original = ob.organize_video
+    markers = tmp_path / 'falhas'
+    markers.mkdir()
+
+    def organize_video(video_path, *args, **kwargs):
+        marker = markers / video_path.name
+        if video_path.stem in ('azul', 'verde') and not marker.exists():
+            marker.touch()
+            raise RuntimeError('falha simulada')
+        return original(video_path, *args, **kwargs)
+
+    monkeypatch.setattr(ob, 'organize_video', organize_video)
+
+
+@pytest.mark.parametrize('isolation', [False, True])
+def test_each_file_is_placed_once_and_failures_are_retried(golden_queue, fail_once, isolation):
+    src, dst, queue_path, clips = golden_queue
+    ob.run_coordinator(src, dst, queue_path, ob.RunOptions(isolation=isolation, analysis_workers=1))
+
+    jobs = start_workers(queue_path, 3)
+
+    assert placed_files(dst) == sorted(path.name for path, _ in clips)
+    for path, expected in clips:
+        assert (dst / expected / path.name).exists()
+    assert all(status == 'done' for status, _ in jobs.values())
+    assert jobs[str(src.absolute() / 'azul.avi')] == ('done', 2)
+    assert jobs[str(src.absolute() / 'vermelho.avi')] == ('done', 1)
+
+
+def test_failed_copy_goes_back_to_the_queue(golden_queue, monkeypatch):
+    src, dst, queue_path, clips = golden_queue
+    ob.run_coordinator(src, dst, queue_path, ob.RunOptions(isolation=False))
+    original = ob.copy_video
+    failed = []
+
+    def copy_video(src_path, *args, **kwargs):
+        if src_path.stem == 'amarelo' and not failed:
+            failed.append(src_path)
+            return None  # Erro de E/S: nada gravado no destino
+        return original(src_path, *args, **kwargs)
+
+    monkeypatch.setattr(ob, 'copy_video', copy_video)
+    ob.run_worker(queue_path, 'w0', batch_size=4, lease_seconds=30.0, poll_interval=0.2)
+
+    jobs = start_workers(queue_path, 1)
+    assert jobs[str(src.absolute() / 'amarelo.avi')] == ('done', 2)
+    assert (dst / 'amarelo' / 'amarelo.avi').exists()
+
+
+def test_existing_file_in_destination_counts_as_done(golden_queue):
+    src, dst, queue_path, clips = golden_queue
+    (dst / 'azul').mkdir(parents=True)
+    (dst / 'azul' / 'azul.avi').write_bytes(b'outro arquivo')
+    ob.run_coordinator(src, dst, queue_path, ob.RunOptions(isolation=False))
+
+    jobs = start_workers(queue_path, 1)
+
+    assert jobs[str(src.absolute() / 'azul.avi')] == ('done', 1)
+    assert (dst / 'azul' / 'azul.avi').read_bytes() == b'outro arquivo'
+
+
+def test_expired_lease_on_the_last_attempt_is_failed(tmp_path):
+    queue = ob.JobQueue(tmp_path / 'fila.db')
+    try:
+        queue.enqueue([tmp_path / 'a.mp4'])
+        for _ in range(ob.JobQueue.MAX_ATTEMPTS):
+            # Prazo negativo: o worker "morre" logo após reservar
+            assert len(queue.claim('w', 1, -1.0)) == 1
+        assert queue.remaining() == 0
+
+        assert queue.claim('w', 1, -1.0) == []
+        assert queue.stats() == {'failed': 1}
+    finally:
+        queue.close()
+
+
+def test_workers_write_a_catalog_for_relink(golden_queue):
+    src, dst, queue_path, clips = golden_queue
+    ob.run_coordinator(src, dst, queue_path, ob.RunOptions(isolation=False, output_mode='symlink'))
+
+    # Os workers gravam catálogos parciais; o coordenador os junta ao final
+    assert ob.run_local_workers(queue_path, 2, batch_size=2) == {'done': len(clips)}
+
+    assert not list(dst.glob(f'{ob.Catalog.PART_PREFIX}*.json'))
+    assert sorted(Path(key).name for key in ob.Catalog(dst).entries) == sorted(path.name for path, _ in clips)
+    original = ob.DEFAULT_CONFIG['min_color_percent']
+    try:
+        # 'azul-predominante' tem 30% de amarelo: com limiar de 35% vira só azul (já está em azul);
+        # 'tres-cores' (33% cada) deixa de ter cores dominantes
+        ob.DEFAULT_CONFIG['min_color_percent'] = 35
+        assert ob.relink_catalog(dst, log=lambda message: None) >= 1
+    finally:
+        ob.DEFAULT_CONFIG['min_color_percent'] = original
+    assert (dst / 'nao-identificado' / 'tres-cores.avi').is_symlink()
+    assert os.path.realpath(dst / 'nao-identificado' / 'tres-cores.avi') == str(src.absolute() / 'tres-cores.avi')
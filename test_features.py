@@ -0,0 +1,78 @@
+"""Saídas extras da análise: linha do tempo de cores, brilho e movimento, na mesma decodificação."""
+
+import cv2
+import numpy as np
+import pytest
+
+import organize_backgrounds as ob
+
+BLUE = (200, 0, 0)
+RED = (0, 0, 220)
+
+
+def write_clip(path, colors, size=(320, 180)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, size)
+    for color in colors:
+        writer.write(np.full((size[1], size[0], 3), color, np.uint8))
+    writer.release()
+    return path
+
+
+def count_captures(monkeypatch):
+    opened = []
+    original = cv2.VideoCapture
+
+    def capture(*args):
+        opened.append(args[0])
+        return original(*args)
+
+    monkeypatch.setattr(ob.cv2, 'VideoCapture', capture)
+    return opened
+
+
+def test_motion_score_is_zero_for_static_and_full_for_flashes():
+    black = np.zeros(ob.MOTION_THUMBNAIL_SIZE[::-1], np.uint8)
+    white = np.full_like(black, 255)
+
+    assert ob.motion_score([black]) == 0.0
+    assert ob.motion_score([black, black, black]) == 0.0
+    assert ob.motion_score([black, white, black]) == pytest.approx(100.0)
+
+
+def test_features_come_from_a_single_decode(tmp_path, monkeypatch):
+    path = write_clip(tmp_path / 'pisca.avi', [BLUE, RED] * 4)
+    static = write_clip(tmp_path / 'parado.avi', [BLUE] * 8)
+    opened = count_captures(monkeypatch)
+
+    analysis = ob.analyze_video(path)
+    still = ob.analyze_video(static)
+
+    assert opened == [str(path), str(static)]
+    columns = list(analysis.percentages)
+    timeline = analysis.color_timeline
+    assert timeline.dtype == np.uint8
+    assert timeline.shape == (analysis.frames_processed, len(columns))
+    assert {int(row.argmax()) for row in timeline} == {columns.index('azul'), columns.index('vermelho')}
+    assert analysis.motion > still.motion == 0.0
+    assert still.luminance == pytest.approx(cv2.cvtColor(np.uint8([[BLUE]]), cv2.COLOR_BGR2GRAY)[0, 0], abs=2)
+
+
+def test_features_are_stored_in_the_journal_and_catalog(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    path = write_clip(src / 'pisca.avi', [BLUE, RED] * 4)
+
+    ob.organize_videos([path], dst, ob.RunOptions(output_mode='symlink', analysis_workers=1),
+                       log=lambda message: None)
+
+    entry = ob.Catalog(dst).entries[str(path.absolute())]
+    journal = ob.RunJournal(dst)
+    try:
+        analyzed = journal.stages(path)['analyzed']
+    finally:
+        journal.close()
+    for stored in (entry, analyzed):
+        assert len(stored['timeline']) == min(ob.DEFAULT_CONFIG['sample_frames'], 8)
+        assert stored['motion'] > 0
+        assert stored['luminance'] > 0
+    assert entry['timeline'] == analyzed['timeline']
@@ -0,0 +1,49 @@
+"""Conjunto de referência: as implementações rápidas não podem mudar a pasta dos vídeos."""
+
+import pytest
+
+import organize_backgrounds as ob
+
+
+def test_confusion_matrix_counts_pairs():
+    matrix = ob.confusion_matrix(['azul', 'azul', 'verde'], ['azul', 'verde', 'verde'])
+    assert matrix == {('azul', 'azul'): 1, ('azul', 'verde'): 1, ('verde', 'verde'): 1}
+
+
+def test_configs_are_parsed_and_validated():
+    assert ob.parse_golden_configs('numpy:area, python:stride') == [('numpy', 'area'), ('python', 'stride')]
+    with pytest.raises(ValueError):
+        ob.parse_golden_configs('numpy:lanczos')
+    with pytest.raises(ValueError):
+        ob.parse_golden_configs('numpy')
+
+
+def test_fast_paths_match_the_reference():
+    assert ob.run_golden_set(configs=[('numpy', 'area'), ('numpy', 'stride')], log=lambda message: None)
+
+
+def test_a_broken_fast_path_fails_the_gate(monkeypatch):
+    original = ob.subsample_frame
+
+    def subsample_frame(frame, strategy, width, seed=0):
+        pixels = original(frame, strategy, width, seed)
+        # Canais trocados (RGB em vez de BGR): azul e vermelho se invertem
+        return pixels[..., ::-1] if strategy == 'stride' else pixels
+
+    monkeypatch.setattr(ob, 'subsample_frame', subsample_frame)
+    messages = []
+
+    assert not ob.run_golden_set(configs=[('numpy', 'stride')], log=messages.append)
+    assert any('referência × obtido' in message for message in messages)
+    assert any('azul.avi: rótulo azul, referência azul → vermelho' in message for message in messages)
+
+
+def test_labelled_corpus_is_checked_against_its_folders(tmp_path):
+    corpus = tmp_path / 'corpus'
+    (corpus / 'verde').mkdir(parents=True)
+    path, _ = ob.make_golden_clips(tmp_path)[4]  # azul
+    path.rename(corpus / 'verde' / 'rotulo-errado.avi')
+    messages = []
+
+    assert not ob.run_golden_set(corpus, threshold=100.0, configs=[('numpy', 'area')], log=messages.append)
+    assert any('rotulo-errado.avi: rótulo verde, referência azul → azul' in message for message in messages)
@@ -0,0 +1,100 @@
+"""Diário de execução: etapas concluídas sobrevivem a interrupções e a cópia nunca fica truncada."""
+
+import shutil
+
+import pytest
+
+import organize_backgrounds as ob
+
+
+@pytest.fixture
+def golden(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    return src, dst, ob.make_golden_clips(src)
+
+
+def record_analyses(monkeypatch):
+    """Registra os vídeos analisados (análise no próprio processo)."""
+    analyzed = []
+    original = ob.analyze_video
+
+    def analyze_video(video_path, *args, **kwargs):
+        analyzed.append(video_path.name)
+        return original(video_path, *args, **kwargs)
+
+    monkeypatch.setattr(ob, 'analyze_video', analyze_video)
+    return analyzed
+
+
+def test_stages_are_reloaded_and_a_truncated_line_is_ignored(tmp_path):
+    video = tmp_path / 'ceu.mp4'
+    video.write_bytes(b'video')
+    journal = ob.RunJournal(tmp_path)
+    journal.record(video, 'analyzed', colors=[['azul', 80.0]])
+    journal.record(video, 'copied', dest='azul/ceu.mp4')
+    journal.close()
+    with open(tmp_path / ob.RunJournal.FILE_NAME, 'a', encoding='utf-8') as f:
+        f.write('{"path": "interrompido')
+
+    journal = ob.RunJournal(tmp_path)
+    try:
+        assert set(journal.stages(video)) == {'analyzed', 'copied'}
+        assert journal.stages(video)['analyzed']['colors'] == [['azul', 80.0]]
+    finally:
+        journal.close()
+
+
+def test_changed_source_discards_the_earlier_stages(tmp_path):
+    video = tmp_path / 'ceu.mp4'
+    video.write_bytes(b'video')
+    journal = ob.RunJournal(tmp_path)
+    try:
+        journal.record(video, 'analyzed', colors=[])
+        video.write_bytes(b'outro video')
+        assert journal.stages(video) == {}
+    finally:
+        journal.close()
+
+
+def test_interrupted_run_resumes_without_redoing_finished_stages(golden, monkeypatch):
+    src, dst, clips = golden
+    options = ob.RunOptions(isolation=False)
+    analyzed = record_analyses(monkeypatch)
+    original = ob.copy_video
+    copies = []
+
+    def interrupted_copy(src_path, *args, **kwargs):
+        if len(copies) == 3:
+            raise KeyboardInterrupt  # Programa fechado no meio da execução
+        copies.append(src_path.name)
+        return original(src_path, *args, **kwargs)
+
+    monkeypatch.setattr(ob, 'copy_video', interrupted_copy)
+    with pytest.raises(KeyboardInterrupt):
+        ob.organize_videos([path for path, _ in clips], dst, options, log=lambda message: None)
+    first_run = list(analyzed)
+    assert len(first_run) == 4  # O quarto foi analisado, mas não copiado
+
+    analyzed.clear()
+    monkeypatch.setattr(ob, 'copy_video', original)
+    ob.organize_videos([path for path, _ in clips], dst, options, log=lambda message: None)
+
+    assert sorted(analyzed + first_run) == sorted(path.name for path, _ in clips)
+    for path, expected in clips:
+        assert (dst / expected / path.name).read_bytes() == path.read_bytes()
+    assert not list(dst.rglob('*.part'))
+
+
+def test_failed_copy_leaves_no_file_in_the_destination(tmp_path, monkeypatch):
+    src = tmp_path / 'ceu.mp4'
+    src.write_bytes(b'video completo')
+
+    def partial_copy(src_path, dest_path):
+        with open(dest_path, 'wb') as f:
+            f.write(b'vid')
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr(shutil, 'copy2', partial_copy)
+    assert ob.copy_video(src, tmp_path / 'azul') is None
+    assert list((tmp_path / 'azul').iterdir()) == []
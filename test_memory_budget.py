@@ -0,0 +1,45 @@
+"""Orçamento de memória: quantas análises cabem juntas, pela resolução e pelo codec."""
+
+import organize_backgrounds as ob
+
+MB = 1024 * 1024
+
+
+def meta(width, height, codec='avc1', duration=10.0):
+    return ob.VideoMetadata(duration=duration, width=width, height=height, codec=codec)
+
+
+def admitted(budget, videos, segments=2):
+    """Reserva até o primeiro vídeo que não couber; retorna quantos entraram."""
+    count = 0
+    for video in videos:
+        if budget.reserve(video, segments) is None:
+            break
+        count += 1
+    return count
+
+
+def test_small_videos_share_the_budget():
+    budget = ob.MemoryBudget(2048 * MB)
+    assert admitted(budget, [meta(640, 360)] * 8) == 8
+
+
+def test_large_prores_runs_alone_when_over_the_budget():
+    budget = ob.MemoryBudget(512 * MB)
+    assert budget.reserve(meta(7680, 4320, 'ap4h'), 2) is not None
+    assert budget.reserve(meta(640, 360), 2) is None
+
+
+def test_unknown_resolution_is_not_treated_as_small():
+    limit = 2048 * MB
+    unknown = [None, meta(0, 0, codec='')]
+    assert admitted(ob.MemoryBudget(limit), unknown * 4) < admitted(ob.MemoryBudget(limit), [meta(1920, 1080)] * 8)
+    _, amount = ob.MemoryBudget(limit).reserve(None, 2)
+    assert amount >= ob.estimate_decode_memory(meta(3840, 2160, 'ap4h'))
+
+
+def test_unknown_resolution_uses_the_largest_seen():
+    budget = ob.MemoryBudget(64 * 1024 * MB)
+    _, known = budget.reserve(meta(7680, 4320, 'ap4h', duration=3600), 1)
+    _, unknown = budget.reserve(None, 1)
+    assert unknown == known == ob.estimate_decode_memory(meta(7680, 4320, 'ap4h'))
@@ -0,0 +1,90 @@
+"""Métricas: formato de texto do Prometheus, arquivo atômico, rota /metrics e contagem de uma execução."""
+
+import socket
+import urllib.request
+
+import organize_backgrounds as ob
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_counters_and_histograms_are_rendered():
+    metrics = ob.Metrics()
+    metrics.inc('organizador_files_total', folder='azul', result='ok')
+    metrics.inc('organizador_files_total', folder='azul', result='ok')
+    metrics.inc('organizador_bytes_copied_total', 1536)
+    metrics.observe('organizador_stage_seconds', 0.2, stage='copy')
+    metrics.observe('organizador_stage_seconds', 3.0, stage='copy')
+
+    lines = metrics.render().splitlines()
+
+    assert '# TYPE organizador_files_total counter' in lines
+    assert 'organizador_files_total{folder="azul",result="ok"} 2' in lines
+    assert 'organizador_bytes_copied_total 1536' in lines
+    # Faixas cumulativas: 0,2 s entra em "le=0.25" e em todas as maiores
+    assert 'organizador_stage_seconds_bucket{stage="copy",le="0.1"} 0' in lines
+    assert 'organizador_stage_seconds_bucket{stage="copy",le="0.25"} 1' in lines
+    assert 'organizador_stage_seconds_bucket{stage="copy",le="5"} 2' in lines
+    assert 'organizador_stage_seconds_bucket{stage="copy",le="+Inf"} 2' in lines
+    assert 'organizador_stage_seconds_sum{stage="copy"} 3.2' in lines
+    assert 'organizador_stage_seconds_count{stage="copy"} 2' in lines
+
+
+def test_label_values_are_escaped():
+    metrics = ob.Metrics()
+    metrics.inc('organizador_errors_total', folder='a"b\\c', stage='copy')
+    assert 'organizador_errors_total{folder="a\\"b\\\\c",stage="copy"} 1' in metrics.render().splitlines()
+
+
+def test_totals_and_means_for_the_stats_panel():
+    metrics = ob.Metrics()
+    metrics.inc('organizador_files_total', folder='azul', result='ok')
+    metrics.inc('organizador_files_total', folder='verde', result='ok')
+    metrics.inc('organizador_files_total', folder='verde', result='error')
+    metrics.observe('organizador_stage_seconds', 1.0, stage='analysis')
+    metrics.observe('organizador_stage_seconds', 3.0, stage='analysis')
+
+    assert metrics.total('organizador_files_total') == 3
+    assert metrics.total('organizador_files_total', result='ok') == 2
+    assert metrics.by_label('organizador_files_total', 'folder', result='ok') == {'azul': 1, 'verde': 1}
+    assert metrics.total('organizador_stage_seconds', stage='analysis') == 2
+    assert metrics.mean('organizador_stage_seconds', stage='analysis') == 2.0
+    assert metrics.mean('organizador_stage_seconds', stage='copy') == 0.0
+
+
+def test_exporter_writes_the_file_and_serves_metrics(tmp_path):
+    path = tmp_path / 'organizador.prom'
+    port = free_port()
+    exporter = ob.MetricsExporter(path, port, interval=60)
+    try:
+        ob.METRICS.inc('organizador_cache_hits_total', source='teste')
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=10) as response:
+            body = response.read().decode()
+    finally:
+        exporter.close()
+
+    assert 'organizador_cache_hits_total{source="teste"}' in body
+    assert path.read_text(encoding='utf-8') == ob.METRICS.render()
+    assert [p.name for p in tmp_path.iterdir()] == ['organizador.prom']
+
+
+def test_a_run_is_counted_per_folder(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    clips = ob.make_golden_clips(src)
+    before = ob.METRICS.by_label('organizador_files_total', 'folder', result='ok')
+    copied = ob.METRICS.total('organizador_bytes_copied_total')
+
+    ob.organize_videos([path for path, _ in clips], dst, ob.RunOptions(resume=False, analysis_workers=1),
+                       log=lambda message: None)
+
+    after = ob.METRICS.by_label('organizador_files_total', 'folder', result='ok')
+    expected = {}
+    for _, folder in clips:
+        expected[folder] = expected.get(folder, 0) + 1
+    assert {folder: after[folder] - before.get(folder, 0) for folder in expected} == expected
+    assert ob.METRICS.total('organizador_bytes_copied_total') - copied == sum(p.stat().st_size for p, _ in clips)
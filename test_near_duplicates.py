@@ -0,0 +1,53 @@
+"""Quase-duplicados: o modo 'representative' só reaproveita análises de vídeos realmente parecidos."""
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import organize_backgrounds as ob
+
+
+def write_clip(path: Path, color_bgr, size=(640, 360), frames=4):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, size)
+    image = np.full((size[1], size[0], 3), color_bgr, np.uint8)
+    for _ in range(frames):
+        writer.write(image)
+    writer.release()
+    return path
+
+
+def test_golden_clips_keep_their_folders_in_representative_mode(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    clips = ob.make_golden_clips(src)
+    options = ob.RunOptions(near_duplicates='representative', resume=False, probe=False)
+
+    ob.organize_videos([path for path, _ in clips], dst, options, log=lambda message: None)
+
+    for path, expected in clips:
+        assert (dst / expected / path.name).exists(), f"{path.name} fora de {expected}"
+
+
+def test_flat_backgrounds_with_close_hash_and_mean_are_not_grouped(tmp_path):
+    clips = dict((path.stem, path) for path, _ in ob.make_golden_clips(tmp_path))
+    index = ob.NearDuplicateIndex(ob.DEFAULT_CONFIG['phash_max_distance'])
+    index.add(ob.analyze_video(clips['cinza']))
+
+    analysis = ob.analyze_video(clips['preto-e-branco'], near_duplicates=index)
+
+    assert analysis.duplicate_of is None
+    assert ob.select_dominant_colors(analysis.percentages)[0][0] == 'preto-branco'
+
+
+def test_same_content_in_another_resolution_reuses_the_analysis(tmp_path):
+    large = write_clip(tmp_path / 'azul_hd.avi', (200, 0, 0), size=(1280, 720))
+    small = write_clip(tmp_path / 'azul_sd.avi', (200, 0, 0), size=(320, 180))
+    index = ob.NearDuplicateIndex(ob.DEFAULT_CONFIG['phash_max_distance'])
+    index.add(ob.analyze_video(large))
+
+    analysis = ob.analyze_video(small, near_duplicates=index)
+
+    assert analysis.duplicate_of == large
+    assert analysis.percentages == index.find(
+        analysis.frame_hashes, analysis.frame_means, analysis.color_timeline.tolist()).percentages
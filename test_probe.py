@@ -0,0 +1,64 @@
+"""Leitura prévia de metadados: cabeçalhos no processo principal, OpenCV só nos processos isolados."""
+
+import os
+
+import cv2
+import numpy as np
+
+import organize_backgrounds as ob
+
+
+def write_mkv_as_mov(path, frames=4, size=(320, 180)):
+    """Vídeo que o OpenCV abre, mas cujo cabeçalho (Matroska) o leitor de MP4/AVI não reconhece."""
+    mkv = path.with_suffix('.mkv')
+    writer = cv2.VideoWriter(str(mkv), cv2.VideoWriter_fourcc(*'MJPG'), 10, size)
+    for _ in range(frames):
+        writer.write(np.full((size[1], size[0], 3), (200, 0, 0), np.uint8))
+    writer.release()
+    mkv.rename(path)
+    return path
+
+
+def record_opencv_probes(monkeypatch):
+    """Registra o pid de cada leitura pelo OpenCV (os processos de análise são forks)."""
+    calls = []
+    original = ob._probe_opencv
+
+    def probe(video_path):
+        calls.append(os.getpid())
+        return original(video_path)
+
+    monkeypatch.setattr(ob, '_probe_opencv', probe)
+    return calls
+
+
+def test_avi_header_is_read_without_opencv(tmp_path, monkeypatch):
+    calls = record_opencv_probes(monkeypatch)
+    path, _ = ob.make_golden_clips(tmp_path, frames=6)[0]
+
+    meta = ob.probe_metadata(path)
+
+    assert (meta.source, meta.frame_count, meta.width, meta.height, meta.codec) == ('avi', 6, 640, 360, 'MJPG')
+    assert calls == []
+
+
+def test_unreadable_header_falls_back_to_opencv_only_when_allowed(tmp_path, monkeypatch):
+    calls = record_opencv_probes(monkeypatch)
+    path = write_mkv_as_mov(tmp_path / 'azul.mov')
+
+    assert ob.probe_metadata(path, opencv_fallback=False) is None
+    assert calls == []
+    assert ob.probe_metadata(path).frame_count == 4
+    assert calls == [os.getpid()]
+
+
+def test_isolated_run_never_opens_videos_in_the_main_process(tmp_path, monkeypatch):
+    calls = record_opencv_probes(monkeypatch)
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    path = write_mkv_as_mov(src / 'azul.mov')
+
+    ob.organize_videos([path], dst, ob.RunOptions(resume=False, analysis_workers=1), log=lambda message: None)
+
+    assert (dst / 'azul' / 'azul.mov').exists()
+    assert os.getpid() not in calls
@@ -0,0 +1,66 @@
+"""Progresso e ordem da fila: custo estimado por vídeo, vazão aprendida e previsão de término."""
+
+from pathlib import Path
+
+import pytest
+
+import organize_backgrounds as ob
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ob.time, 'time', clock)
+    return clock
+
+
+def make_file(path, size):
+    path.write_bytes(b'\0' * size)
+    return path
+
+
+def test_cost_grows_with_resolution_gop_and_size(tmp_path):
+    small = make_file(tmp_path / 'pequeno.mp4', 1024)
+    large = make_file(tmp_path / 'grande.mp4', 50 * 1024 * 1024)
+    hd = ob.VideoMetadata(width=1920, height=1080, gop=12)
+
+    assert ob.estimate_cost(small, hd) == pytest.approx(1.0, abs=0.01)
+    assert ob.estimate_cost(small, ob.VideoMetadata(width=3840, height=2160, gop=12)) > ob.estimate_cost(small, hd)
+    assert ob.estimate_cost(small, ob.VideoMetadata(width=1920, height=1080, gop=120)) > ob.estimate_cost(small, hd)
+    assert ob.estimate_cost(large, hd) == pytest.approx(1.5, abs=0.01)
+    assert ob.estimate_cost(tmp_path / 'sumiu.mp4') == 1.0
+
+
+def test_schedule_orders_by_cost():
+    costs = {Path('b'): 2.0, Path('a'): 1.0, Path('c'): 3.0}
+    files = list(costs)
+
+    assert ob.schedule_videos(files, 'shortest', costs) == [Path('a'), Path('b'), Path('c')]
+    assert ob.schedule_videos(files, 'largest', costs) == [Path('c'), Path('b'), Path('a')]
+    assert ob.schedule_videos(files, 'none', costs) == files
+
+
+def test_eta_follows_the_measured_throughput(clock):
+    costs = {Path('a'): 1.0, Path('b'): 3.0, Path('c'): 1.0, Path('d'): 5.0}
+    progress = ob.ProgressEstimator(costs)
+    assert progress.eta() is None
+
+    clock.now += 2.0
+    progress.complete(Path('a'))  # 0,5 de custo por segundo
+    assert progress.fraction() == pytest.approx(0.1)
+    assert progress.eta() == pytest.approx(9.0 / 0.5)
+
+    clock.now += 6.0
+    progress.complete(Path('b'))  # Mesma vazão: a previsão não muda de ritmo
+    assert progress.fraction() == pytest.approx(0.4)
+    assert progress.eta() == pytest.approx(6.0 / 0.5)
+    assert progress.files_per_minute() == pytest.approx(15.0)
+    assert progress.summary() == "2/4 • 15.0 arquivos/min • restante ~00:00:12"
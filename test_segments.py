@@ -0,0 +1,49 @@
+"""Vídeos divididos em trechos: o pool de processos se recupera da morte de um processo."""
+
+import os
+import signal
+
+import pytest
+
+import organize_backgrounds as ob
+
+
+@pytest.fixture
+def split_everything():
+    original = dict(ob.DEFAULT_CONFIG)
+    ob.DEFAULT_CONFIG.update(split_min_duration=0, split_workers=2, sample_frames=8)
+    yield
+    ob.DEFAULT_CONFIG.clear()
+    ob.DEFAULT_CONFIG.update(original)
+    ob.reset_segment_pool()
+
+
+def kill_one_segment_worker():
+    pool = ob.get_segment_pool(2)
+    # Os processos do pool só existem depois da primeira tarefa
+    pool.submit(os.getpid).result()
+    os.kill(next(iter(pool._processes)), signal.SIGKILL)
+
+
+def test_split_analysis_recovers_after_a_segment_worker_is_killed(tmp_path, split_everything):
+    clips = {path.stem: (path, expected) for path, expected in ob.make_golden_clips(tmp_path, frames=8)}
+    path, expected = clips['azul']
+    reference = ob.analyze_video(path)
+
+    kill_one_segment_worker()
+    analysis = ob.analyze_video(path)
+
+    assert analysis.error is None
+    assert analysis.frames_processed == reference.frames_processed == 8
+    assert analysis.percentages == reference.percentages
+    assert ob.get_destination_folder(ob.select_dominant_colors(analysis.percentages), tmp_path).name == expected
+
+
+def test_later_split_analyses_use_a_new_pool(tmp_path, split_everything):
+    clips = ob.make_golden_clips(tmp_path, frames=8)
+    kill_one_segment_worker()
+
+    for path, expected in clips:
+        analysis = ob.analyze_video(path)
+        assert analysis.frames_processed == 8, path.name
+        assert ob.get_destination_folder(ob.select_dominant_colors(analysis.percentages), tmp_path).name == expected
@@ -0,0 +1,86 @@
+"""Modo serviço: só atende o cliente local (token, JSON, sem navegador) e compartilha o cache."""
+
+import http.client
+import json
+import threading
+
+import pytest
+
+import organize_backgrounds as ob
+import organizer_client
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    service = ob.OrganizerService(workers=1)
+    server, _ = ob.create_service_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield service, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def post(port, path, payload, headers):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('POST', path, body=json.dumps(payload).encode(), headers=headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'{}')
+    finally:
+        conn.close()
+
+
+def test_token_file_is_private(service):
+    _, port = service
+    path = ob.service_token_path(port)
+    assert path == organizer_client.token_path(port)
+    assert path.stat().st_mode & 0o077 == 0
+
+
+def test_browser_style_requests_are_refused(service, tmp_path):
+    _, port = service
+    token = ob.service_token_path(port).read_text()
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    ob.make_golden_clips(src)
+    payload = {'src': str(src), 'dst': str(dst), 'options': {'delete_source': True}}
+
+    # Formulário/fetch "simples" de outra página: text/plain, sem preflight
+    assert post(port, '/organize', payload, {'Content-Type': 'text/plain'})[0] == 415
+    assert post(port, '/organize', payload, {'Content-Type': 'application/json',
+                                              ob.SERVICE_TOKEN_HEADER: token,
+                                              'Origin': 'http://example.com'})[0] == 403
+    assert post(port, '/organize', payload, {'Content-Type': 'application/json'})[0] == 401
+    assert not dst.exists()
+    assert len(list(src.iterdir())) == len(ob.GOLDEN_CLIPS)
+
+
+def test_organize_reuses_the_classify_cache(service, tmp_path):
+    organizer, port = service
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    clips = ob.make_golden_clips(src)
+
+    organizer_client.classify([str(path) for path, _ in clips], port=port)
+    assert organizer.cache_hits == 0
+    organizer_client.organize(str(src), str(dst), {'resume': False}, port=port)
+
+    assert organizer.cache_hits == len(clips)
+    for path, expected in clips:
+        assert (dst / expected / path.name).exists()
+
+
+def test_classify_reuses_the_organize_cache(service, tmp_path):
+    organizer, port = service
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    clips = ob.make_golden_clips(src)
+
+    organizer_client.organize(str(src), str(dst), {'resume': False}, port=port)
+    results = organizer_client.classify([str(path) for path, _ in clips], port=port)
+
+    assert organizer.cache_hits == len(clips)
+    assert [r['folder'] for r in results] == [expected for _, expected in clips]
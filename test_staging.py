@@ -0,0 +1,96 @@
+"""Leitura antecipada: cópia local limitada em tamanho, usada pela análise e pela cópia."""
+
+import os
+
+import cv2
+import pytest
+
+import organize_backgrounds as ob
+
+
+def make_files(folder, sizes):
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i, size in enumerate(sizes):
+        path = folder / f'video{i}.mp4'
+        path.write_bytes(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def stager_for(tmp_path):
+    stagers = []
+
+    def create(files, max_bytes, checksum=False):
+        stager = ob.SourceStager(files, tmp_path / 'ssd', max_bytes, checksum=checksum, log=lambda message: None)
+        stagers.append(stager)
+        return stager
+
+    yield create
+    for stager in stagers:
+        stager.close()
+
+
+def test_staged_copies_stay_within_the_size_cap(tmp_path, stager_for):
+    files = make_files(tmp_path / 'nas', [1000, 1000, 1000])
+    stager = stager_for(files, max_bytes=2500)
+
+    first, second = stager.get(files[0]), stager.get(files[1])
+    assert first != files[0] and first.name == files[0].name
+    assert first.read_bytes() == files[0].read_bytes()
+    assert second.read_bytes() == files[1].read_bytes()
+    assert stager.get(files[2], wait=False) is None  # A área está cheia
+
+    stager.release(files[0])
+    assert not first.exists()
+    assert stager.get(files[2]).read_bytes() == files[2].read_bytes()
+
+
+def test_file_larger_than_the_area_is_read_from_the_source(tmp_path, stager_for):
+    files = make_files(tmp_path / 'nas', [5000, 100])
+    stager = stager_for(files, max_bytes=1000)
+
+    assert stager.get(files[0]) == files[0]
+    assert stager.get(files[1]) != files[1]
+
+
+def test_source_checksum_is_computed_while_staging(tmp_path, stager_for):
+    files = make_files(tmp_path / 'nas', [3 * ob.PARTIAL_HASH_BYTES])
+    stager = stager_for(files, max_bytes=10 ** 7, checksum=True)
+
+    stager.get(files[0])
+    assert stager.source_checksum(files[0]) == ob.file_checksum(files[0])
+
+
+def test_close_removes_the_staging_area(tmp_path):
+    files = make_files(tmp_path / 'nas', [100, 100])
+    stager = ob.SourceStager(files, tmp_path / 'ssd', 10 ** 6, log=lambda message: None)
+    stager.get(files[1])
+    stager.close()
+    assert list((tmp_path / 'ssd').iterdir()) == []
+
+
+def test_analysis_and_copy_read_the_staged_copy(tmp_path, monkeypatch):
+    src, dst = tmp_path / 'nas', tmp_path / 'dst'
+    src.mkdir()
+    clips = ob.make_golden_clips(src)
+    opened = []
+    original = cv2.VideoCapture
+
+    def capture(*args):
+        opened.append(str(args[0]))
+        return original(*args)
+
+    monkeypatch.setattr(ob.cv2, 'VideoCapture', capture)
+    options = ob.RunOptions(resume=False, isolation=False, verify=True, delete_source=True,
+                            staging_dir=str(tmp_path / 'ssd'), staging_max_gb=0.01)
+
+    ob.organize_videos([path for path, _ in clips], dst, options, log=lambda message: None)
+
+    assert len(opened) == len(clips)
+    assert not any(path.startswith(str(src)) for path in opened)
+    for path, expected in clips:
+        assert not path.exists()
+        assert (dst / expected / path.name).exists()
+    assert list((tmp_path / 'ssd').iterdir()) == []
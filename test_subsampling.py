@@ -0,0 +1,70 @@
+"""Estratégias de redução dos quadros: formato, determinismo e concordância com a referência."""
+
+import numpy as np
+import pytest
+
+import organize_backgrounds as ob
+
+
+def striped_frame(width=1280, height=720):
+    """Metade esquerda azul, metade direita vermelha (BGR), com ruído para as amostras variarem."""
+    rng = np.random.default_rng(1)
+    frame = rng.integers(0, 8, (height, width, 3), dtype=np.uint8)
+    frame[:, :width // 2, 0] += 200
+    frame[:, width // 2:, 2] += 200
+    return frame
+
+
+@pytest.mark.parametrize('strategy', ob.SUBSAMPLE_STRATEGIES)
+def test_every_strategy_keeps_the_color_proportions(strategy):
+    pixels = ob.subsample_frame(striped_frame(), strategy, 160)
+
+    assert pixels.ndim == 3 and pixels.shape[2] == 3
+    blue = (pixels[..., 0] > 100).mean()
+    assert blue == pytest.approx(0.5, abs=0.1)
+
+
+def test_stride_is_a_view_without_copy():
+    frame = striped_frame()
+    pixels = ob.subsample_frame(frame, 'stride', 160)
+
+    assert np.shares_memory(pixels, frame)
+    assert pixels.shape == (90, 160, 3)
+
+
+@pytest.mark.parametrize('strategy', ['random', 'stratified'])
+def test_pixel_sampling_is_repeatable_per_seed(strategy):
+    frame = striped_frame()
+    first = ob.subsample_frame(frame, strategy, 160, seed=7)
+
+    assert first.shape[0] == 1
+    assert np.array_equal(first, ob.subsample_frame(frame, strategy, 160, seed=7))
+    assert not np.array_equal(first, ob.subsample_frame(frame, strategy, 160, seed=8))
+
+
+def test_center_region_counts_twice():
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    frame[..., 2] = 220  # Vermelho nas bordas
+    frame[180:540, 320:960] = (220, 0, 0)  # Azul no centro (1/4 da área)
+
+    area = ob.subsample_frame(frame, 'area', 160)
+    center = ob.subsample_frame(frame, 'center', 160)
+
+    assert (area[..., 0] > 100).mean() == pytest.approx(0.25, abs=0.02)
+    assert (center[..., 0] > 100).mean() == pytest.approx(0.75, abs=0.02)  # (1/4 + 1 + 1) / 3
+
+
+def test_report_on_the_golden_clips(tmp_path):
+    clips = [path for path, _ in ob.make_golden_clips(tmp_path)]
+    original = dict(ob.DEFAULT_CONFIG)
+
+    rows = ob.subsampling_report(clips, widths=[80, 160], log=lambda message: None)
+
+    assert ob.DEFAULT_CONFIG == original
+    assert (rows[0]['strategy'], rows[0]['width']) == ('area', original['resize_width'])
+    assert len(rows) == 1 + 2 * len(ob.SUBSAMPLE_STRATEGIES)
+    differences = {(row['strategy'], row['width']): sorted(p.name for p in row['differences']) for row in rows}
+    # Faixas verticais uniformes: só o peso dobrado do centro (faixa verde) muda a pasta de 'tres-cores'
+    assert {key: names for key, names in differences.items() if names} == {
+        ('center', 80): ['tres-cores.avi'], ('center', 160): ['tres-cores.avi']}
+    assert rows[1]['agreement'] == 100.0
@@ -0,0 +1,39 @@
+"""Verificação das cópias por checksum: na dúvida, a origem fica e a cópia sai."""
+
+import organize_backgrounds as ob
+
+
+def test_unexpected_error_in_verification_keeps_the_source(tmp_path, monkeypatch):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    clips = ob.make_golden_clips(src)
+    original = ob.verify_copy
+
+    def verify_copy(src_path, dest_path, expected):
+        if src_path.stem == 'azul':
+            raise ValueError('falha simulada no hash')
+        return original(src_path, dest_path, expected)
+
+    monkeypatch.setattr(ob, 'verify_copy', verify_copy)
+    options = ob.RunOptions(resume=False, verify=True, delete_source=True, analysis_workers=1)
+    ob.organize_videos([path for path, _ in clips], dst, options, log=lambda message: None)
+
+    for path, expected in clips:
+        if path.stem == 'azul':
+            assert path.exists()
+            assert not (dst / expected / path.name).exists()
+        else:
+            assert not path.exists()
+            assert (dst / expected / path.name).exists()
+
+
+def test_collect_reports_any_exception_as_unverified(tmp_path, monkeypatch):
+    monkeypatch.setattr(ob, 'verify_copy', lambda *args: 1 / 0)
+    verifier = ob.CopyVerifier(workers=1)
+    try:
+        verifier.submit(tmp_path / 'a.mp4', tmp_path / 'b.mp4', None)
+        [(src_path, dest_path, ok, error)] = verifier.collect(wait=True)
+    finally:
+        verifier.close()
+    assert (src_path.name, dest_path.name, ok) == ('a.mp4', 'b.mp4', False)
+    assert error.startswith('ZeroDivisionError')